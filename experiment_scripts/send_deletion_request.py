@@ -16,14 +16,21 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-H', '--host', help='SaltyRTC server IP', default='127.0.0.1')
 parser.add_argument('-p', '--port', help='SaltyRTC server port', type=int, default=8765)
 parser.add_argument('-c', '--certs', help='path to certificate', default='../saltyrtc.crt')
-parser.add_argument('-t', '--taint', help='taint ID of the user to be deleted', type=int, default=512)  # required=True)
+parser.add_argument('-t', '--taint', help='taint ID(s) of the user(s) to be deleted', type=int, nargs='+',
+                    default=[512])  # required=True)
+parser.add_argument('-d', '--deletion-path', help='deletion path of the server (e.g., /deletions); '
+                                                  'the legacy SPLICE request is sent if omitted')
 args = parser.parse_args()
 
 with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
     with ssl.wrap_socket(s, cert_reqs=ssl.CERT_REQUIRED, ca_certs=args.certs) as ssock:
         ssock.connect((args.host, args.port))
         print("Connected to {}:{}".format(args.host, args.port))
-        # Send a simple SPLICE deletion request with taint
+        # Send a simple SPLICE deletion request with taint. With a deletion path, the
+        # server responds with the id of the deletion job, whose status document
+        # can then be requested at <deletion path>/<id>.
         ssock.sendall(bytes('GET {path} HTTP/1.1\r\nTaints: {taints}\r\n\r\n'.
-                            format(path='SPLICE', taints=args.taint), 'utf8'))
+                            format(path=args.deletion_path or 'SPLICE', taints=', '.join(str(taint) for taint in args.taint)), 'utf8'))
         data = ssock.recv(1024)
+        if args.deletion_path:
+            print(data.decode('utf8'))
@@ -0,0 +1,67 @@
+# This python script compares the compiled Splice speedups (saltyrtc/splice/_speedups.c)
+# with the pure-Python implementation on operations that are common on the relay path
+# (e.g., slicing nonces, comparing ints). Build the speedups first, e.g. with
+# "python setup.py build_ext --inplace" in the parent directory. Each implementation
+# runs in its own process since the implementation is chosen when Splice is imported.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+WORKLOAD = r'''
+import json
+import sys
+import timeit
+import warnings
+warnings.simplefilter('ignore')
+from saltyrtc.splice import splice
+from saltyrtc.splice.splicetypes import SpliceBytes, SpliceInt, SpliceStr
+
+nonce = SpliceBytes(bytes(range(24)), trusted=False, taints=1)
+cookie = SpliceBytes(bytes(16), taints=2)
+a = SpliceInt(5, taints=4)
+b = SpliceInt(7, trusted=False, taints=8)
+s = SpliceStr('initiator', taints=16)
+number, repeat = int(sys.argv[1]), int(sys.argv[2])
+operations = {
+    'bytes slice': lambda: nonce[16:24],
+    'bytes index': lambda: nonce[17],
+    'bytes concat': lambda: cookie + nonce,
+    'int compare': lambda: a < b,
+    'int add': lambda: a + b,
+    'str split (kwargs)': lambda: s.split(sep='t'),
+}
+results = {}
+for name, operation in operations.items():
+    times = timeit.repeat(operation, number=number, repeat=repeat)
+    results[name] = min(times) / number * 1e9
+print(json.dumps({'speedups': splice.speedups, 'results': results}))
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--number', help='amount of operations per measurement',
+                    type=int, default=20000)
+parser.add_argument('-r', '--repeat', help='amount of measurements (the best one counts)',
+                    type=int, default=5)
+args = parser.parse_args()
+
+root = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+runs = {}
+for label, speedups in (('python', 'no'), ('compiled', 'yes')):
+    env = dict(os.environ, SALTYRTC_SPLICE_SPEEDUPS=speedups, PYTHONPATH=root)
+    command = [sys.executable, '-O', '-c', WORKLOAD, str(args.number), str(args.repeat)]
+    output = subprocess.check_output(command, env=env)
+    runs[label] = json.loads(output.decode('utf-8'))
+
+if not runs['compiled']['speedups']:
+    print('WARNING: the speedups have not been built, both runs use the pure-Python '
+          'implementation')
+print('{:<20} {:>12} {:>12} {:>8}'.format(
+    'operation (ns/op)', 'python', 'compiled', 'speedup'))
+for name, python_ns in runs['python']['results'].items():
+    compiled_ns = runs['compiled']['results'][name]
+    print('{:<20} {:>12.0f} {:>12.0f} {:>7.2f}x'.format(
+        name, python_ns, compiled_ns, python_ns / compiled_ns))
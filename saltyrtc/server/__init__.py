@@ -3,40 +3,52 @@ This is a SaltyRTC server implementation for Python 3.6.1+ using
 :mod:`asyncio`.
 """
 import itertools
+import os
 
 # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
-__splice__ = True
+# Note: Can be disabled with the environment variable 'SALTYRTC_SPLICE=no' (e.g. to
+#       compare both variants in benchmarks).
+__splice__ = os.environ.get('SALTYRTC_SPLICE', 'yes') != 'no'
 # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
 
 from . import (
     common,
+    deletion,
     events,
     exception,
     message,
+    metrics,
     protocol,
     server,
     task,
     util,
+    workers,
 )
 from .common import *  # noqa
+from .deletion import *  # noqa
 from .events import *  # noqa
 from .exception import *  # noqa
 from .message import *  # noqa
+from .metrics import *  # noqa
 from .protocol import *  # noqa
 from .server import *  # noqa
 from .task import *  # noqa
 from .util import *  # noqa
+from .workers import *  # noqa
 
 __all__ = tuple(itertools.chain(
-    ('bin', 'typing'),
+    ('bench', 'bin', 'typing'),
     common.__all__,
+    deletion.__all__,
     events.__all__,
     exception.__all__,
     message.__all__,
+    metrics.__all__,
     protocol.__all__,
     server.__all__,
     task.__all__,
     util.__all__,
+    workers.__all__,
 ))
 
 __author__ = 'Lennart Grahl <lennart.grahl@gmail.com>'
@@ -0,0 +1,604 @@
+"""
+A connection churn benchmark for the SaltyRTC signalling server that
+runs on a single host without any further infrastructure.
+
+Pairs of initiators and responders are driven over the loopback
+interface: Each pair performs its handshakes, relays messages from the
+initiator to the responder and disconnects again. The server runs
+either in a subprocess (once with and once without Splice) or in the
+benchmark's own process. The results are written as JSON.
+
+Run ``python -m saltyrtc.server.bench --help`` for details.
+"""
+from typing import Dict  # noqa
+from typing import List  # noqa
+from typing import (
+    IO,
+    Any,
+    Optional,
+    Tuple,
+)
+
+import asyncio
+import click
+import json
+import libnacl.public
+import os
+import resource
+import signal
+import socket
+import ssl
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import umsgpack
+import websockets
+
+from saltyrtc.server import __splice__
+
+from . import server
+from .common import (
+    NONCE_FORMATTER,
+    NONCE_LENGTH,
+    SubProtocol,
+)
+from .metrics import Histogram
+from .typing2 import ServerSecretPermanentKey
+
+__all__ = (
+    'BenchConfig',
+    'BenchStats',
+    'run_pairs',
+    'run_subprocess',
+    'run_in_process',
+    'main',
+)
+
+# Constants
+_TIMESTAMP_FORMATTER = '!d'
+_TIMESTAMP_LENGTH = struct.calcsize(_TIMESTAMP_FORMATTER)
+_SERVER_START_TIMEOUT = 30.0
+
+
+class BenchConfig:
+    """
+    The workload of a benchmark run.
+
+    Arguments:
+        - `pairs`: The amount of initiator/responder pairs.
+        - `handshake_rate`: The amount of pairs per second that start
+          their handshakes. `0` starts all pairs at once.
+        - `messages`: The amount of messages each initiator relays to
+          its responder before disconnecting.
+        - `message_size`: The size of each relayed message's payload
+          in bytes (excluding the nonce).
+        - `message_rate`: The amount of messages per second each
+          initiator sends. `0` sends as fast as possible.
+        - `timeout`: The maximum time in seconds a pair may take.
+    """
+    __slots__ = (
+        'pairs',
+        'handshake_rate',
+        'messages',
+        'message_size',
+        'message_rate',
+        'timeout',
+    )
+
+    def __init__(
+            self,
+            pairs: int = 100,
+            handshake_rate: float = 0.0,
+            messages: int = 100,
+            message_size: int = 1024,
+            message_rate: float = 0.0,
+            timeout: float = 60.0,
+    ) -> None:
+        if message_size < _TIMESTAMP_LENGTH:
+            raise ValueError('Message size must be at least {} bytes'.format(
+                _TIMESTAMP_LENGTH))
+        self.pairs = pairs
+        self.handshake_rate = handshake_rate
+        self.messages = messages
+        self.message_size = message_size
+        self.message_rate = message_rate
+        self.timeout = timeout
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BenchStats:
+    """
+    The client-side measurements of a benchmark run.
+
+    Latencies are recorded in microseconds.
+    """
+    __slots__ = (
+        'handshakes',
+        'handshake_latency',
+        'messages',
+        'bytes',
+        'relay_latency',
+        'errors',
+        'duration',
+    )
+
+    def __init__(self) -> None:
+        self.handshakes = 0
+        self.handshake_latency = Histogram()
+        self.messages = 0
+        self.bytes = 0
+        self.relay_latency = Histogram()
+        self.errors = 0
+        self.duration = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = max(self.duration, 1e-9)
+        return {
+            'duration': self.duration,
+            'errors': self.errors,
+            'handshakes': self.handshakes,
+            'handshakes_per_second': self.handshakes / duration,
+            'handshake_latency': _latency_dict(self.handshake_latency),
+            'messages': self.messages,
+            'messages_per_second': self.messages / duration,
+            'bytes': self.bytes,
+            'bytes_per_second': self.bytes / duration,
+            'relay_latency': _latency_dict(self.relay_latency),
+        }
+
+
+def _latency_dict(histogram: Histogram) -> Dict[str, float]:
+    # Microseconds to seconds
+    return {
+        'p50': histogram.percentile(50.0) / 1e6,
+        'p99': histogram.percentile(99.0) / 1e6,
+        'max': histogram.max / 1e6,
+    }
+
+
+class _Client:
+    """
+    A minimal SaltyRTC client that supports the handshake and sending
+    unencrypted relay messages.
+    """
+    __slots__ = (
+        'ws',
+        'id',
+        'box',
+        '_cookie',
+        '_csn',
+    )
+
+    def __init__(self, ws: websockets.WebSocketClientProtocol) -> None:
+        self.ws = ws
+        self.id = None  # type: Optional[int]
+        self.box = None  # type: Optional[libnacl.public.Box]
+        self._cookie = os.urandom(16)
+        self._csn = int.from_bytes(os.urandom(4), byteorder='big')
+
+    def _nonce(self, source: int, destination: int) -> bytes:
+        nonce = struct.pack(
+            NONCE_FORMATTER, self._cookie, source, destination,
+            struct.pack('!Q', self._csn)[2:])
+        self._csn += 1
+        return nonce
+
+    async def _send(self, message: Dict[str, Any], encrypt: bool = True) -> None:
+        nonce = self._nonce(0x00, 0x00)
+        data = umsgpack.packb(message)
+        if encrypt:
+            assert self.box is not None
+            _, data = self.box.encrypt(data, nonce=nonce, pack_nonce=False)
+        await self.ws.send(b''.join((nonce, data)))
+
+    async def _receive_bytes(self) -> bytes:
+        data = await self.ws.recv()
+        if not isinstance(data, bytes):
+            raise ValueError('Expected a binary message')
+        return data
+
+    async def _receive(self) -> Tuple[Dict[str, Any], bytes, int]:
+        data = await self._receive_bytes()
+        nonce, data = data[:NONCE_LENGTH], data[NONCE_LENGTH:]
+        cookie, _, destination, _ = struct.unpack(NONCE_FORMATTER, nonce)
+        if self.box is not None:
+            data = self.box.decrypt(data, nonce=nonce)
+        return umsgpack.unpackb(data), cookie, destination
+
+    async def handshake(
+            self,
+            key: libnacl.public.SecretKey,
+            server_key: bytes,
+            responder: bool,
+    ) -> None:
+        """
+        Perform the client-to-server handshake.
+        """
+        # server-hello
+        message, server_cookie, _ = await self._receive()
+
+        # client-hello
+        if responder:
+            await self._send({'type': 'client-hello', 'key': key.pk}, encrypt=False)
+
+        # client-auth
+        self.box = libnacl.public.Box(sk=key, pk=message['key'])
+        await self._send({
+            'type': 'client-auth',
+            'your_cookie': server_cookie,
+            'subprotocols': [SubProtocol.saltyrtc_v1.value],
+            'your_key': server_key,
+        })
+
+        # server-auth
+        _, _, self.id = await self._receive()
+
+    async def wait_new_responder(self) -> None:
+        message, _, _ = await self._receive()
+        if message['type'] != 'new-responder':
+            raise ValueError('Unexpected message: {}'.format(message['type']))
+
+    async def relay(self, destination: int, padding: bytes) -> int:
+        """
+        Send a relay message that contains the current time.
+
+        Return the size of the message.
+        """
+        assert self.id is not None
+        data = b''.join((
+            self._nonce(self.id, destination),
+            struct.pack(_TIMESTAMP_FORMATTER, time.perf_counter()),
+            padding,
+        ))
+        await self.ws.send(data)
+        return len(data)
+
+    async def receive_relayed(self) -> Tuple[float, int]:
+        """
+        Receive a relay message.
+
+        Return the time it took to relay the message and the size of
+        the message.
+        """
+        data = await self._receive_bytes()
+        sent, = struct.unpack_from(_TIMESTAMP_FORMATTER, data, NONCE_LENGTH)
+        return time.perf_counter() - sent, len(data)
+
+
+async def _run_pair(
+        url: str,
+        server_key: bytes,
+        config: BenchConfig,
+        stats: BenchStats,
+        loop: asyncio.AbstractEventLoop,
+        ssl_context: Optional[ssl.SSLContext],
+) -> None:
+    initiator_key = libnacl.public.SecretKey()
+    responder_key = libnacl.public.SecretKey()
+    path = '{}/{}'.format(url, initiator_key.hex_pk().decode('ascii'))
+    ws_kwargs = {
+        'subprotocols': [SubProtocol.saltyrtc_v1.value],
+        'compression': None,
+        'ping_interval': None,
+        'ssl': ssl_context,
+        'loop': loop,
+    }  # type: Dict[str, Any]
+    clients = []  # type: List[_Client]
+    receiver = None  # type: Optional[asyncio.Task[None]]
+    try:
+        # Handshakes
+        for key, responder in ((initiator_key, False), (responder_key, True)):
+            start = time.perf_counter()
+            client = _Client(await websockets.connect(path, **ws_kwargs))
+            clients.append(client)
+            await client.handshake(key, server_key, responder)
+            stats.handshake_latency.record(int((time.perf_counter() - start) * 1e6))
+            stats.handshakes += 1
+        initiator, responder_ = clients
+        assert responder_.id is not None
+        await initiator.wait_new_responder()
+
+        # Relay messages: initiator --> responder
+        async def _receive() -> None:
+            for _ in range(config.messages):
+                latency, size = await responder_.receive_relayed()
+                stats.relay_latency.record(int(latency * 1e6))
+                stats.messages += 1
+                stats.bytes += size
+        receiver = loop.create_task(_receive())
+
+        padding = bytes(config.message_size - _TIMESTAMP_LENGTH)
+        interval = 1.0 / config.message_rate if config.message_rate > 0 else 0.0
+        next_time = loop.time()
+        for _ in range(config.messages):
+            await initiator.relay(responder_.id, padding)
+            if interval > 0:
+                next_time += interval
+                await asyncio.sleep(max(0.0, next_time - loop.time()), loop=loop)
+        await receiver
+    finally:
+        # Bye
+        if receiver is not None:
+            receiver.cancel()
+        await asyncio.gather(
+            *(client.ws.close() for client in clients), loop=loop)
+
+
+async def run_pairs(
+        url: str,
+        server_key: bytes,
+        config: BenchConfig,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+) -> BenchStats:
+    """
+    Drive the pairs of a benchmark run against a running server.
+
+    Arguments:
+        - `url`: The WebSocket URL of the server (e.g.
+          ``ws://127.0.0.1:8765``).
+        - `server_key`: The server's public permanent key.
+        - `config`: The :class:`BenchConfig` of the run.
+        - `loop`: A :class:`asyncio.BaseEventLoop` instance or `None`
+          if the default event loop should be used.
+        - `ssl_context`: An `ssl.SSLContext` instance in case `url`
+          uses WSS.
+
+    Failed pairs are counted as errors.
+    """
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    stats = BenchStats()
+
+    async def _pair(loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            await asyncio.wait_for(_run_pair(
+                url, server_key, config, stats, loop, ssl_context),
+                config.timeout, loop=loop)
+        except (OSError, asyncio.TimeoutError, ValueError,
+                websockets.WebSocketException):
+            stats.errors += 1
+
+    # Start pairs at the requested rate
+    start = time.perf_counter()
+    interval = 1.0 / config.handshake_rate if config.handshake_rate > 0 else 0.0
+    next_time = loop.time()
+    pairs = []  # type: List[asyncio.Task[None]]
+    for _ in range(config.pairs):
+        pairs.append(loop.create_task(_pair(loop)))
+        if interval > 0:
+            next_time += interval
+            await asyncio.sleep(max(0.0, next_time - loop.time()), loop=loop)
+        else:
+            # Let the pair start its handshake
+            await asyncio.sleep(0, loop=loop)
+    await asyncio.gather(*pairs, loop=loop)
+    stats.duration = time.perf_counter() - start
+    return stats
+
+
+def _resource_dict(before: Optional[Any], after: Any) -> Dict[str, Any]:
+    """
+    Return the resources used between two :func:`resource.getrusage`
+    results. If `before` is `None`, return the resources used in total.
+    """
+    # Note: The maximum resident set size is reported in kilobytes on Linux but in
+    #       bytes on macOS.
+    max_rss = after.ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024
+    cpu_user, cpu_system = after.ru_utime, after.ru_stime
+    if before is not None:
+        cpu_user -= before.ru_utime
+        cpu_system -= before.ru_stime
+    return {
+        'cpu_user': cpu_user,
+        'cpu_system': cpu_system,
+        'max_rss': max_rss,
+    }
+
+
+def _unused_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        port = sock.getsockname()[1]  # type: int
+        return port
+
+
+def _discard(stream: IO[bytes]) -> None:
+    # Note: Runs in a thread, so that the server never blocks on a full pipe.
+    while len(stream.read(65536)) > 0:
+        pass
+
+
+def run_subprocess(
+        config: BenchConfig,
+        splice: bool,
+        host: str = '127.0.0.1',
+        relay_window: int = 1,
+        workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run the server in a subprocess (via the command line interface),
+    drive the pairs and stop the server again.
+
+    Arguments:
+        - `config`: The :class:`BenchConfig` of the run.
+        - `splice`: Whether the server should run with Splice.
+        - `host`: The loopback address the server will listen on.
+        - `relay_window`: See :func:`server.serve`.
+        - `workers`: The amount of worker processes of the server.
+
+    CPU time and the maximum resident set size are those of the
+    server process only (excluding workers).
+
+    Return the results as a dictionary.
+
+    Raises :exc:`RuntimeError` in case the server could not be
+    started.
+    """
+    key = libnacl.public.SecretKey()
+    port = _unused_port(host)
+    env = dict(os.environ)
+    env.update({
+        'SALTYRTC_SAFETY_OFF': 'yes-and-i-know-what-im-doing',
+        'SALTYRTC_SPLICE': 'yes' if splice else 'no',
+        'PYTHONUNBUFFERED': '1',
+    })
+    with tempfile.NamedTemporaryFile('wb', suffix='.key') as key_file:
+        key_file.write(key.hex_sk())
+        key_file.flush()
+        process = subprocess.Popen([
+            sys.executable, '-m', 'saltyrtc.server.bin', 'serve',
+            '-h', host, '-p', str(port), '-k', key_file.name,
+            '-rw', str(relay_window), '-w', str(workers),
+        ], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        stdout = process.stdout
+        assert stdout is not None
+        drain = threading.Thread(target=_discard, args=(stdout,), daemon=True)
+        try:
+            # Wait until the server has been started
+            deadline = time.monotonic() + _SERVER_START_TIMEOUT
+            output = []  # type: List[bytes]
+            while True:
+                line = stdout.readline()
+                output.append(line)
+                if line.strip() == b'Started':
+                    break
+                if len(line) == 0 or time.monotonic() > deadline:
+                    raise RuntimeError('Server could not be started:\n{}'.format(
+                        b''.join(output).decode('utf-8', 'replace')))
+
+            # Discard any further output (e.g. warnings)
+            drain.start()
+
+            # Run the pairs
+            loop = asyncio.new_event_loop()
+            try:
+                stats = loop.run_until_complete(run_pairs(
+                    'ws://{}:{}'.format(host, port), key.pk, config, loop=loop))
+            finally:
+                loop.close()
+        finally:
+            # Stop the server and collect its resource usage
+            process.send_signal(signal.SIGINT)
+            # Note: `Popen.wait` does not provide the resource usage, so we reap the
+            #       process ourselves.
+            _, status, usage = os.wait4(process.pid, 0)
+            # Note: Same as `os.waitstatus_to_exitcode` (Python 3.9+)
+            if os.WIFSIGNALED(status):
+                process.returncode = -os.WTERMSIG(status)
+            else:
+                process.returncode = os.WEXITSTATUS(status)
+            if drain.is_alive():
+                drain.join()
+            stdout.close()
+
+    results = {'server': 'subprocess', 'splice': splice}
+    results.update(stats.to_dict())
+    results.update(_resource_dict(None, usage))
+    return results
+
+
+def run_in_process(
+        config: BenchConfig,
+        host: str = '127.0.0.1',
+        relay_window: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run the server in the benchmark's own process and event loop and
+    drive the pairs.
+
+    The server runs with or without Splice depending on the current
+    :data:`__splice__` value. CPU time and the maximum resident set
+    size include the clients.
+
+    Return the results as a dictionary.
+    """
+    key = libnacl.public.SecretKey()
+    port = _unused_port(host)
+    loop = asyncio.new_event_loop()
+    try:
+        keys = [ServerSecretPermanentKey(key)]
+        server_ = loop.run_until_complete(server.serve(
+            None, keys, host=host, port=port, loop=loop,
+            relay_window=relay_window))  # type: server.Server
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        try:
+            stats = loop.run_until_complete(run_pairs(
+                'ws://{}:{}'.format(host, port), key.pk, config, loop=loop))
+        finally:
+            after = resource.getrusage(resource.RUSAGE_SELF)
+            server_.close()
+            loop.run_until_complete(server_.wait_closed())
+    finally:
+        loop.close()
+
+    results = {'server': 'in-process', 'splice': __splice__}
+    results.update(stats.to_dict())
+    results.update(_resource_dict(before, after))
+    return results
+
+
+@click.command(help="""
+Benchmark the SaltyRTC signalling server over loopback and write the
+results as JSON. By default, the server is run in a subprocess, once with
+and once without Splice.""")
+@click.option('-n', '--pairs', type=click.IntRange(1, None), default=100,
+              help='Amount of initiator/responder pairs.')
+@click.option('-hr', '--handshake-rate', type=click.FloatRange(0, None), default=0.0,
+              help='Pairs starting per second. Defaults to all at once.')
+@click.option('-m', '--messages', type=click.IntRange(0, None), default=100,
+              help='Relayed messages per pair.')
+@click.option('-ms', '--message-size', type=click.IntRange(_TIMESTAMP_LENGTH, None),
+              default=1024, help='Size of a relayed message in bytes.')
+@click.option('-mr', '--message-rate', type=click.FloatRange(0, None), default=0.0,
+              help='Messages per second per pair. Defaults to as fast as possible.')
+@click.option('-t', '--timeout', type=click.FloatRange(0, None), default=60.0,
+              help='Maximum time in seconds per pair.')
+@click.option('-rw', '--relay-window', type=click.IntRange(1, None), default=1,
+              help='Relay window of the server.')
+@click.option('-w', '--workers', type=click.IntRange(1, None), default=1,
+              help='Worker processes of the server (subprocess only, requires -s no).')
+@click.option('-s', '--splice', type=click.Choice(['both', 'yes', 'no']),
+              default='both', help='Run the server with or without Splice.')
+@click.option('-i', '--in-process', is_flag=True, help=(
+    'Run the server in the same process (with the current Splice setting).'))
+@click.option('-o', '--output', type=click.File('w'), default='-',
+              help='File the JSON results will be written to.')
+def main(**arguments: Any) -> None:
+    config = BenchConfig(
+        pairs=arguments['pairs'],
+        handshake_rate=arguments['handshake_rate'],
+        messages=arguments['messages'],
+        message_size=arguments['message_size'],
+        message_rate=arguments['message_rate'],
+        timeout=arguments['timeout'],
+    )
+    relay_window = arguments['relay_window']  # type: int
+
+    # Run
+    if arguments['in_process']:
+        runs = [run_in_process(config, relay_window=relay_window)]
+    else:
+        splice = {'both': (True, False), 'yes': (True,), 'no': (False,)}
+        runs = [run_subprocess(config, splice_, relay_window=relay_window,
+                               workers=arguments['workers'])
+                for splice_ in splice[arguments['splice']]]
+
+    # Report
+    json.dump({
+        'config': config.to_dict(),
+        'relay_window': relay_window,
+        'runs': runs,
+    }, arguments['output'], indent=2)
+    arguments['output'].write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,17 +11,23 @@ import asyncio
 import click
 import enum
 import libnacl.public
+import multiprocessing
 import os
 import signal
+import socket
 import stat
 
 from saltyrtc.server import (
+    __splice__,
     __version__ as _version,
     server,
     util,
+    workers,
 )
 from saltyrtc.server.typing2 import ServerSecretPermanentKey  # noqa
 from saltyrtc.server.typing2 import LogbookLevel
+from saltyrtc.splice import profiler
+from saltyrtc.splice.executor import SynthesisExecutor
 
 __all__ = (
     'cli',
@@ -63,6 +69,9 @@ class _ErrorCode(enum.IntEnum):
     safety_error = 2
     import_error = 3
     repeated_keys = 4
+    workers_tls = 5
+    deletion_unavailable = 6
+    workers_splice = 7
 
 
 _logging_levels = 7
@@ -151,7 +160,9 @@ def generate(key_file: str) -> None:
 @cli.command(short_help='Start the signalling server.', help="""
 Start the SaltyRTC signalling server. A HUP signal will restart the
 server and reload the TLS certificate, the TLS private key and the
-private permanent key of the server.""")
+private permanent key of the server. If the environment variable
+'SALTYRTC_SPLICE_PROFILE' is set to 'yes', a USR2 signal will print the
+Splice profile.""")
 @click.option('-tc', '--tlscert', type=click.Path(exists=True), help=_h("""
 Path to a PEM file that contains the TLS certificate."""))
 @click.option('-sc', '--sslcert', type=click.Path(exists=True), help=_h("""
@@ -172,6 +183,28 @@ provided will be used as the primary key."""))
 @click.option('-p', '--port', default=443, help='Listen on a specific port.')
 @click.option('-l', '--loop', type=click.Choice(['asyncio', 'uvloop']), default='asyncio',
               help="Use a specific asyncio-compatible event loop. Defaults to 'asyncio'.")
+@click.option('-rw', '--relay-window', type=click.IntRange(1, None), default=1,
+              help=_h("""
+Maximum amount of relay messages per client that may be in flight at the
+same time. Defaults to 1 (no pipelining)."""))
+@click.option('-w', '--workers', type=click.IntRange(1, None), default=1, help=_h("""
+Amount of worker processes. With more than one worker, connections are
+handed over to the worker that owns the connection's path. Requires TLS
+to be terminated in front of the server, Splice to be disabled and does
+not support restarting on HUP. Defaults to 1."""))
+@click.option('-mp', '--metrics-path', help=_h("""
+Serve metrics in the Prometheus text format on a specific HTTP path (e.g.
+/metrics). With more than one worker, only the metrics of the first
+worker will be served."""))
+@click.option('-sw', '--synthesis-workers', type=click.IntRange(1, None), help=_h("""
+Amount of processes that synthesize objects for Splice deletion requests.
+The processes are started along with the server. Defaults to the amount
+of CPUs."""))
+@click.option('-dp', '--deletion-path', help=_h("""
+Accept Splice deletion requests on a specific HTTP path (e.g. /deletions)
+and serve the status of deletion jobs below it. Deletion requests are not
+authenticated, so make sure the path is only reachable from trusted
+networks. Cannot be used with more than one worker."""))
 @click.pass_context
 def serve(ctx: click.Context, **arguments: Any) -> None:
     # Get arguments
@@ -184,6 +217,11 @@ def serve(ctx: click.Context, **arguments: Any) -> None:
     host = arguments.get('host')  # type: Optional[str]
     port = arguments['port']  # type: int
     loop_str = arguments['loop']  # type: str
+    relay_window = arguments['relay_window']  # type: int
+    workers_count = arguments['workers']  # type: int
+    metrics_path = arguments.get('metrics_path')  # type: Optional[str]
+    synthesis_workers = arguments.get('synthesis_workers')  # type: Optional[int]
+    deletion_path = arguments.get('deletion_path')  # type: Optional[str]
     safety_off = os.environ.get('SALTYRTC_SAFETY_OFF') == 'yes-and-i-know-what-im-doing'
 
     # Deprecation warning
@@ -203,6 +241,24 @@ def serve(ctx: click.Context, **arguments: Any) -> None:
                         "'yes-and-i-know-what-im-doing'"), err=True)
             ctx.exit(code=_ErrorCode.safety_error)
 
+    # Make sure TLS is terminated in front of the server when using workers
+    if workers_count > 1 and tls_cert is not None:
+        click.echo(('TLS is not supported with more than one worker, it needs to be '
+                    'terminated in front of the server'), err=True)
+        ctx.exit(code=_ErrorCode.workers_tls)
+
+    # Make sure tainted objects are held by a single process
+    # Note: Deletion requests would only reach one of the workers.
+    if workers_count > 1 and __splice__:
+        click.echo(('Splice is not supported with more than one worker, disable it '
+                    "with the environment variable 'SALTYRTC_SPLICE=no'"), err=True)
+        ctx.exit(code=_ErrorCode.workers_splice)
+
+    # Deletion requests require Splice
+    if deletion_path is not None and not __splice__:
+        click.echo('Deletion requests require Splice to be enabled', err=True)
+        ctx.exit(code=_ErrorCode.deletion_unavailable)
+
     # Create SSL context
     ssl_context = None
     if tls_cert is not None:
@@ -236,19 +292,35 @@ def serve(ctx: click.Context, **arguments: Any) -> None:
     # Get event loop
     loop = asyncio.get_event_loop()  # type: asyncio.AbstractEventLoop
 
+    # Run the acceptor and the workers
+    if workers_count > 1:
+        click.echo('Starting')
+        _echo_keys(keys)
+        _serve_workers(
+            keys, host, port, relay_window, metrics_path, workers_count, loop)
+        loop.close()
+        return
+
+    # Start the synthesis processes before listening (they are forked and would
+    # inherit the listening socket otherwise)
+    synthesis_executor = None  # type: Optional[SynthesisExecutor]
+    if __splice__:
+        synthesis_executor = SynthesisExecutor(synthesis_workers)
+        synthesis_executor.start()
+
+    # Print the Splice profile on USR2
+    if profiler.enabled:
+        profiler.install_signal_handler(loop)
+
     while True:
         # Run the server
         click.echo('Starting')
-        if len(keys) > 0:
-            primary_key, *secondary_keys = keys
-            click.echo('Primary public permanent key: {}'.format(
-                primary_key.hex_pk().decode('ascii')))
-            for i, key in enumerate(secondary_keys, start=1):
-                click.echo('Secondary key #{}: {}'.format(
-                    i, key.hex_pk().decode('ascii')))
+        _echo_keys(keys)
         coroutine = server.serve(
             ssl_context, keys,
-            host=host, port=port, loop=loop
+            host=host, port=port, loop=loop, relay_window=relay_window,
+            metrics_path=metrics_path, synthesis_executor=synthesis_executor,
+            deletion_path=deletion_path,
         )  # type: Coroutine[Any, Any, server.Server]
         server_ = loop.run_until_complete(coroutine)
 
@@ -285,10 +357,114 @@ def serve(ctx: click.Context, **arguments: Any) -> None:
             restart_signal.cancel()
             break
 
+    # Stop the synthesis processes
+    if synthesis_executor is not None:
+        synthesis_executor.shutdown()
+
+    # Remove the profile signal handler
+    if profiler.enabled:
+        profiler.remove_signal_handler(loop)
+
     # Close loop
     loop.close()
 
 
+def _echo_keys(keys: List[ServerSecretPermanentKey]) -> None:
+    if len(keys) > 0:
+        primary_key, *secondary_keys = keys
+        click.echo('Primary public permanent key: {}'.format(
+            primary_key.hex_pk().decode('ascii')))
+        for i, key in enumerate(secondary_keys, start=1):
+            click.echo('Secondary key #{}: {}'.format(
+                i, key.hex_pk().decode('ascii')))
+
+
+def _serve_workers(
+        keys: List[ServerSecretPermanentKey],
+        host: Optional[str],
+        port: int,
+        relay_window: int,
+        metrics_path: Optional[str],
+        workers_count: int,
+        loop: asyncio.AbstractEventLoop,
+) -> None:
+    # Listen
+    family, type_, proto, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE)[0]
+    sock = socket.socket(family, type_, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(address)
+    sock.listen(socket.SOMAXCONN)
+
+    # Start workers
+    context = multiprocessing.get_context('fork')
+    channels = []  # type: List[socket.socket]
+    processes = []  # type: List[multiprocessing.process.BaseProcess]
+    for index in range(workers_count):
+        channel, worker_channel = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        process = context.Process(
+            target=_run_worker, name='saltyrtc-worker-{}'.format(index), daemon=True,
+            args=(index, worker_channel, [sock, *channels, channel], keys, relay_window,
+                  metrics_path))
+        process.start()
+        worker_channel.close()
+        channels.append(channel)
+        processes.append(process)
+
+    # Hand over connections until Ctrl+C has been pressed
+    acceptor = workers.Acceptor(sock, channels, loop)
+    acceptor.start()
+    click.echo('Started')
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        click.echo()
+
+    # Stop workers by closing their channels
+    click.echo('Stopping')
+    acceptor.close()
+    for channel in channels:
+        channel.close()
+    for process in processes:
+        process.join()
+    click.echo('Stopped')
+
+
+def _run_worker(
+        index: int,
+        channel: socket.socket,
+        inherited: List[socket.socket],
+        keys: List[ServerSecretPermanentKey],
+        relay_window: int,
+        metrics_path: Optional[str],
+) -> None:
+    # Close sockets inherited from the acceptor, so that the worker notices when the
+    # acceptor closes its channel.
+    for sock in inherited:
+        sock.close()
+
+    # The acceptor will stop us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Run the server until the channel has been closed
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    coroutine = server.serve(
+        None, keys, loop=loop, relay_window=relay_window, channel=channel,
+        metrics_path=metrics_path,
+    )  # type: Coroutine[Any, Any, server.Server]
+    server_ = loop.run_until_complete(coroutine)
+    click.echo('Worker #{} started'.format(index))
+    listener = server_.server.server  # type: workers.ChannelListener
+    loop.run_until_complete(listener.wait_closed())
+
+    # Close the server
+    server_.close()
+    loop.run_until_complete(server_.wait_closed())
+    loop.close()
+    click.echo('Worker #{} stopped'.format(index))
+
+
 def main() -> None:
     obj = {'logging_handler': None}
     try:
@@ -37,6 +37,11 @@ __all__ = (
     'HASH_LENGTH',
     'SIGNED_KEYS_CIPHERTEXT_LENGTH',
     'RELAY_TIMEOUT',
+    'RELAY_WINDOW_DEFAULT',
+    'JOB_QUEUE_HIGH_WATERMARK_BYTES',
+    'JOB_QUEUE_LOW_WATERMARK_BYTES',
+    'JOB_QUEUE_HIGH_WATERMARK_JOBS',
+    'JOB_QUEUE_LOW_WATERMARK_JOBS',
     'KEEP_ALIVE_INTERVAL_MIN',
     'KEEP_ALIVE_INTERVAL_DEFAULT',
     'KEEP_ALIVE_TIMEOUT',
@@ -73,6 +78,11 @@ COOKIE_LENGTH = 16
 HASH_LENGTH = 32
 SIGNED_KEYS_CIPHERTEXT_LENGTH = 80
 RELAY_TIMEOUT = 30.0
+RELAY_WINDOW_DEFAULT = 1
+JOB_QUEUE_HIGH_WATERMARK_BYTES = 2 ** 22
+JOB_QUEUE_LOW_WATERMARK_BYTES = 2 ** 20
+JOB_QUEUE_HIGH_WATERMARK_JOBS = 1024
+JOB_QUEUE_LOW_WATERMARK_JOBS = 256
 KEEP_ALIVE_INTERVAL_MIN = 1.0
 KEEP_ALIVE_INTERVAL_DEFAULT = PingInterval(3600)
 KEEP_ALIVE_TIMEOUT = 30.0
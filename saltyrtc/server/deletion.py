@@ -0,0 +1,175 @@
+"""
+Splice deletion jobs and their status documents.
+
+A deletion job removes all data of one or more users (identified by
+their taints) from the server's heap. Jobs are created via the deletion
+endpoint of a :class:`Server` (see :meth:`Server.process_request`) and
+run in the background. The status document of a job can be requested
+while it is running and after it has finished.
+"""
+from typing import List  # noqa
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+)
+
+import enum
+import time
+
+__all__ = (
+    'DELETION_CONTENT_TYPE',
+    'DeletionPhase',
+    'DeletionStatus',
+    'DeletionJob',
+    'parse_taints',
+)
+
+# Constants
+DELETION_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+@enum.unique
+class DeletionStatus(enum.Enum):
+    """
+    The status of a :class:`DeletionJob`.
+    """
+    pending = 'pending'
+    running = 'running'
+    finished = 'finished'
+    failed = 'failed'
+
+
+@enum.unique
+class DeletionPhase(enum.Enum):
+    """
+    The phases of a deletion in the order they are executed.
+    """
+    # Look up all objects carrying the taint
+    scan = 'scan'
+    # Splice system objects and concretise the constraints of all other objects
+    concretize = 'concretize'
+    # Synthesize replacements
+    synthesize = 'synthesize'
+    # Swap all references to the tainted objects
+    replace = 'replace'
+
+
+class DeletionJob:
+    """
+    A deletion job along with its progress and results.
+
+    Arguments:
+        - `id_`: The unique id of the job.
+        - `taints`: The taints of the users to be deleted.
+
+    All taints of a job are deleted together. Timings are wall clock
+    seconds per :class:`DeletionPhase`. Note that a phase may yield to
+    the event loop, so its timing includes time spent on other tasks.
+
+    Pre-solver hits and misses count the constraint sets that have been
+    solved without and with Z3 respectively.
+    """
+    __slots__ = (
+        'id',
+        'taints',
+        'status',
+        'created',
+        'started',
+        'finished',
+        'system_objects_spliced',
+        'objects_synthesized',
+        'objects_flagged',
+        'presolve_hits',
+        'presolve_misses',
+        'timings',
+        'failures',
+    )
+
+    def __init__(self, id_: int, taints: Sequence[int]) -> None:
+        self.id = id_
+        self.taints = list(taints)
+        self.status = DeletionStatus.pending
+        self.created = time.time()
+        self.started = None  # type: Optional[float]
+        self.finished = None  # type: Optional[float]
+        self.system_objects_spliced = 0
+        self.objects_synthesized = 0
+        self.objects_flagged = 0
+        self.presolve_hits = 0
+        self.presolve_misses = 0
+        self.timings = {
+            phase: 0.0 for phase in DeletionPhase}  # type: Dict[DeletionPhase, float]
+        self.failures = []  # type: List[str]
+
+    def __str__(self) -> str:
+        return 'DeletionJob(id={}, taints={}, status={})'.format(
+            self.id, self.taints, self.status.value)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DeletionStatus.finished, DeletionStatus.failed)
+
+    def start(self) -> None:
+        self.status = DeletionStatus.running
+        self.started = time.time()
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """
+        Mark the job as finished or, in case `error` has been
+        provided, as failed.
+        """
+        if error is not None:
+            self.failures.append(error)
+            self.status = DeletionStatus.failed
+        else:
+            self.status = DeletionStatus.finished
+        self.finished = time.time()
+
+    def add_timing(self, phase: DeletionPhase, seconds: float) -> None:
+        self.timings[phase] += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the status document of the job.
+        """
+        return {
+            'id': self.id,
+            'taints': self.taints,
+            'status': self.status.value,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'counts': {
+                'system_objects_spliced': self.system_objects_spliced,
+                'objects_synthesized': self.objects_synthesized,
+                'objects_flagged': self.objects_flagged,
+                'presolve_hits': self.presolve_hits,
+                'presolve_misses': self.presolve_misses,
+            },
+            'timings': {phase.value: seconds for phase, seconds in self.timings.items()},
+            'failures': self.failures,
+        }
+
+
+def parse_taints(values: Iterable[str]) -> List[int]:
+    """
+    Parse taints from header values. Each value may contain multiple
+    comma-separated taints (e.g. ``512, 1024``).
+
+    Raises :exc:`ValueError` in case a taint is not a positive integer
+    or no taint has been provided.
+    """
+    taints = []  # type: List[int]
+    for value in values:
+        for taint_str in value.split(','):
+            taint = int(taint_str.strip())
+            if taint <= 0:
+                raise ValueError('Invalid taint: {}'.format(taint))
+            if taint not in taints:
+                taints.append(taint)
+    if len(taints) == 0:
+        raise ValueError('No taints provided')
+    return taints
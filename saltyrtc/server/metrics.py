@@ -0,0 +1,239 @@
+"""
+In-process metrics of the SaltyRTC Signalling Server and their
+exposition in the Prometheus text format.
+"""
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    List,
+    Tuple,
+)
+
+from saltyrtc.splice import profiler
+
+from .common import ClientState
+
+if TYPE_CHECKING:
+    # noinspection PyUnresolvedReferences
+    from .server import Server  # noqa
+
+__all__ = (
+    'METRICS_CONTENT_TYPE',
+    'Histogram',
+    'Metrics',
+    'render_metrics',
+)
+
+# Constants
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+_HISTOGRAM_SUB_BUCKET_BITS = 7
+_HISTOGRAM_HIGHEST = 2 ** 36  # ~19 hours in microseconds
+
+
+class Histogram:
+    """
+    A log-linear histogram in the style of HdrHistogram for
+    non-negative integer values (e.g. microseconds).
+
+    Values below ``2 ** sub_bucket_bits`` are counted exactly. Above
+    that, each power of two is split into ``2 ** (sub_bucket_bits - 1)``
+    linear sub-buckets, so the relative error of a recorded value is
+    bounded by ``2 ** -(sub_bucket_bits - 1)``. Values above `highest`
+    are counted in the last bucket.
+
+    Recording a value only updates preallocated counters.
+    """
+    __slots__ = (
+        '_sub_bucket_bits',
+        '_counts',
+        'count',
+        'sum',
+        'max',
+    )
+
+    def __init__(
+            self,
+            highest: int = _HISTOGRAM_HIGHEST,
+            sub_bucket_bits: int = _HISTOGRAM_SUB_BUCKET_BITS,
+    ) -> None:
+        if sub_bucket_bits < 1:
+            raise ValueError('Invalid amount of sub-bucket bits: {}'.format(
+                sub_bucket_bits))
+        self._sub_bucket_bits = sub_bucket_bits
+        self._counts = [0] * (self._index(highest) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """
+        Record a value. Negative values are recorded as `0`.
+        """
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        counts = self._counts
+        if index >= len(counts):
+            index = len(counts) - 1
+        counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Return the (lower bound of the) value at a percentile
+        (``0.0`` to ``100.0``).
+        """
+        if self.count == 0:
+            return 0
+        threshold = max(1, round(self.count * percentile / 100.0))
+        total = 0
+        for index, count in enumerate(self._counts):
+            total += count
+            if total >= threshold:
+                return self._lower_bound(index)
+        return self.max
+
+    def cumulative(self) -> Iterable[Tuple[int, int]]:
+        """
+        Yield the cumulative count of values below each power of two
+        (``(upper bound, count)`` tuples) until all values have been
+        covered.
+        """
+        total, upper_bound = 0, 1
+        for index, count in enumerate(self._counts):
+            if self._lower_bound(index) >= upper_bound:
+                yield upper_bound, total
+                if total == self.count:
+                    return
+                upper_bound <<= 1
+            total += count
+        yield upper_bound, total
+
+    def _index(self, value: int) -> int:
+        magnitude = value.bit_length() - self._sub_bucket_bits
+        if magnitude <= 0:
+            return value
+        return (magnitude << (self._sub_bucket_bits - 1)) + (value >> magnitude)
+
+    def _lower_bound(self, index: int) -> int:
+        half = 1 << (self._sub_bucket_bits - 1)
+        if index < 2 * half:
+            return index
+        magnitude = index // half - 1
+        return (index - magnitude * half) << magnitude
+
+
+class Metrics:
+    """
+    Counters and histograms of a :class:`Server` instance.
+
+    All fields are plain attributes that will be updated in place.
+    Gauges (e.g. the amount of connected clients) are not stored but
+    determined while rendering, see :func:`render_metrics`.
+    """
+    __slots__ = (
+        'connections',
+        'relayed_frames',
+        'relayed_bytes',
+        'send_errors',
+        'ping_timeouts',
+        'relay_latency',
+        'keep_alive_rtt',
+    )
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.relayed_frames = 0
+        self.relayed_bytes = 0
+        self.send_errors = 0
+        self.ping_timeouts = 0
+        self.relay_latency = Histogram()  # Microseconds
+        self.keep_alive_rtt = Histogram()  # Microseconds
+
+
+def _render_histogram(lines: List[str], name: str, histogram: Histogram) -> None:
+    lines.append('# TYPE {} histogram'.format(name))
+    for upper_bound, count in histogram.cumulative():
+        lines.append('{}_bucket{{le="{}"}} {}'.format(name, upper_bound / 1e6, count))
+    lines.append('{}_bucket{{le="+Inf"}} {}'.format(name, histogram.count))
+    lines.append('{}_sum {}'.format(name, histogram.sum / 1e6))
+    lines.append('{}_count {}'.format(name, histogram.count))
+
+
+def _render_splice_profile(lines: List[str]) -> None:
+    methods = profiler.called_methods()
+    # Net allocated blocks may decrease, so they are exposed as a gauge
+    for suffix, index, type_ in (
+            ('calls_total', 2, 'counter'),
+            ('seconds_total', 3, 'counter'),
+            ('allocated_blocks', 4, 'gauge'),
+    ):
+        name = 'saltyrtc_splice_method_{}'.format(suffix)
+        lines.append('# TYPE {} {}'.format(name, type_))
+        for method in methods:
+            lines.append('{}{{class="{}",method="{}"}} {}'.format(
+                name, method[0], method[1], method[index]))
+    lines.append('# TYPE saltyrtc_splice_conversions_total counter')
+    for type_name, count in profiler.conversion_stats.items():
+        lines.append('saltyrtc_splice_conversions_total{{type="{}"}} {}'.format(
+            type_name, count))
+    lines.append('# TYPE saltyrtc_splice_constructions_total counter')
+    for cls_name, count in profiler.construction_stats.items():
+        lines.append('saltyrtc_splice_constructions_total{{class="{}"}} {}'.format(
+            cls_name, count))
+
+
+def render_metrics(server: 'Server') -> bytes:
+    """
+    Render the metrics of a server in the Prometheus text format.
+    """
+    metrics = server.metrics
+
+    # Determine gauges
+    clients = {state: 0 for state in ClientState}
+    job_queue_jobs, job_queue_bytes, job_queue_jobs_max = 0, 0, 0
+    for protocol in server.protocols:
+        client = protocol.client
+        if client is None:
+            continue
+        clients[client.state] += 1
+        jobs = client.jobs
+        job_queue_jobs += jobs.depth
+        job_queue_bytes += jobs.size
+        job_queue_jobs_max = max(job_queue_jobs_max, jobs.depth)
+
+    # Render
+    lines = [
+        '# TYPE saltyrtc_connections_total counter',
+        'saltyrtc_connections_total {}'.format(metrics.connections),
+        '# TYPE saltyrtc_clients gauge',
+    ]
+    for state, count in clients.items():
+        lines.append('saltyrtc_clients{{state="{}"}} {}'.format(state.name, count))
+    lines += [
+        '# TYPE saltyrtc_paths gauge',
+        'saltyrtc_paths {}'.format(len(server.paths.paths)),
+        '# TYPE saltyrtc_relayed_frames_total counter',
+        'saltyrtc_relayed_frames_total {}'.format(metrics.relayed_frames),
+        '# TYPE saltyrtc_relayed_bytes_total counter',
+        'saltyrtc_relayed_bytes_total {}'.format(metrics.relayed_bytes),
+        '# TYPE saltyrtc_send_errors_total counter',
+        'saltyrtc_send_errors_total {}'.format(metrics.send_errors),
+        '# TYPE saltyrtc_ping_timeouts_total counter',
+        'saltyrtc_ping_timeouts_total {}'.format(metrics.ping_timeouts),
+        '# TYPE saltyrtc_job_queue_jobs gauge',
+        'saltyrtc_job_queue_jobs {}'.format(job_queue_jobs),
+        '# TYPE saltyrtc_job_queue_jobs_max gauge',
+        'saltyrtc_job_queue_jobs_max {}'.format(job_queue_jobs_max),
+        '# TYPE saltyrtc_job_queue_bytes gauge',
+        'saltyrtc_job_queue_bytes {}'.format(job_queue_bytes),
+    ]
+    _render_histogram(lines, 'saltyrtc_relay_latency_seconds', metrics.relay_latency)
+    _render_histogram(lines, 'saltyrtc_keep_alive_rtt_seconds', metrics.keep_alive_rtt)
+    if profiler.enabled:
+        _render_splice_profile(lines)
+    lines.append('')
+    return '\n'.join(lines).encode('utf-8')
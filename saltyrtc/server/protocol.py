@@ -4,6 +4,7 @@ from typing import Set  # noqa
 from typing import (
     Any,
     Iterable,
+    List,
     Optional,
     Type,
     TypeVar,
@@ -17,10 +18,15 @@ import libnacl.public
 import os
 import struct
 import websockets
+from websockets.framing import (
+    OP_BINARY,
+    Frame,
+)
 
 from . import util
 from .common import (
     COOKIE_LENGTH,
+    DATA_LENGTH_MIN,
     INITIATOR_ADDRESS,
     KEEP_ALIVE_INTERVAL_DEFAULT,
     KEEP_ALIVE_INTERVAL_MIN,
@@ -48,6 +54,7 @@ from .message import (
 )
 from .task import (
     JobQueue,
+    JobQueueLimits,
     Tasks,
 )
 # noinspection PyUnresolvedReferences
@@ -85,6 +92,13 @@ __all__ = (
 # Do not export!
 SNT = TypeVar('SNT', bound=SequenceNumber)
 
+# Lookup tables of the destination addresses a client may relay messages to, indexed
+# by the destination byte of the nonce.
+_RELAY_DESTINATIONS = {
+    AddressType.initiator: bytes(address >= 0x02 for address in range(0x100)),
+    AddressType.responder: bytes(address == 0x01 for address in range(0x100)),
+}  # type: Dict[AddressType, bytes]
+
 
 class Path:
     __slots__ = (
@@ -106,7 +120,7 @@ class Path:
         self._pending = set()  # type: Set[PathClient]
         self._initiator = None  # type: Optional[PathClient]
         self._responders = {}  # type: Dict[ResponderAddress, PathClient]
-        self.log = util.get_logger('path.{}'.format(number))
+        self.log = util.get_logger_adapter('path', '{}', number)
         self.initiator_key = initiator_key
         self.number = number
         self.attached = attached
@@ -232,6 +246,35 @@ class Path:
             raise ValueError('Path has been detached!')
         return self._responders[id_]
 
+    def get_initiator_or_none(self) -> Optional['PathClient']:
+        """
+        Return the initiator's :class:`PathClient` instance or `None`
+        if there is no initiator.
+
+        Raises :exc:`ValueError` in case of a state violation on the
+        :class:`PathClient`.
+        """
+        if not self.attached:
+            raise ValueError('Path has been detached!')
+        return self._initiator
+
+    def get_responder_or_none(self, id_: int) -> Optional['PathClient']:
+        """
+        Return a responder's :class:`PathClient` instance or `None` if
+        `id_` cannot be associated to a :class:`PathClient` instance.
+
+        Arguments:
+            - `id_`: The identifier of the responder. A plain
+              :class:`int` is sufficient as it is only used for the
+              lookup.
+
+        Raises :exc:`ValueError` in case of a state violation on the
+        :class:`PathClient`.
+        """
+        if not self.attached:
+            raise ValueError('Path has been detached!')
+        return self._responders.get(cast(ResponderAddress, id_))
+
     def get_responder_ids(self) -> Iterable[ResponderAddress]:
         """
         Return an iterable of responder identifiers (slots).
@@ -374,6 +417,8 @@ class PathClient:
         '_sign_box',
         '_id',
         '_keep_alive_interval',
+        '_relay_source',
+        '_relay_destinations',
         'log',
         'type',
         'keep_alive_timeout',
@@ -407,6 +452,7 @@ class PathClient:
             path_number: int,
             initiator_key: InitiatorPublicPermanentKey,
             loop: Optional[asyncio.AbstractEventLoop] = None,
+            job_queue_limits: Optional[JobQueueLimits] = None,
     ) -> None:
         self._loop = asyncio.get_event_loop() if loop is None else loop
         self._state = ClientState.restricted
@@ -427,15 +473,20 @@ class PathClient:
         self._sign_box = None  # type: Optional[SignBox]
         self._id = SERVER_ADDRESS  # type: Address
         self._keep_alive_interval = KEEP_ALIVE_INTERVAL_DEFAULT
-        self.log = util.get_logger('path.{}.client.{:x}'.format(path_number, id(self)))
+        self._relay_source = None  # type: Optional[int]
+        self._relay_destinations = None  # type: Optional[bytes]
+        self.log = util.get_logger_adapter(
+            'path', '{}.client.{:x}', path_number, id(self))
         self.type = None  # type: Optional[AddressType]
         self.keep_alive_timeout = KEEP_ALIVE_TIMEOUT
         self.keep_alive_pings = 0
         # !!! SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
-        # self.jobs = JobQueue(self.log, self._loop)  # type: JobQueue
-        self.jobs = SpliceJobQueue(self.log, self._loop,
+        # self.jobs = JobQueue(
+        #     self.log, self._loop, job_queue_limits, self.send_packets)  # type: JobQueue
+        self.jobs = SpliceJobQueue(self.log, self._loop, job_queue_limits,
+                                   self.send_packets,
                                    taints=identity.taint_id_from_websocket(self._connection)) if __splice__ \
-            else JobQueue(self.log, self._loop)
+            else JobQueue(self.log, self._loop, job_queue_limits, self.send_packets)
         # self.tasks = Tasks(self.log, self._loop)
         self.tasks = SpliceTasks(self.log, self._loop,
                                  taints=identity.taint_id_from_websocket(self._connection)) if __splice__ \
@@ -660,6 +711,18 @@ class PathClient:
         self._id = id_
         self.log.debug('Assigned id: {}', id_)
 
+        # Prepare the relay lookup tables
+        # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+        # The tables are only compared against raw bytes of the nonce, so the taints of
+        # the address do not need to be kept.
+        source = id_
+        if __splice__ and isinstance(source, SpliceMixin):
+            source = source.unsplicify()
+        # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+        self._relay_source = int(source)
+        if self.type is not None:
+            self._relay_destinations = _RELAY_DESTINATIONS.get(self.type)
+
     def update_log_name(self, slot_id: ClientAddress) -> None:
         """
         Update the logger's name by the assigned slot identifier.
@@ -675,7 +738,7 @@ class PathClient:
         if __splice__:
             if isinstance(slot_id, SpliceMixin):
                 slot_id = slot_id.unsplicify()
-        self.log.name += '.0x{:02x}'.format(slot_id)
+        self.log.extend_name('0x{:02x}', slot_id)
 
     def valid_cookie(self, cookie_in: Optional[ClientCookie]) -> bool:
         """
@@ -738,6 +801,30 @@ class PathClient:
         """
         return self.state == ClientState.authenticated and self.type != destination_type
 
+    def relay_destination(self, data: Packet) -> Optional[int]:
+        """
+        Return the destination address of a relay message if the
+        packet is a relay message that passes all checks of
+        :meth:`IncomingMessage._unpack_nonce` for relaying. Otherwise,
+        return `None`.
+
+        Only the source and destination bytes of the nonce are being
+        read (through a :class:`memoryview`) and validated against the
+        client's lookup tables. No message instance is created.
+
+        .. important:: If `None` is being returned, the packet MUST be
+                       unpacked by :meth:`unpack_packet` which raises
+                       the appropriate exception for invalid packets.
+        """
+        destinations = self._relay_destinations
+        if destinations is None or len(data) < DATA_LENGTH_MIN:
+            return None
+        with memoryview(data) as view:
+            source, destination = view[COOKIE_LENGTH], view[COOKIE_LENGTH + 1]
+        if source != self._relay_source or not destinations[destination]:
+            return None
+        return destination
+
     async def send(self, message: OutgoingMessageMixin) -> None:
         """
         Disconnected
@@ -750,6 +837,14 @@ class PathClient:
         self.log.trace('server >> {}', message)
 
         # Send data
+        await self.send_packet(data)
+
+    async def send_packet(self, data: Packet) -> None:
+        """
+        Send an already packed packet (e.g. a relay message).
+
+        Disconnected
+        """
         self.log.debug('Sending message')
         try:
             await self._connection.send(data)
@@ -759,9 +854,56 @@ class PathClient:
             self.jobs.close(Result(disconnected))
             raise disconnected from exc
 
+    async def send_packets(self, data: List[Packet]) -> None:
+        """
+        Send a batch of already packed packets (e.g. relay messages).
+
+        The frames of all packets are written to the transport with a
+        single call and flow control is applied once for the batch.
+
+        Disconnected
+        """
+        if len(data) == 1:
+            return await self.send_packet(data[0])
+        self.log.debug('Sending {} messages', len(data))
+        connection = self._connection
+        try:
+            await connection.ensure_open()
+            frames = []  # type: List[bytes]
+            for packet in data:
+                Frame(True, OP_BINARY, packet).write(
+                    frames.append, mask=connection.is_client,
+                    extensions=connection.extensions)
+            connection.transport.writelines(frames)
+
+            # Note: This mirrors `WebSocketCommonProtocol.write_frame` which does
+            #       not provide a way to write multiple frames at once.
+            try:
+                async with connection._drain_lock:
+                    await connection._drain()
+            except ConnectionError:
+                connection.fail_connection()
+                await connection.ensure_open()
+        except websockets.ConnectionClosed as exc:
+            self.log.debug('Connection closed while sending')
+            disconnected = Disconnected(exc.code)
+            self.jobs.close(Result(disconnected))
+            raise disconnected from exc
+
     async def receive(self) -> IncomingMessageMixin:
         """
         Disconnected
+        MessageError
+        MessageFlowError
+        """
+        return self.unpack_packet(await self.receive_packet())
+
+    async def receive_packet(self) -> Packet:
+        """
+        Receive a packet without unpacking it.
+
+        Disconnected
+        MessageError
         """
         # Safeguard
         # Note: This should never happen since the receive queue will
@@ -790,9 +932,14 @@ class PathClient:
         # Ensure binary
         if not isinstance(data, bytes):
             raise MessageError("Data must be 'bytes', not '{}'".format(type(data)))
+        return Packet(data)
 
-        # Unpack data and return
-        message = unpack(self, Packet(data))
+    def unpack_packet(self, data: Packet) -> IncomingMessageMixin:
+        """
+        MessageError
+        MessageFlowError
+        """
+        message = unpack(self, data)
         self.log.debug('Unpacked message: {}', message.type)
         self.log.trace('server << {}', message)
         return message
@@ -811,13 +958,14 @@ class PathClient:
             raise disconnected from exc
         return cast('asyncio.Future[None]', pong_future)
 
-    async def wait_pong(self, pong_future: 'asyncio.Future[None]') -> None:
+    def check_pong(self, pong_future: 'asyncio.Future[None]') -> None:
         """
+        Check the outcome of a pong future that is done.
+
         Disconnected
         """
-        self.log.debug('Waiting for pong')
         try:
-            await pong_future
+            pong_future.result()
         except websockets.ConnectionClosed as exc:
             self.log.debug('Connection closed while waiting for pong')
             disconnected = Disconnected(exc.code)
@@ -874,4 +1022,7 @@ class PathClient:
         # Mark as dropped (if authenticated)
         if self.state == ClientState.authenticated:
             self.state = ClientState.dropped
+
+        # Disable relaying for the client
+        self._relay_destinations = None
         self.log.debug('Client dropped, close code: {}', code)
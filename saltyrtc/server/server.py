@@ -5,6 +5,7 @@ from typing import List  # noqa
 from typing import Set  # noqa
 from typing import (
     Any,
+    Callable,
     Coroutine,
     Iterable,
     Mapping,
@@ -20,18 +21,25 @@ from typing import (
 import asyncio
 import binascii
 import functools
+import http
+import json
+import socket
 import ssl
 import websockets
 from collections import OrderedDict
 from websockets.typing import Subprotocol
 
-from . import util
+from . import (
+    util,
+    workers,
+)
 from .common import (
     COOKIE_LENGTH,
     INITIATOR_ADDRESS,
     KEY_LENGTH,
     NONCE_LENGTH,
     RELAY_TIMEOUT,
+    RELAY_WINDOW_DEFAULT,
     AddressType,
     ClientAddress,
     ClientState,
@@ -39,6 +47,12 @@ from .common import (
     ResponderAddress,
     SubProtocol,
 )
+from .deletion import (
+    DELETION_CONTENT_TYPE,
+    DeletionJob,
+    DeletionPhase,
+    parse_taints,
+)
 from .events import (
     Event,
     EventRegistry,
@@ -67,10 +81,20 @@ from .message import (
     ServerAuthMessage,
     ServerHelloMessage,
 )
+from .metrics import (
+    METRICS_CONTENT_TYPE,
+    Metrics,
+    render_metrics,
+)
 from .protocol import (
     Path,
     PathClient,
 )
+from .task import (
+    FrameJob,
+    JobQueueLimits,
+    TimeoutWheel,
+)
 from .typing2 import (
     ChosenSubProtocol,
     DisconnectedData,
@@ -80,6 +104,7 @@ from .typing2 import (
     ListOrTuple,
     MessageId,
     NoReturn,
+    Packet,
     PathHex,
     ResponderPublicSessionKey,
     Result,
@@ -93,11 +118,12 @@ from saltyrtc.server import __splice__
 from saltyrtc.splice import identity
 from saltyrtc.splice.splice import SpliceMixin, SpliceAttrMixin
 from saltyrtc.splice import replace
+from saltyrtc.splice import registry
 from saltyrtc.splice.constraints import merge_constraints
-from saltyrtc.splice.synthesis import init_synthesizer_on_type
+from saltyrtc.splice.synthesis import get_synthesizer
+from saltyrtc.splice.executor import SynthesisExecutor
 from saltyrtc.splice.hashtable import SpliceDict
 import time
-import gc
 # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=
 
 __all__ = (
@@ -109,11 +135,17 @@ __all__ = (
 
 # Constants
 _JOB_QUEUE_JOIN_TIMEOUT = 10.0
+# !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+_DELETION_SLICE = 0.002  # Seconds of loop time a deletion may use before yielding
+_DELETION_JOBS_MAX = 100  # Amount of deletion jobs whose status can be requested
+# =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
 
 # Do not export!
 ST = TypeVar('ST', bound='Server')
 CloseFuture = Union['asyncio.Future[None]', Coroutine[Any, Any, None]]
 Keys = Mapping[ServerPublicPermanentKey, ServerSecretPermanentKey]
+HTTPResponse = Tuple[http.HTTPStatus, Sequence[Tuple[str, str]], bytes]
+ProcessRequest = Callable[[str, websockets.http.Headers], Any]
 
 
 # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=
@@ -168,7 +200,7 @@ def synthesize_obj(obj_type, constraints):
     None is returned.
     """
     if constraints is not None:
-        synthesizer = init_synthesizer_on_type(obj_type)
+        synthesizer = get_synthesizer(obj_type)
         # start_time = time.perf_counter()
         synthesized_obj = synthesizer.splice_synthesis(constraints)
         # logger.info("Synthesizing one object takes: {}".format(time.perf_counter() - start_time))
@@ -176,6 +208,10 @@ def synthesize_obj(obj_type, constraints):
     return None
 
 
+def _json_body(document: Mapping[str, Any]) -> bytes:
+    return json.dumps(document).encode('utf-8')
+
+
 def replace_obj(obj, references):
     """Redirect all references to obj. If redirection succeeds, return True; otherwise, False."""
     # Perform object replacement for objects that have a synthesized version
@@ -201,6 +237,12 @@ async def serve(
         event_callbacks: Optional[Mapping[Event, Iterable[EventCallback]]] = None,
         server_class: Optional[Type[ST]] = None,
         ws_kwargs: Optional[Mapping[str, Any]] = None,
+        relay_window: int = RELAY_WINDOW_DEFAULT,
+        job_queue_limits: Optional[JobQueueLimits] = None,
+        channel: Optional[socket.socket] = None,
+        metrics_path: Optional[str] = None,
+        synthesis_executor: Optional[SynthesisExecutor] = None,
+        deletion_path: Optional[str] = None,
 ) -> ST:
     """
     Start serving SaltyRTC Signalling Clients.
@@ -234,9 +276,46 @@ async def serve(
           compression will be disabled (since the data to be compressed
           is already encrypted, compression will have little to no
           positive effect).
+        - `relay_window`: The maximum amount of relay messages per
+          client that may be in flight at the same time. A client's
+          next message will not be relayed until a slot is available.
+          Defaults to `1` (i.e. no pipelining).
+        - `job_queue_limits`: The :class:`JobQueueLimits` of each
+          client's job queue. Reading from a client will be paused
+          while the job queue of the client it relays to is full.
+          Defaults to the default watermarks.
+        - `channel`: A Unix socket connected to a
+          :class:`workers.Acceptor`. If provided, the server will serve
+          connections handed over by the acceptor instead of listening
+          on `host` and `port`. TLS is not supported in this case (the
+          acceptor needs to read the plaintext request line).
+        - `metrics_path`: An optional HTTP path (e.g. `/metrics`) on
+          which the metrics of the server will be served in the
+          Prometheus text format.
+        - `synthesis_executor`: An optional :class:`SynthesisExecutor`
+          whose worker processes synthesize objects for Splice deletion
+          requests. It will not be shut down along with the server.
+          Defaults to an executor with one worker per CPU that is
+          started on the first deletion request.
+        - `deletion_path`: An optional HTTP path (e.g. `/deletions`) on
+          which Splice deletion jobs can be created. A request with one
+          or more (comma-separated) taints in the `Taints` header creates
+          a job and returns its status document. The document of a job
+          is available on the deletion path followed by `/<job-id>`.
+          Deletion requests are not authenticated, so the path must only
+          be reachable from trusted networks.
 
     Raises :exc:`ServerKeyError` in case one or more keys have been repeated.
+    Raises :exc:`ValueError` in case both `channel` and `ssl_context`
+    have been provided.
+    Raises :exc:`ValueError` in case `deletion_path` has been provided
+    while Splice is disabled.
     """
+    if channel is not None and ssl_context is not None:
+        raise ValueError('TLS is not supported when serving connections of an acceptor')
+    if deletion_path is not None and not __splice__:
+        raise ValueError('Deletion requires Splice to be enabled')
+
     if loop is None:
         loop = asyncio.get_event_loop()
 
@@ -247,7 +326,9 @@ async def serve(
     # Create server
     if server_class is None:
         server_class = cast('Type[ST]', Server)
-    server = server_class(keys, paths, loop=loop)
+    server = server_class(
+        keys, paths, loop=loop, relay_window=relay_window,
+        job_queue_limits=job_queue_limits, synthesis_executor=synthesis_executor)
 
     # Register event callbacks
     if event_callbacks is not None:
@@ -268,8 +349,20 @@ async def serve(
     ws_kwargs['subprotocols'] = server.subprotocols
     ws_kwargs['select_subprotocol'] = server.protocol_class.select_subprotocol
 
+    # Serve metrics and deletion jobs (before any other request processing)
+    if metrics_path is not None or deletion_path is not None:
+        server.metrics_path = metrics_path
+        server.deletion_path = deletion_path
+        ws_kwargs['process_request'] = functools.partial(
+            server.process_request, ws_kwargs.get('process_request'))
+
     # Start WS server
-    ws_server = await websockets.serve(server.handler, **ws_kwargs)
+    if channel is None:
+        ws_server = await websockets.serve(server.handler, **ws_kwargs)
+    else:
+        del ws_kwargs['host'], ws_kwargs['port']
+        ws_server = await workers.serve_channel(
+            server.handler, channel, loop, **ws_kwargs)
 
     # Set WS server instance
     server.server = ws_server
@@ -278,6 +371,230 @@ async def serve(
     return server
 
 
+class _Relay(FrameJob):
+    """
+    A relay message that has been enqueued on the job queue of the
+    destination but has not been sent, yet.
+    """
+    __slots__ = (
+        'protocol',
+        'destination_id',
+        'tick',
+        'enqueued',
+    )
+
+    def __init__(
+            self,
+            protocol: 'ServerProtocol',
+            destination_id: int,
+            data: Packet,
+            enqueued: float,
+    ) -> None:
+        super().__init__(data)
+        self.protocol = protocol
+        self.destination_id = destination_id
+        self.tick = None  # type: Optional[int]
+        self.enqueued = enqueued
+
+    def expire(self) -> None:
+        """
+        Finish the relay message due to a timeout.
+
+        .. note:: Called by the :class:`TimeoutWheel`.
+        """
+        self.finish(asyncio.TimeoutError())
+
+    def done(self, exc: Optional[BaseException]) -> None:
+        self.protocol._relay_done(self, exc)
+
+
+class _KeepAlive:
+    """
+    The keep-alive state of a client that is being tracked by the
+    :class:`KeepAliveScheduler`.
+
+    While no ping is outstanding, the entry expires when the next
+    ping is due. While waiting for a pong, it expires when the ping
+    timed out.
+    """
+    __slots__ = (
+        'scheduler',
+        'client',
+        'failed',
+        'tick',
+        'pong',
+        'ping_sent',
+        'closed',
+    )
+
+    def __init__(
+            self,
+            scheduler: 'KeepAliveScheduler',
+            client: PathClient,
+            failed: 'asyncio.Future[None]',
+    ) -> None:
+        self.scheduler = scheduler
+        self.client = client
+        self.failed = failed
+        self.tick = None  # type: Optional[int]
+        self.pong = None  # type: Optional[asyncio.Future[None]]
+        self.ping_sent = 0.0
+        self.closed = False
+
+    def expire(self) -> None:
+        """
+        .. note:: Called by the :class:`TimeoutWheel`.
+        """
+        self.scheduler._expired(self)
+
+
+class KeepAliveScheduler:
+    """
+    Sends pings to all clients in their keep-alive interval and waits
+    for the corresponding pongs.
+
+    Instead of sleeping per client, all clients are tracked in a single
+    :class:`TimeoutWheel`. Pings that are due in the same tick of the
+    wheel will be sent in one batch.
+    """
+    __slots__ = (
+        '_log',
+        '_loop',
+        '_metrics',
+        '_wheel',
+        '_entries',
+        '_due',
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, metrics: Metrics) -> None:
+        self._log = util.get_logger('server.keep_alive')
+        self._loop = loop
+        self._metrics = metrics
+        self._wheel = TimeoutWheel(loop)
+        self._entries = {}  # type: Dict[PathClient, _KeepAlive]
+        self._due = []  # type: List[_KeepAlive]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, client: PathClient) -> 'asyncio.Future[None]':
+        """
+        Start sending pings to a client.
+
+        Return a future that will be resolved with an exception once
+        the client did not respond to a ping in time
+        (:exc:`PingTimeoutError`) or the connection has been closed
+        (:exc:`Disconnected`).
+        """
+        failed = asyncio.Future(loop=self._loop)  # type: asyncio.Future[None]
+        entry = _KeepAlive(self, client, failed)
+        self._entries[client] = entry
+        self._schedule_ping(entry)
+        return failed
+
+    def remove(self, client: PathClient) -> None:
+        """
+        Stop sending pings to a client. Will do nothing in case the
+        client has already been removed.
+        """
+        entry = self._entries.pop(client, None)
+        if entry is not None:
+            entry.closed = True
+            if entry.tick is not None:
+                self._wheel.remove(entry.tick, entry)
+
+    def close(self) -> None:
+        """
+        Stop sending pings to all clients.
+        """
+        for entry in self._entries.values():
+            entry.closed = True
+        self._entries.clear()
+        self._due.clear()
+        self._wheel.close()
+
+    def _schedule_ping(self, entry: _KeepAlive) -> None:
+        entry.pong = None
+        entry.tick = self._wheel.add(entry.client.keep_alive_interval, entry)
+
+    def _expired(self, entry: _KeepAlive) -> None:
+        entry.tick = None
+        if entry.pong is not None:
+            entry.client.log.debug('Ping timed out')
+            self._metrics.ping_timeouts += 1
+            self._fail(entry, PingTimeoutError(str(entry.client)))
+            return
+
+        # Ping is due, collect all pings of the current tick
+        if len(self._due) == 0:
+            self._loop.call_soon(self._ping_due)
+        self._due.append(entry)
+
+    def _ping_due(self) -> None:
+        due = [entry for entry in self._due if not entry.closed]
+        self._due = []
+        if len(due) == 0:
+            return
+        self._log.debug('Sending {} pings', len(due))
+        log_handler = functools.partial(
+            self._log.exception, 'Unhandled exception while sending pings:')
+        # noinspection PyTypeChecker
+        self._loop.create_task(util.log_exception(asyncio.gather(
+            *(self._ping(entry) for entry in due), loop=self._loop), log_handler))
+
+    async def _ping(self, entry: _KeepAlive) -> None:
+        client = entry.client
+        client.log.debug('Ping')
+        entry.ping_sent = self._loop.time()
+        try:
+            pong = await client.ping()
+        except Disconnected as exc:
+            self._fail(entry, exc)
+            return
+        if entry.closed:
+            pong.add_done_callback(self._discard_pong)
+            return
+
+        # Wait for the pong (or a timeout)
+        entry.pong = pong
+        entry.tick = self._wheel.add(client.keep_alive_timeout, entry)
+        pong.add_done_callback(functools.partial(self._pong_received, entry))
+
+    def _pong_received(self, entry: _KeepAlive, pong: 'asyncio.Future[None]') -> None:
+        if entry.closed or entry.pong is not pong:
+            self._discard_pong(pong)
+            return
+        if entry.tick is not None:
+            self._wheel.remove(entry.tick, entry)
+            entry.tick = None
+        client = entry.client
+        try:
+            if pong.cancelled():
+                raise InternalError('Waiting for pong has been cancelled')
+            client.check_pong(pong)
+        except (Disconnected, InternalError) as exc:
+            self._fail(entry, exc)
+            return
+        client.log.debug('Pong')
+        client.keep_alive_pings += 1
+        self._metrics.keep_alive_rtt.record(
+            int((self._loop.time() - entry.ping_sent) * 1e6))
+        self._schedule_ping(entry)
+
+    @staticmethod
+    def _discard_pong(pong: 'asyncio.Future[None]') -> None:
+        # Retrieve the exception of a pong nobody waits for anymore, so that asyncio
+        # does not complain about it
+        if not pong.cancelled():
+            pong.exception()
+
+    def _fail(self, entry: _KeepAlive, exc: Exception) -> None:
+        if entry.closed:
+            return
+        self.remove(entry.client)
+        entry.failed.set_exception(exc)
+
+
 class ServerProtocol:
     PATH_LENGTH = KEY_LENGTH * 2  # type: ClassVar[int]
 
@@ -285,6 +602,8 @@ class ServerProtocol:
         '_log',
         '_loop',
         '_server',
+        '_relay_window',
+        '_relays',
         'subprotocol',
         'path',
         'client',
@@ -322,6 +641,11 @@ class ServerProtocol:
         # Server instance and subprotocol
         self._server = server
         self.subprotocol = subprotocol
+        server.metrics.connections += 1
+
+        # Relay messages in flight
+        self._relay_window = asyncio.Semaphore(server.relay_window, loop=self._loop)
+        self._relays = set()  # type: Set[_Relay]
 
         # Path and client instance
         self.path = None  # type: Optional[Path]
@@ -550,7 +874,9 @@ class ServerProtocol:
         path = self._server.paths.get(initiator_key)
 
         # Create client instance
-        client = PathClient(connection, path.number, initiator_key, loop=self._loop)
+        client = PathClient(
+            connection, path.number, initiator_key, loop=self._loop,
+            job_queue_limits=self._server.job_queue_limits)
 
         # Attach client to path as 'pending'
         path.add_pending(client)
@@ -786,146 +1112,231 @@ class ServerProtocol:
         path, initiator = self.path, self.client
         assert path is not None
         assert initiator is not None
-        while True:
-            # Receive relay message or drop-responder
-            message = await initiator.receive()
-
-            # Relay
-            if isinstance(message, RelayMessage):
-                # Lookup responder
-                responder = None  # type: Optional[PathClient]
-                try:
-                    responder_id = ResponderAddress(message.destination)
-                    responder = path.get_responder(responder_id)
-                except KeyError:
-                    pass
-                # Send to responder
-                await self.relay_message(
-                    responder, ClientAddress(message.destination), message)
-            # Drop-responder
-            elif isinstance(message, DropResponderMessage):
-                # Lookup responder
-                try:
-                    responder = path.get_responder(message.responder_id)
-                except KeyError:
-                    log_message = 'Responder {} already dropped, nothing to do'
-                    path.log.debug(log_message, message.responder_id)
+        try:
+            while True:
+                # Receive relay message or drop-responder
+                data = await initiator.receive_packet()
+
+                # Relay (fast path, the packet does not need to be unpacked)
+                destination_id = initiator.relay_destination(data)
+                if destination_id is not None:
+                    # Lookup responder
+                    responder = path.get_responder_or_none(destination_id)
+                    # Send to responder
+                    await self.relay_message(responder, destination_id, data)
+                    continue
+
+                # Unpack
+                message = initiator.unpack_packet(data)
+
+                # Relay
+                if isinstance(message, RelayMessage):
+                    # Lookup responder
+                    responder = None  # type: Optional[PathClient]
+                    try:
+                        responder_id = ResponderAddress(message.destination)
+                        responder = path.get_responder(responder_id)
+                    except KeyError:
+                        pass
+                    # Send to responder
+                    await self.relay_message(
+                        responder, message.destination, message.pack(initiator))
+                # Drop-responder
+                elif isinstance(message, DropResponderMessage):
+                    # Lookup responder
+                    try:
+                        responder = path.get_responder(message.responder_id)
+                    except KeyError:
+                        log_message = 'Responder {} already dropped, nothing to do'
+                        path.log.debug(log_message, message.responder_id)
+                    else:
+                        # Drop responder using its job queue
+                        path.log.debug('Dropping responder {}, reason: {}',
+                                       responder, message.reason)
+                        responder.log.debug(
+                            'Dropping (requested by initiator), reason: {}',
+                            message.reason)
+                        self._drop_client(responder, CloseCode(message.reason))
                 else:
-                    # Drop responder using its job queue
-                    path.log.debug(
-                        'Dropping responder {}, reason: {}', responder, message.reason)
-                    responder.log.debug(
-                        'Dropping (requested by initiator), reason: {}', message.reason)
-                    self._drop_client(responder, CloseCode(message.reason))
-            else:
-                error = "Expected relay message or 'drop-responder', got '{}'"
-                raise MessageFlowError(error.format(message.type))
+                    error = "Expected relay message or 'drop-responder', got '{}'"
+                    raise MessageFlowError(error.format(message.type))
+        except asyncio.CancelledError:
+            self._cancel_relays()
+            raise
 
     async def responder_receive_loop(self) -> NoReturn:
         path, responder = self.path, self.client
         assert path is not None
         assert responder is not None
-        while True:
-            # Receive relay message
-            message = await responder.receive()
-
-            # Relay
-            if isinstance(message, RelayMessage):
-                # Lookup initiator
-                initiator = None  # type: Optional[PathClient]
-                try:
-                    initiator = path.get_initiator()
-                except KeyError:
-                    pass
-                # Send to initiator
-                await self.relay_message(initiator, INITIATOR_ADDRESS, message)
-            else:
-                error = "Expected relay message, got '{}'"
-                raise MessageFlowError(error.format(message.type))
+        try:
+            while True:
+                # Receive relay message
+                data = await responder.receive_packet()
+
+                # Relay (fast path, the packet does not need to be unpacked)
+                destination_id = responder.relay_destination(data)
+                if destination_id is not None:
+                    # Lookup initiator and send
+                    await self.relay_message(
+                        path.get_initiator_or_none(), destination_id, data)
+                    continue
+
+                # Unpack
+                message = responder.unpack_packet(data)
+
+                # Relay
+                if isinstance(message, RelayMessage):
+                    # Lookup initiator
+                    initiator = None  # type: Optional[PathClient]
+                    try:
+                        initiator = path.get_initiator()
+                    except KeyError:
+                        pass
+                    # Send to initiator
+                    await self.relay_message(
+                        initiator, INITIATOR_ADDRESS, message.pack(responder))
+                else:
+                    error = "Expected relay message, got '{}'"
+                    raise MessageFlowError(error.format(message.type))
+        except asyncio.CancelledError:
+            self._cancel_relays()
+            raise
 
     async def relay_message(
             self,
             destination: Optional[PathClient],
-            destination_id: ClientAddress,
-            message: RelayMessage,
+            destination_id: int,
+            data: Packet,
     ) -> None:
-        source = self.client
-        assert source is not None
+        """
+        Enqueue a relay message on the job queue of the destination.
 
-        # Prepare message
-        source.log.debug('Packing relay message')
-        message_id = MessageId(message.pack(source)[COOKIE_LENGTH:NONCE_LENGTH])
+        Returns once the message has been enqueued. Up to
+        `relay_window` messages of the source can be in flight at the
+        same time. If the window is full, this waits until the oldest
+        message has been sent or failed. A 'send-error' message will
+        be enqueued towards the source for each message that could not
+        be relayed.
 
-        async def send_error_message() -> None:
-            assert source is not None
-            # Create message and add send coroutine to job queue of the source
-            error = SendErrorMessage.create(ClientAddress(source.id), message_id)
-            source.log.info('Relaying failed, enqueuing send-error')
-            await source.jobs.enqueue(source.send(error))
+        Since messages are enqueued in the order they have been
+        received, the order is preserved per destination.
+
+        Arguments:
+            - `destination`: The :class:`PathClient` instance of the
+              destination or `None` if the destination is not
+              connected.
+            - `destination_id`: The destination address.
+            - `data`: The packet as it has been received from the
+              source client.
+        """
+        source = self.client
+        assert source is not None
 
         # Destination not connected? Send 'send-error' to source
         if destination is None:
             error_message = ('Cannot relay message, no connection for '
                              'destination id 0x{:02x}')
             source.log.info(error_message, destination_id)
-            await send_error_message()
+            self._enqueue_send_error(data)
             return
 
-        # Add send task to job queue of the destination
-        task = self._loop.create_task(destination.send(message))
+        # Wait until the job queue of the destination accepts more data
+        # Note: This pauses reading from the source's connection while the
+        #       destination is not keeping up.
+        if not destination.jobs.writable:
+            source.log.debug('Pausing, job queue of 0x{:02x} is full', destination_id)
+            await destination.jobs.wait_writable()
+            source.log.debug('Resuming')
+
+        # Wait until the relay window has a free slot
+        await self._relay_window.acquire()
+
+        # Add frame to job queue of the destination
+        # Note: Relay messages that are queued back to back will be written at once.
+        relay = _Relay(self, destination_id, data, self._loop.time())
+        relay.tick = self._server.relay_timeouts.add(RELAY_TIMEOUT, relay)
+        self._relays.add(relay)
         destination.log.debug('Enqueueing relayed message from 0x{:02x}', source.id)
-        await destination.jobs.enqueue(task)
+        destination.jobs.enqueue_frame(relay)
 
-        # noinspection PyBroadException
-        try:
-            # Wait for send task to complete
-            await asyncio.wait_for(task, RELAY_TIMEOUT, loop=self._loop)
-        except asyncio.TimeoutError:
+    def _relay_done(self, relay: _Relay, exc: Optional[BaseException]) -> None:
+        """
+        Handle the outcome of a relay message and free its slot in the
+        relay window.
+
+        .. note:: Called by the :class:`_Relay` instance.
+        """
+        source = self.client
+        assert source is not None
+        self._relays.discard(relay)
+        if relay.tick is not None:
+            self._server.relay_timeouts.remove(relay.tick, relay)
+        self._relay_window.release()
+
+        destination_id = relay.destination_id
+        if isinstance(exc, asyncio.TimeoutError):
             # Timed out, send 'send-error' to source
             log_message = 'Sending relayed message to 0x{:02x} timed out'
             source.log.info(log_message, destination_id)
-            await send_error_message()
-        except Exception as exc:
-            # Handle cancellation of the client
-            if isinstance(exc, asyncio.CancelledError) and source.tasks.have_result:
-                raise
-
+        elif isinstance(exc, asyncio.CancelledError) and source.tasks.have_result:
+            # The source client is being cancelled, nothing to report
+            return
+        elif exc is not None:
             # An exception has been triggered while sending the message.
             # Note: We don't care about the actual exception as the job
             #       queue runner will also trigger that exception on the
             #       destination client's handler who will log what happened.
             log_message = 'Sending relayed message failed, receiver 0x{:02x} is gone'
             source.log.info(log_message, destination_id)
-            await send_error_message()
         else:
-            source.log.debug('Sending relayed message to 0x{:02x} successful',
-                             destination.id)
+            source.log.debug(
+                'Sending relayed message to 0x{:02x} successful', destination_id)
+            metrics = self._server.metrics
+            metrics.relayed_frames += 1
+            metrics.relayed_bytes += len(relay.data)
+            metrics.relay_latency.record(int((self._loop.time() - relay.enqueued) * 1e6))
+            return
+        self._enqueue_send_error(relay.data)
+
+    def _enqueue_send_error(self, data: Packet) -> None:
+        """
+        Enqueue a 'send-error' message for a relay message towards
+        the source client.
+        """
+        source = self.client
+        assert source is not None
+        # Note: The message id is only being sliced from the nonce when needed.
+        message_id = MessageId(data[COOKIE_LENGTH:NONCE_LENGTH])
+        # Create message and add send coroutine to job queue of the source
+        error = SendErrorMessage.create(ClientAddress(source.id), message_id)
+        source.log.info('Relaying failed, enqueuing send-error')
+        self._server.metrics.send_errors += 1
+        source.jobs.enqueue_nowait(source.send(error))
+
+    def _cancel_relays(self) -> None:
+        """
+        Cancel all relay messages of the source client that are still
+        in flight.
+        """
+        for relay in list(self._relays):
+            relay.finish(asyncio.CancelledError())
 
     async def keep_alive_loop(self) -> NoReturn:
         """
+        Wait until the keep-alive scheduler of the server considers
+        the client gone.
+
         Disconnected
         PingTimeoutError
         """
         client = self.client
         assert client is not None
-        while True:
-            # Wait
-            # noinspection PyTypeChecker
-            await asyncio.sleep(client.keep_alive_interval, loop=self._loop)
-
-            # Send ping and wait for pong
-            client.log.debug('Ping')
-            pong_future = await client.ping()
-            try:
-                await asyncio.wait_for(
-                    client.wait_pong(pong_future), client.keep_alive_timeout,
-                    loop=self._loop)
-            except asyncio.TimeoutError:
-                client.log.debug('Ping timed out')
-                raise PingTimeoutError(str(client))
-            else:
-                client.log.debug('Pong')
-                client.keep_alive_pings += 1
+        keep_alive = self._server.keep_alive
+        try:
+            await keep_alive.add(client)
+        finally:
+            keep_alive.remove(client)
+        raise InternalError('Keep-alive returned unexpectedly')
 
     def _handle_client_auth(self, client_auth: ClientAuthMessage) -> None:
         """
@@ -1076,6 +1487,9 @@ class Server:
             keys: Optional[Sequence[ServerSecretPermanentKey]],
             paths: Paths,
             loop: Optional[asyncio.AbstractEventLoop] = None,
+            relay_window: int = RELAY_WINDOW_DEFAULT,
+            job_queue_limits: Optional[JobQueueLimits] = None,
+            synthesis_executor: Optional[SynthesisExecutor] = None,
     ) -> None:
         self._log = util.get_logger('server')
         self._loop = asyncio.get_event_loop() if loop is None else loop
@@ -1097,6 +1511,25 @@ class Server:
         # Store paths
         self.paths = paths
 
+        # Validate & store the relay window
+        if relay_window < 1:
+            raise ValueError('Invalid relay window: {}'.format(relay_window))
+        self.relay_window = relay_window
+
+        # Store the job queue limits for clients
+        self.job_queue_limits = \
+            JobQueueLimits() if job_queue_limits is None else job_queue_limits
+
+        # Timeouts of relay messages in flight (shared by all protocols)
+        self.relay_timeouts = TimeoutWheel(self._loop)
+
+        # Counters and histograms, optionally served on a path
+        self.metrics = Metrics()
+        self.metrics_path = None  # type: Optional[str]
+
+        # Pings and pongs of all clients
+        self.keep_alive = KeepAliveScheduler(self._loop, self.metrics)
+
         # Store server protocols and closing task
         self.protocols = set()  # type: Set[ServerProtocol]
         self._close_task = None  # type: Optional[asyncio.Task[None]]
@@ -1104,6 +1537,19 @@ class Server:
         # Event Registry
         self._events = EventRegistry()
 
+        # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+        # Deletion requests are handled one after another. Synthesis runs in worker
+        # processes (shut down along with the server unless they have been provided).
+        self._deletion_lock = asyncio.Lock(loop=self._loop)
+        self.deletion_path = None  # type: Optional[str]
+        self.deletion_jobs = OrderedDict()  # type: Dict[int, DeletionJob]
+        self._deletion_job_id = 0
+        self._owns_synthesis_executor = synthesis_executor is None
+        if synthesis_executor is None:
+            synthesis_executor = SynthesisExecutor()
+        self.synthesis_executor = synthesis_executor
+        # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+
     @property
     def server(self) -> websockets.server.WebSocketServer:
         assert self._server is not None
@@ -1132,48 +1578,8 @@ class Server:
         # way (i.e., by calling connection.close()). Instead, we just return an exception
         # and let WebSockets to catch it.
         if __splice__ and isinstance(ws_path, dict):
-            taints = ws_path['taints']
-            # TODO: Deletion code here
-            # Splice deletion code
-            system_obj_synthesized, obj_synthesized, obj_flagged = 0, 0, 0
-            start_timer = time.perf_counter()
-            objs = gc.get_objects()
-            self._log.notice("[splice] Getting all {} heap objects takes: {}s"
-                             .format(len(objs), time.perf_counter() - start_timer))
-            self._log.debug("[splice] Splice deletion begins...")
-            for obj in objs:
-                # Identify all splice-able objects
-                # if hasattr(obj, 'taints') and obj.taints == int(taints[0]):
-                if (isinstance(obj, SpliceMixin) or isinstance(obj, SpliceAttrMixin)) \
-                        and obj.taints == int(taints[0]):
-                    self._log.notice("[splice] splicing object: {} "
-                                     "(type: {}, taints: {})".format(obj, type(obj), obj.taints))
-                    try:
-                        start_timer = time.perf_counter()
-                        with obj.splice() as resource:
-                            # splice() will handle deletion automatically.
-                            # Developers can put more code here for defensive
-                            # programming afterwards if necessary.
-                            self._log.notice("[splice] Taking {}s to delete system object: {}".format(
-                                time.perf_counter() - start_timer, obj))
-                            system_obj_synthesized += 1
-                    except:
-                        # Synthesize non-system-resource objects one at a time
-                        start_timer = time.perf_counter()
-                        merged_constraints = concretize_and_merge_constraints(obj, unsplicify=False)
-                        synthesized_obj = synthesize_obj(type(obj), merged_constraints)
-                        # No synthesized object is produced, so the best we can do is to change object attributes.
-                        if synthesized_obj is None:
-                            obj.trusted = False
-                            obj.synthesized = True
-                            obj.taints = identity.empty_taint()
-                            obj.constraints = []
-                            obj_flagged += 1
-                        else:
-                            replace.replace_single(obj, synthesized_obj)
-                            obj_synthesized += 1
-                        self._log.notice("[splice] Taking {}s to delete non-system object: {}".format(
-                            time.perf_counter() - start_timer, obj))
+            job = self._add_deletion_job(parse_taints(ws_path['taints']))
+            await self._run_deletion_job(job)
             # Close the connection by raising an exception (you will see exception and
             # stack traces, but that's OK. The SaltyRTC server is still running correctly).
             raise Exception("Deletion is finished")
@@ -1210,6 +1616,216 @@ class Server:
                 self, subprotocol, connection, ws_path, loop=self._loop)
             await protocol.handler_task
 
+    # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+    def _add_deletion_job(self, taints: Sequence[int]) -> DeletionJob:
+        # Forget the oldest jobs (unless they are still in progress)
+        for job_id, job in list(self.deletion_jobs.items()):
+            if len(self.deletion_jobs) < _DELETION_JOBS_MAX:
+                break
+            if job.done:
+                del self.deletion_jobs[job_id]
+
+        # Add job
+        self._deletion_job_id += 1
+        job = DeletionJob(self._deletion_job_id, taints)
+        self.deletion_jobs[job.id] = job
+        return job
+
+    async def _run_deletion_job(self, job: DeletionJob) -> None:
+        # Deletion runs in slices so that relaying continues in the meantime
+        async with self._deletion_lock:
+            self._log.info('Starting {}', job)
+            job.start()
+            try:
+                await self._splice_delete(job.taints, job)
+            except Exception as exc:
+                self._log.exception('Deletion job {} failed:', job.id)
+                job.finish(error='{}: {}'.format(type(exc).__name__, exc))
+            else:
+                job.finish()
+            self._log.info('Finished {}', job)
+
+    def _process_deletion_request(
+            self,
+            path: str,
+            request_headers: websockets.http.Headers,
+    ) -> Optional[HTTPResponse]:
+        """
+        Create a deletion job (for the deletion path) or return the status
+        document of a job (for the deletion path followed by ``/<job-id>``).
+        """
+        assert self.deletion_path is not None
+        headers = [('Content-Type', DELETION_CONTENT_TYPE)]
+
+        # Create job
+        if path == self.deletion_path:
+            try:
+                taints = parse_taints(request_headers.get_all('Taints'))
+            except ValueError as exc:
+                body = {'error': str(exc)}  # type: Dict[str, Any]
+                return http.HTTPStatus.BAD_REQUEST, headers, _json_body(body)
+            job = self._add_deletion_job(taints)
+            log_handler = functools.partial(
+                self._log.exception, 'Unhandled exception in deletion job:')
+            # noinspection PyTypeChecker
+            self._loop.create_task(
+                util.log_exception(self._run_deletion_job(job), log_handler))
+            headers.append(('Location', '{}/{}'.format(self.deletion_path, job.id)))
+            return http.HTTPStatus.ACCEPTED, headers, _json_body(job.to_dict())
+
+        # Get status of a job
+        prefix = '{}/'.format(self.deletion_path)
+        if path.startswith(prefix):
+            try:
+                job = self.deletion_jobs[int(path[len(prefix):])]
+            except (ValueError, KeyError):
+                body = {'error': 'Unknown deletion job'}
+                return http.HTTPStatus.NOT_FOUND, headers, _json_body(body)
+            return http.HTTPStatus.OK, headers, _json_body(job.to_dict())
+        return None
+
+    async def _splice_delete(self, taints: Sequence[int], job: DeletionJob) -> None:
+        """
+        Delete all objects carrying exactly one of `taints` and update the
+        counts and timings of `job`. Objects of all taints are handled
+        together, so deleting many users at once takes a single pass over
+        the candidate objects, a single synthesis batch and a single heap
+        walk for replacing references.
+
+        Runs in three phases without blocking the event loop for long:
+
+        1. System objects are spliced and the constraints of all other
+           objects are concretised on the loop thread, yielding to the
+           loop every :data:`_DELETION_SLICE` seconds.
+        2. Replacements are synthesised in bulk by the worker processes of
+           the synthesis executor while the loop continues to relay
+           messages.
+        3. All references are swapped at once on the loop thread. Objects
+           that have lost the taint in the meantime are skipped.
+        """
+        loop = self._loop
+        taint_set = frozenset(taints)
+        system_obj_synthesized, obj_flagged = 0, 0
+        start_timer = time.perf_counter()
+        # Only visit objects carrying the taints instead of walking the whole heap
+        # objs = gc.get_objects()
+        objs = registry.tainted_objects_in(taint_set)
+        elapsed = time.perf_counter() - start_timer
+        job.add_timing(DeletionPhase.scan, elapsed)
+        self._log.notice("[splice] Getting all {} tainted objects takes: {}s"
+                         .format(len(objs), elapsed))
+        self._log.debug("[splice] Splice deletion begins...")
+
+        # Phase 1: Delete system objects and schedule synthesis for all other objects
+        pending, items = [], []  # type: List[Any], List[Tuple[type, Any]]
+        phase_start_timer = time.perf_counter()
+        slice_end = time.perf_counter() + _DELETION_SLICE
+        for obj in objs:
+            if time.perf_counter() >= slice_end:
+                await asyncio.sleep(0, loop=loop)
+                slice_end = time.perf_counter() + _DELETION_SLICE
+            # Identify all splice-able objects (taints may have changed while yielding)
+            if not (isinstance(obj, SpliceMixin) or isinstance(obj, SpliceAttrMixin)) \
+                    or obj.taints not in taint_set:
+                continue
+            self._log.notice("[splice] splicing object: {} "
+                             "(type: {}, taints: {})".format(obj, type(obj), obj.taints))
+            try:
+                start_timer = time.perf_counter()
+                with obj.splice() as resource:
+                    # splice() will handle deletion automatically.
+                    # Developers can put more code here for defensive
+                    # programming afterwards if necessary.
+                    self._log.notice("[splice] Taking {}s to delete system object: {}"
+                                     .format(time.perf_counter() - start_timer, obj))
+                    system_obj_synthesized += 1
+            except:
+                # Constraint callbacks access the enclosing data structures, so they
+                # must run on the loop thread. The unsplicified constraints can then be
+                # passed to the synthesis workers.
+                try:
+                    constraints = concretize_and_merge_constraints(obj, unsplicify=True)
+                except Exception as exc:
+                    self._log.exception("[splice] Concretizing constraints of {} failed:",
+                                        type(obj).__name__)
+                    job.failures.append("Concretizing constraints of {} failed: {}"
+                                        .format(type(obj).__name__, exc))
+                    continue
+                pending.append(obj)
+                items.append((type(obj), constraints))
+        job.add_timing(DeletionPhase.concretize, time.perf_counter() - phase_start_timer)
+
+        # Phase 2: Synthesize all objects at once without blocking the loop
+        start_timer = time.perf_counter()
+        presolve_stats = {'hits': 0, 'misses': 0}
+        synthesized_objs = await self.synthesis_executor.synthesize(
+            items, loop=loop, stats=presolve_stats)
+        job.presolve_hits += presolve_stats['hits']
+        job.presolve_misses += presolve_stats['misses']
+        replacements = []
+        for obj, synthesized_obj in zip(pending, synthesized_objs):
+            if obj.taints not in taint_set:
+                continue
+            # No synthesized object is produced, so the best we can do is to
+            # change object attributes.
+            if synthesized_obj is None:
+                obj.trusted = False
+                obj.synthesized = True
+                obj.taints = identity.empty_taint()
+                obj.constraints = []
+                obj_flagged += 1
+            else:
+                replacements.append((obj, synthesized_obj))
+        elapsed = time.perf_counter() - start_timer
+        job.add_timing(DeletionPhase.synthesize, elapsed)
+        self._log.notice("[splice] Taking {}s to synthesize {} non-system objects".format(
+            elapsed, len(pending)))
+
+        # Phase 3: Replace all synthesized objects with a single heap walk. This must not
+        #          yield, otherwise references could be created in the meantime.
+        start_timer = time.perf_counter()
+        replacements = [(obj, synthesized_obj) for obj, synthesized_obj in replacements
+                        if obj.taints in taint_set]
+        replace.replace_batch(replacements)
+        elapsed = time.perf_counter() - start_timer
+        job.add_timing(DeletionPhase.replace, elapsed)
+        self._log.notice("[splice] Taking {}s to replace {} non-system objects".format(
+            elapsed, len(replacements)))
+        job.system_objects_spliced += system_obj_synthesized
+        job.objects_synthesized += len(replacements)
+        job.objects_flagged += obj_flagged
+        self._log.notice("[splice] Deleted {} system objects, synthesized {} objects, "
+                         "flagged {} objects".format(
+                             system_obj_synthesized, len(replacements), obj_flagged))
+    # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+
+    async def process_request(
+            self,
+            next_process_request: Optional[ProcessRequest],
+            path: str,
+            request_headers: websockets.http.Headers,
+    ) -> Optional[HTTPResponse]:
+        """
+        Serve the metrics in case the metrics path has been requested and
+        handle requests to the deletion path. Otherwise, defer to
+        `next_process_request` (if any).
+
+        .. note:: Passed as `process_request` to the WebSocket server.
+        """
+        if self.metrics_path is not None and path == self.metrics_path:
+            headers = [('Content-Type', METRICS_CONTENT_TYPE)]
+            return http.HTTPStatus.OK, headers, render_metrics(self)
+        if self.deletion_path is not None:
+            response = self._process_deletion_request(path, request_headers)
+            if response is not None:
+                return response
+        if next_process_request is None:
+            return None
+        response = next_process_request(path, request_headers)
+        if isinstance(response, Awaitable):
+            response = await response
+        return response
+
     def register(self, protocol: ServerProtocol) -> None:
         self.protocols.add(protocol)
         self._log.debug('Protocol registered: {}', protocol)
@@ -1298,4 +1914,10 @@ class Server:
 
         # Now we can close the server
         self._log.info('Closing server')
+        self.relay_timeouts.close()
+        self.keep_alive.close()
+        # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
+        if self._owns_synthesis_executor:
+            self.synthesis_executor.shutdown(wait=False)
+        # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
         self.server.close()
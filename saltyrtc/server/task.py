@@ -1,7 +1,10 @@
+from typing import Dict  # noqa
 from typing import (
     Any,
+    Awaitable,
     Callable,
     Coroutine,
+    List,
     Optional,
     Set,
     Union,
@@ -10,8 +13,15 @@ from typing import (
 import asyncio
 import enum
 import functools
+import math
 
 from . import util
+from .common import (
+    JOB_QUEUE_HIGH_WATERMARK_BYTES,
+    JOB_QUEUE_HIGH_WATERMARK_JOBS,
+    JOB_QUEUE_LOW_WATERMARK_BYTES,
+    JOB_QUEUE_LOW_WATERMARK_JOBS,
+)
 from .exception import (
     Disconnected,
     InternalError,
@@ -23,13 +33,17 @@ from .exception import (
 from .typing2 import (
     Job,
     Logger,
+    Packet,
     Result,
 )
 
 __all__ = (
     'FinalJob',
+    'FrameJob',
+    'JobQueueLimits',
     'JobQueue',
     'Tasks',
+    'TimeoutWheel',
 )
 
 # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=
@@ -38,6 +52,9 @@ from saltyrtc.splice.identity import empty_taint
 from contextlib import contextmanager
 # =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=
 
+# Constants
+TIMEOUT_WHEEL_RESOLUTION = 0.1
+
 
 def _log_exception(log: Logger, name: str, exc: BaseException) -> None:
     # Handle exception
@@ -68,6 +85,137 @@ class FinalJob:
         self.result = result
 
 
+class FrameJob:
+    """
+    An already packed packet (e.g. a relay message) that will be
+    written by the job queue runner.
+
+    Unlike other jobs, frame jobs are not awaitables. Consecutive frame
+    jobs are batched when being enqueued and the job queue runner
+    writes all frames of a batch at once.
+
+    Subclasses may override :meth:`done` to handle the outcome.
+    """
+    __slots__ = (
+        'data',
+        'finished',
+        'batch',
+    )
+
+    def __init__(self, data: Packet) -> None:
+        self.data = data
+        self.finished = False
+        self.batch = None  # type: Optional[_FrameBatch]
+
+    def finish(self, exc: Optional[BaseException] = None) -> None:
+        """
+        Mark the frame job as finished. Will do nothing in case the
+        frame job has already been finished.
+
+        A frame job that has been finished before it has been written
+        (e.g. due to a timeout) will not be written. Once all frame jobs
+        of a batch that is currently being written have been finished,
+        writing the batch will be cancelled.
+
+        Arguments:
+            - `exc`: `None` if the frame has been written, otherwise
+              the exception that prevented the frame from being
+              written.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        self.done(exc)
+        if self.batch is not None:
+            self.batch.frame_finished()
+
+    def done(self, exc: Optional[BaseException]) -> None:
+        """
+        Called exactly once when the frame job has been finished.
+        """
+
+
+class _FrameBatch:
+    """
+    Consecutive frame jobs of a job queue that will be written at
+    once.
+    """
+    __slots__ = (
+        'frames',
+        'size',
+        'pending',
+        'future',
+    )
+
+    def __init__(self) -> None:
+        self.frames = []  # type: List[FrameJob]
+        self.size = 0
+        self.pending = 0
+        self.future = None  # type: Optional[asyncio.Future[None]]
+
+    def append(self, frame: FrameJob) -> None:
+        """
+        Add a frame job to the batch.
+        """
+        frame.batch = self
+        self.frames.append(frame)
+        self.size += len(frame.data)
+        self.pending += 1
+
+    def frame_finished(self) -> None:
+        """
+        Cancel writing the batch once all of its frame jobs have been
+        finished (e.g. because the source has been dropped or the
+        frames timed out), so a stuck write does not block the job
+        queue.
+        """
+        self.pending -= 1
+        if self.pending == 0 and self.future is not None and not self.future.done():
+            self.future.cancel()
+
+
+FrameWriter = Callable[[List[Packet]], Awaitable[None]]
+QueueItem = Union[Job, FinalJob, _FrameBatch]
+
+
+class JobQueueLimits:
+    """
+    High and low watermarks of a :class:`JobQueue`.
+
+    A job queue is considered full once the size of its queued jobs
+    (in bytes) or the amount of queued jobs exceeds the respective
+    high watermark. It is considered writable again once both have
+    dropped to or below their low watermarks.
+
+    Raises :exc:`ValueError` in case a low watermark exceeds its high
+    watermark.
+    """
+    __slots__ = (
+        'high_bytes',
+        'low_bytes',
+        'high_jobs',
+        'low_jobs',
+    )
+
+    def __init__(
+            self,
+            high_bytes: int = JOB_QUEUE_HIGH_WATERMARK_BYTES,
+            low_bytes: int = JOB_QUEUE_LOW_WATERMARK_BYTES,
+            high_jobs: int = JOB_QUEUE_HIGH_WATERMARK_JOBS,
+            low_jobs: int = JOB_QUEUE_LOW_WATERMARK_JOBS,
+    ) -> None:
+        if not 0 <= low_bytes <= high_bytes:
+            raise ValueError('Invalid watermarks (bytes): low={}, high={}'.format(
+                low_bytes, high_bytes))
+        if not 0 <= low_jobs <= high_jobs:
+            raise ValueError('Invalid watermarks (jobs): low={}, high={}'.format(
+                low_jobs, high_jobs))
+        self.high_bytes = high_bytes
+        self.low_bytes = low_bytes
+        self.high_jobs = high_jobs
+        self.low_jobs = low_jobs
+
+
 @enum.unique
 class JobQueueState(enum.IntEnum):
     open = 1
@@ -91,6 +239,16 @@ class JobQueue:
 
     Joining the job queue will block until all pending jobs have been
     processed.
+
+    The size of queued jobs is bounded by :class:`JobQueueLimits`.
+    Enqueueing never blocks but producers of large jobs (i.e. relayed
+    messages) are expected to wait until the job queue is writable.
+
+    Consecutive :class:`FrameJob`s are merged into a batch as long as
+    the batch has not been dequeued. The runner hands all frames of a
+    batch to the `frame_writer` at once, so that a destination that is
+    behind will catch up with a single write instead of one write per
+    frame.
     """
     __slots__ = (
         '_log',
@@ -99,24 +257,73 @@ class JobQueue:
         '_queue',
         '_runner',
         '_active_job',
+        '_limits',
+        '_bytes',
+        '_jobs',
+        '_sizes',
+        '_writable',
+        '_frame_writer',
+        '_tail_batch',
     )
 
     def __init__(
             self,
             log: Logger,
-            loop: asyncio.AbstractEventLoop
+            loop: asyncio.AbstractEventLoop,
+            limits: Optional[JobQueueLimits] = None,
+            frame_writer: Optional[FrameWriter] = None,
     ) -> None:
         self._log = log
         self._loop = loop
         self._state = JobQueueState.open  # type: JobQueueState
-        self._queue = \
-            asyncio.Queue(loop=self._loop)  # type: asyncio.Queue[Union[Job, FinalJob]]
+        self._queue = asyncio.Queue(loop=self._loop)  # type: asyncio.Queue[QueueItem]
+
+        # Frame batching
+        self._frame_writer = frame_writer
+        self._tail_batch = None  # type: Optional[_FrameBatch]
+
+        # Backpressure
+        self._limits = JobQueueLimits() if limits is None else limits
+        self._bytes = 0
+        self._jobs = 0
+        self._sizes = {}  # type: Dict[Job, int]
+        self._writable = asyncio.Event(loop=self._loop)
+        self._writable.set()
 
         # Job runner
         self._runner = None  # type: Optional[asyncio.Task[None]]
         self._active_job = None  # type: Optional[Job]
 
-    async def enqueue(self, job: Job) -> None:
+    @property
+    def size(self) -> int:
+        """
+        Return the size of all queued jobs in bytes.
+        """
+        return self._bytes
+
+    @property
+    def depth(self) -> int:
+        """
+        Return the amount of queued jobs.
+        """
+        return self._jobs
+
+    @property
+    def writable(self) -> bool:
+        """
+        Return whether the job queue is below its high watermarks (or
+        has dropped below its low watermarks after exceeding them).
+        """
+        return self._writable.is_set()
+
+    async def wait_writable(self) -> None:
+        """
+        Block until the job queue is writable. Returns immediately in
+        case the job queue has been closed or cancelled.
+        """
+        await self._writable.wait()
+
+    async def enqueue(self, job: Job, size: int = 0) -> None:
         """
         Enqueue a job into the job queue of the client.
 
@@ -132,11 +339,54 @@ class JobQueue:
 
         Arguments:
             - `job`: A coroutine or a :class:`asyncio.Task`.
+            - `size`: The amount of bytes the job will send.
         """
-        if self._state == JobQueueState.open:
-            await self._queue.put(job)
-        else:
+        self.enqueue_nowait(job, size=size)
+
+    def enqueue_nowait(self, job: Job, size: int = 0) -> None:
+        """
+        Enqueue a job into the job queue of the client without
+        yielding. See :meth:`~JobQueue.enqueue` for details.
+
+        Arguments:
+            - `job`: A coroutine or a :class:`asyncio.Task`.
+            - `size`: The amount of bytes the job will send.
+        """
+        if self._state != JobQueueState.open:
             util.cancel_awaitable(job, self._log)
+            return
+        self._put(job)
+        if size > 0:
+            self._sizes[job] = size
+        self._job_queued(size)
+
+    def enqueue_frame(self, frame: FrameJob) -> None:
+        """
+        Enqueue a frame job into the job queue of the client without
+        yielding. The frame job will be appended to the last batch of
+        frame jobs if that batch is still queued.
+
+        .. note:: The frame job will be finished with an
+                  :exc:`asyncio.CancelledError` when the job queue
+                  has been closed or cancelled.
+
+        Raises :exc:`InternalError` in case the job queue has no
+        frame writer.
+        """
+        if self._frame_writer is None:
+            raise InternalError('Tried enqueueing a frame but no frame writer provided')
+        if self._state != JobQueueState.open:
+            frame.finish(asyncio.CancelledError())
+            return
+
+        # Append to the last batch or start a new one
+        batch = self._tail_batch
+        if batch is None:
+            batch = _FrameBatch()
+            self._put(batch)
+            self._tail_batch = batch
+        batch.append(frame)
+        self._job_queued(len(frame.data))
 
     def close(self, result: Result, *jobs: Job) -> None:
         """
@@ -165,6 +415,9 @@ class JobQueue:
         self._state = JobQueueState.closed
         self._log.debug('Closed job queue')
 
+        # Release producers waiting for the job queue to become writable
+        self._writable.set()
+
         # Ask the job queue runner to stop when done processing all previous jobs.
         self._stop(result, *jobs)
 
@@ -245,6 +498,7 @@ class JobQueue:
         if self._state < JobQueueState.cancelled:
             self._state = JobQueueState.cancelled
             self._log.debug('Cancelled job queue')
+            self._writable.set()
         if self._active_job is not None:
             self._log.debug('Cancelling active job')
             # Note: We explicitly DO NOT add the 'job done' callback here since the job
@@ -257,12 +511,63 @@ class JobQueue:
                 job = self._queue.get_nowait()
             except asyncio.QueueEmpty:
                 break
+            self._job_dequeued(job)
             if isinstance(job, FinalJob):
                 self._job_done(job, silent=True)
+            elif isinstance(job, _FrameBatch):
+                for frame in job.frames:
+                    frame.finish(asyncio.CancelledError())
+                self._job_done(job, silent=True)
             else:
                 util.cancel_awaitable(job, self._log, done_cb=self._job_done)
 
-    def _job_done(self, job: Union[Job, FinalJob], silent: bool = False) -> None:
+    def _put(self, job: QueueItem) -> None:
+        """
+        Put a job into the queue. Any subsequent frame job will start a
+        new batch.
+        """
+        self._tail_batch = None
+        self._queue.put_nowait(job)
+
+    def _job_queued(self, size: int) -> None:
+        """
+        Update the size of the job queue after a job has been enqueued
+        and apply the high watermarks.
+        """
+        self._jobs += 1
+        self._bytes += size
+        if self._writable.is_set() and (
+                self._bytes > self._limits.high_bytes or
+                self._jobs > self._limits.high_jobs):
+            self._log.debug(
+                'Job queue above high watermark (size={}, #jobs={})',
+                self._bytes, self._jobs)
+            self._writable.clear()
+
+    def _job_dequeued(self, job: QueueItem) -> None:
+        """
+        Update the size of the job queue after a job has been dequeued
+        and apply the low watermarks.
+        """
+        if isinstance(job, _FrameBatch):
+            # Close the batch for further frames
+            if self._tail_batch is job:
+                self._tail_batch = None
+            self._jobs -= len(job.frames)
+            self._bytes -= job.size
+        elif not isinstance(job, FinalJob):
+            self._jobs -= 1
+            if self._bytes > 0:
+                self._bytes -= self._sizes.pop(job, 0)
+        if not self._writable.is_set() and (
+                self._bytes <= self._limits.low_bytes and
+                self._jobs <= self._limits.low_jobs):
+            self._log.debug(
+                'Job queue below low watermark (size={}, #jobs={})',
+                self._bytes, self._jobs)
+            self._writable.set()
+
+    def _job_done(self, job: QueueItem, silent: bool = False) -> None:
         """
         Mark a previously dequeued job as processed.
 
@@ -282,9 +587,11 @@ class JobQueue:
         """
         # Enqueue any last minute jobs and ask the job queue runner to stop
         # Warning: put_nowait can raise if we limit the queue size!
+        # Note: The watermarks are not applied since the job queue is not open anymore.
         for job in jobs:
-            self._queue.put_nowait(job)
-        self._queue.put_nowait(FinalJob(result))
+            self._put(job)
+            self._jobs += 1
+        self._put(FinalJob(result))
 
     async def _run(self, result_handler: Callable[[Result], None]) -> None:
         """
@@ -300,6 +607,7 @@ class JobQueue:
             except asyncio.CancelledError:
                 self._log.error('Job queue runner cancelled')
                 return
+            self._job_dequeued(job)
 
             # Handle final job
             if isinstance(job, FinalJob):
@@ -310,8 +618,17 @@ class JobQueue:
                 self._log.debug('Job queue runner done')
                 return
 
+            # Write a batch of frames
+            if isinstance(job, _FrameBatch):
+                future = asyncio.ensure_future(self._write_frames(job), loop=self._loop)
+                job.future = future
+                # Note: Added before the runner awaits the future, so the frames
+                #       are finished before the runner handles the outcome.
+                future.add_done_callback(functools.partial(self._frames_done, job))
+            else:
+                future = asyncio.ensure_future(job, loop=self._loop)
+
             # Wait until complete and handle exceptions
-            future = asyncio.ensure_future(job, loop=self._loop)
             self._log.debug('Waiting for job to complete {}', future)
             self._active_job = future
             try:
@@ -332,6 +649,29 @@ class JobQueue:
                 self._active_job = None
                 self._job_done(future)
 
+    async def _write_frames(self, batch: _FrameBatch) -> None:
+        """
+        Write all frames of a batch that have not been finished, yet.
+        """
+        assert self._frame_writer is not None
+        data = [frame.data for frame in batch.frames if not frame.finished]
+        if len(data) > 0:
+            self._log.debug('Writing {} frames', len(data))
+            await self._frame_writer(data)
+
+    @staticmethod
+    def _frames_done(batch: _FrameBatch, future: 'asyncio.Future[None]') -> None:
+        """
+        Finish all frames of a batch once it has been written (or
+        writing failed).
+        """
+        if future.cancelled():
+            exc = asyncio.CancelledError()  # type: Optional[BaseException]
+        else:
+            exc = future.exception()
+        for frame in batch.frames:
+            frame.finish(exc)
+
 
 class Tasks:
     """
@@ -476,6 +816,107 @@ class Tasks:
                 task.cancel()
 
 
+class TimeoutWheel:
+    """
+    A coarse-grained timer for a large amount of timeouts that are
+    rarely expected to expire.
+
+    Entries are sorted into buckets of `resolution` seconds. Instead of
+    one timer handle per entry, a single timer handle ticks once per
+    bucket (but only while entries are pending) and expires all entries
+    of the buckets that are due. Thus, an entry will expire up to
+    `resolution` seconds late but never early.
+
+    An entry can be any object with an `expire` method which will be
+    called without arguments once the entry expired.
+    """
+    __slots__ = (
+        '_loop',
+        '_resolution',
+        '_buckets',
+        '_tick',
+        '_handle',
+    )
+
+    def __init__(
+            self,
+            loop: asyncio.AbstractEventLoop,
+            resolution: float = TIMEOUT_WHEEL_RESOLUTION,
+    ) -> None:
+        self._loop = loop
+        self._resolution = resolution
+        self._buckets = {}  # type: Dict[int, Set[Any]]
+        self._tick = self._current_tick()
+        self._handle = None  # type: Optional[asyncio.Handle]
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def add(self, timeout: float, entry: Any) -> int:
+        """
+        Add an entry that will expire after `timeout` seconds.
+
+        Return the tick of the bucket the entry has been added to. It
+        is required to remove the entry.
+        """
+        # Start ticking
+        if self._handle is None:
+            self._tick = self._current_tick()
+            self._schedule()
+
+        # Add to the bucket (always after the current tick)
+        tick = max(
+            math.ceil((self._loop.time() + timeout) / self._resolution), self._tick + 1)
+        try:
+            self._buckets[tick].add(entry)
+        except KeyError:
+            self._buckets[tick] = {entry}
+        return tick
+
+    def remove(self, tick: int, entry: Any) -> None:
+        """
+        Remove an entry before it expires. Will do nothing in case the
+        entry has already expired or has been removed.
+        """
+        bucket = self._buckets.get(tick)
+        if bucket is not None:
+            bucket.discard(entry)
+            if len(bucket) == 0:
+                del self._buckets[tick]
+
+    def close(self) -> None:
+        """
+        Remove all entries without expiring them and stop ticking.
+        """
+        self._buckets.clear()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _current_tick(self) -> int:
+        return math.floor(self._loop.time() / self._resolution)
+
+    def _schedule(self) -> None:
+        self._handle = self._loop.call_at(
+            (self._tick + 1) * self._resolution, self._on_tick)
+
+    def _on_tick(self) -> None:
+        self._handle = None
+
+        # Expire all entries of buckets that are due
+        due = self._current_tick()
+        for tick in range(self._tick + 1, due + 1):
+            bucket = self._buckets.pop(tick, None)
+            if bucket is not None:
+                for entry in bucket:
+                    entry.expire()
+        self._tick = max(self._tick, due)
+
+        # Continue ticking while entries are pending
+        if len(self._buckets) > 0 and self._handle is None:
+            self._schedule()
+
+
 # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
 class SpliceTasks(Tasks, SpliceAttrMixin):
     def __init__(self, log, loop,
@@ -488,7 +929,7 @@ class SpliceTasks(Tasks, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
 
@@ -508,17 +949,17 @@ class SpliceTasks(Tasks, SpliceAttrMixin):
 
 
 class SpliceJobQueue(JobQueue, SpliceAttrMixin):
-    def __init__(self, log, loop,
+    def __init__(self, log, loop, limits=None, frame_writer=None,
                  # Splice-specific arguments
                  taints=None, trusted=True, synthesized=False):
         if trusted and synthesized:
             raise AttributeError("Cannot initialize a trusted and synthesized SpliceTask object.")
-        super().__init__(log, loop)
+        super().__init__(log, loop, limits=limits, frame_writer=frame_writer)
         # Set up taints and flags for Task
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
 
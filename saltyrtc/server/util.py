@@ -4,6 +4,7 @@ Server.
 """
 # noinspection PyUnresolvedReferences
 from typing import Coroutine  # noqa
+from typing import Dict  # noqa
 from typing import (
     Any,
     Awaitable,
@@ -11,6 +12,7 @@ from typing import (
     List,
     Mapping,
     Optional,
+    Tuple,
     TypeVar,
     cast,
 )
@@ -21,6 +23,7 @@ import libnacl
 import libnacl.public
 import logging
 import ssl
+import sys
 
 from .typing2 import (
     LogbookLevel,
@@ -35,6 +38,8 @@ __all__ = (
     'enable_logging',
     'disable_logging',
     'get_logger',
+    'LoggerAdapter',
+    'get_logger_adapter',
     'consteq',
     'create_ssl_context',
     'load_permanent_key',
@@ -53,6 +58,7 @@ def _logging_error(*_: Any, **__: Any) -> NoReturn:
 
 _logger_redirect_handler = None  # type: Optional[logbook.compat.RedirectLoggingHandler]
 _logger_convert_level_handler = None  # type: Optional[logbook.compat.LoggingHandler]
+_shared_loggers = {}  # type: Dict[str, logbook.Logger]
 
 try:
     # noinspection PyUnresolvedReferences
@@ -225,6 +231,148 @@ def get_logger(
     return logger
 
 
+class LoggerAdapter:
+    """
+    A lightweight logger that forwards records to a shared
+    :class:`logbook.Logger` under its own name.
+
+    In contrast to :func:`get_logger`, creating an adapter does not
+    add a logger to the :data:`logger_group`, so adapters can be
+    created per connection. The name of the adapter is only formatted
+    once a record is being emitted and records of disabled levels are
+    dropped before any record is being created.
+
+    Arguments:
+        - `logger`: The shared :class:`logbook.Logger` instance.
+        - `name_format`: A format string for the name, relative to
+          the name of the shared logger.
+        - `name_args`: Arguments for `name_format`.
+    """
+    __slots__ = (
+        '_logger',
+        '_name',
+        '_name_format',
+        '_name_args',
+    )
+
+    def __init__(
+            self,
+            logger: 'logbook.Logger',
+            name_format: str,
+            *name_args: Any
+    ) -> None:
+        self._logger = logger
+        self._name = None  # type: Optional[str]
+        self._name_format = name_format
+        self._name_args = name_args  # type: Tuple[Any, ...]
+
+    @property
+    def name(self) -> str:
+        """
+        Return the name of the adapter.
+        """
+        if self._name is None:
+            self._name = '.'.join((
+                self._logger.name, self._name_format.format(*self._name_args)))
+        return self._name
+
+    def extend_name(self, name_format: str, *name_args: Any) -> None:
+        """
+        Append a sub-name to the name of the adapter.
+
+        Arguments:
+            - `name_format`: A format string for the sub-name.
+            - `name_args`: Arguments for `name_format`.
+        """
+        self._name = None
+        self._name_format = '.'.join((self._name_format, name_format))
+        self._name_args += name_args
+
+    def is_enabled(self, level: LogbookLevel) -> bool:
+        """
+        Return whether records of a specific :mod:`logbook` level will
+        be created.
+        """
+        logger = self._logger
+        return not logger.disabled and level >= logger.level
+
+    def trace(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.TRACE):
+            self._log(logbook.TRACE, args, kwargs)
+
+    def debug(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.DEBUG):
+            self._log(logbook.DEBUG, args, kwargs)
+
+    def info(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.INFO):
+            self._log(logbook.INFO, args, kwargs)
+
+    def notice(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.NOTICE):
+            self._log(logbook.NOTICE, args, kwargs)
+
+    def warning(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.WARNING):
+            self._log(logbook.WARNING, args, kwargs)
+
+    def error(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.ERROR):
+            self._log(logbook.ERROR, args, kwargs)
+
+    def exception(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.ERROR):
+            if len(args) == 0:
+                args = ('Uncaught exception occurred',)
+            kwargs.setdefault('exc_info', sys.exc_info())
+            self._log(logbook.ERROR, args, kwargs)
+
+    def critical(self, *args: Any, **kwargs: Any) -> None:
+        if self.is_enabled(logbook.CRITICAL):
+            self._log(logbook.CRITICAL, args, kwargs)
+
+    def _log(self, level: LogbookLevel, args: Tuple[Any, ...], kwargs: Any) -> None:
+        # Note: This mirrors `logbook.RecordDispatcher.make_record_and_handle`
+        #       apart from the channel name. The frame correction skips the
+        #       frames of the adapter.
+        logger = self._logger
+        exc_info = kwargs.pop('exc_info', None)
+        extra = kwargs.pop('extra', None)
+        frame_correction = kwargs.pop('frame_correction', 0) + 2
+        record = logbook.LogRecord(
+            self.name, level, args[0], args[1:], kwargs, exc_info, extra, None,
+            logger, frame_correction)
+        try:
+            logger.handle(record)
+        finally:
+            record.late = True
+            if not record.keep_open:
+                record.close()
+
+
+def get_logger_adapter(
+        name: str,
+        name_format: str,
+        *name_args: Any
+) -> LoggerAdapter:
+    """
+    Return a :class:`LoggerAdapter` for a shared logger.
+
+    Arguments:
+        - `name`: The name of the shared logger, see
+          :func:`get_logger`. The shared logger will only be created
+          once per name.
+        - `name_format`: A format string for the name of the adapter,
+          relative to `name`.
+        - `name_args`: Arguments for `name_format`.
+    """
+    try:
+        logger = _shared_loggers[name]
+    except KeyError:
+        logger = _shared_loggers[name] = get_logger(name)
+    return LoggerAdapter(logger, name_format, *name_args)
+
+
 def consteq(left: bytes, right: bytes) -> bool:
     """
     Compares two byte instances with one another. If `a` and `b` have
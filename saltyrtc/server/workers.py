@@ -0,0 +1,312 @@
+"""
+Multi-process support: An acceptor process accepts connections and
+hands each connection over to the worker process that owns the
+connection's path.
+
+Clients of the same path need to meet in the same :class:`Server`
+instance, so connections cannot be load balanced arbitrarily (e.g. by
+``SO_REUSEPORT``). Instead, the acceptor peeks at the request line of
+the WebSocket upgrade request, derives the worker from the initiator's
+public key in the path and passes the socket to that worker via
+``SCM_RIGHTS``.
+
+.. important:: The acceptor needs to read the request line in
+               plaintext. Therefore, TLS needs to be terminated in
+               front of the acceptor.
+"""
+from typing import Dict  # noqa
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional,
+)
+
+import array
+import asyncio
+import binascii
+import functools
+import socket
+import websockets
+
+from . import util
+from .common import KEY_LENGTH
+
+__all__ = (
+    'worker_index',
+    'Acceptor',
+    'ChannelListener',
+    'serve_channel',
+)
+
+# Constants
+_REQUEST_LINE_LENGTH_MAX = 1024
+_REQUEST_LINE_TIMEOUT = 10.0
+_REQUEST_LINE_RETRY_DELAY = 0.01
+_FDS_PER_MESSAGE_MAX = 64
+
+
+def worker_index(request_line: bytes, workers: int) -> int:
+    """
+    Return the index of the worker that owns the path of an HTTP
+    request line (e.g. ``GET /<initiator-key-hex> HTTP/1.1``).
+
+    Requests with an invalid path are assigned to the first worker
+    which will reject them as usual.
+    """
+    try:
+        _, path, _ = request_line.split(b' ', 2)
+        initiator_key = binascii.unhexlify(path[1:])
+    except (ValueError, binascii.Error):
+        return 0
+    if len(initiator_key) != KEY_LENGTH:
+        return 0
+    # Note: Public keys are uniformly distributed, no need to hash them again.
+    return int.from_bytes(initiator_key[:8], byteorder='big') % workers
+
+
+def _send_fd(channel: socket.socket, fd: int) -> None:
+    channel.sendmsg(
+        [b'\x00'],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [fd]).tobytes())])
+
+
+def _receive_fds(channel: socket.socket) -> Optional[List[int]]:
+    """
+    Receive file descriptors from a channel. Return `None` in case
+    the channel has been closed.
+    """
+    fds = array.array('i')
+    data, ancillary_data, *_ = channel.recvmsg(
+        _FDS_PER_MESSAGE_MAX, socket.CMSG_LEN(_FDS_PER_MESSAGE_MAX * fds.itemsize))
+    if len(data) == 0:
+        return None
+    for level, type_, cmsg_data in ancillary_data:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    return list(fds)
+
+
+class Acceptor:
+    """
+    Accepts connections on a listening socket and hands each
+    connection over to the worker that owns the connection's path.
+
+    Arguments:
+        - `sock`: A listening TCP socket.
+        - `channels`: One connected Unix socket per worker. See
+          :func:`serve_channel` for the other side.
+        - `loop`: A :class:`asyncio.BaseEventLoop` instance.
+    """
+    __slots__ = (
+        '_log',
+        '_loop',
+        '_sock',
+        '_channels',
+        '_pending',
+    )
+
+    def __init__(
+            self,
+            sock: socket.socket,
+            channels: List[socket.socket],
+            loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        if len(channels) == 0:
+            raise ValueError('At least one worker channel is required')
+        self._log = util.get_logger('acceptor')
+        self._loop = loop
+        self._sock = sock
+        self._channels = channels
+        self._pending = {}  # type: Dict[socket.socket, asyncio.Handle]
+
+    def start(self) -> None:
+        """
+        Start accepting connections.
+        """
+        self._sock.setblocking(False)
+        self._loop.add_reader(self._sock.fileno(), self._accept)
+        self._log.info('Accepting connections for {} workers', len(self._channels))
+
+    def close(self) -> None:
+        """
+        Stop accepting connections and close all connections that
+        have not been handed over, yet.
+        """
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        for connection in list(self._pending):
+            self._drop(connection)
+
+    def _accept(self) -> None:
+        try:
+            connection, address = self._sock.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self._log.warning('Accepting connection failed: {}', exc)
+            return
+        self._log.debug('Accepted connection from {}', address)
+        connection.setblocking(False)
+        self._pending[connection] = self._loop.call_later(
+            _REQUEST_LINE_TIMEOUT, self._drop, connection)
+        self._loop.add_reader(connection.fileno(), self._peek, connection)
+
+    def _peek(self, connection: socket.socket) -> None:
+        # Peek so that the worker will receive the request untouched
+        try:
+            data = connection.recv(_REQUEST_LINE_LENGTH_MAX, socket.MSG_PEEK)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(connection)
+            return
+        if len(data) == 0:
+            self._drop(connection)
+            return
+
+        # Wait for the complete request line
+        end = data.find(b'\r\n')
+        if end == -1:
+            if len(data) >= _REQUEST_LINE_LENGTH_MAX:
+                self._log.debug('Request line too long')
+                self._drop(connection)
+            else:
+                # Note: The data remains readable, so we need to back off to avoid
+                #       spinning until more data arrives.
+                self._loop.remove_reader(connection.fileno())
+                self._loop.call_later(
+                    _REQUEST_LINE_RETRY_DELAY, self._resume_peek, connection)
+            return
+
+        # Hand over to the worker
+        index = worker_index(data[:end], len(self._channels))
+        self._log.debug('Handing over connection to worker #{}', index)
+        try:
+            _send_fd(self._channels[index], connection.fileno())
+        except OSError as exc:
+            self._log.error('Handing over connection to worker #{} failed: {}',
+                            index, exc)
+        self._drop(connection)
+
+    def _resume_peek(self, connection: socket.socket) -> None:
+        if connection in self._pending:
+            self._loop.add_reader(connection.fileno(), self._peek, connection)
+
+    def _drop(self, connection: socket.socket) -> None:
+        handle = self._pending.pop(connection, None)
+        if handle is None:
+            return
+        handle.cancel()
+        self._loop.remove_reader(connection.fileno())
+        connection.close()
+
+
+class ChannelListener(asyncio.AbstractServer):
+    """
+    Receives connections handed over by an :class:`Acceptor` and
+    creates a protocol instance for each of them.
+
+    Implements the parts of :class:`asyncio.AbstractServer` that are
+    being used by :class:`websockets.server.WebSocketServer`.
+    """
+    __slots__ = (
+        '_log',
+        '_loop',
+        '_channel',
+        '_protocol_factory',
+        '_closed',
+        'sockets',
+    )
+
+    def __init__(
+            self,
+            channel: socket.socket,
+            protocol_factory: Callable[[], asyncio.Protocol],
+            loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self._log = util.get_logger('worker')
+        self._loop = loop
+        self._channel = channel
+        self._protocol_factory = protocol_factory
+        self._closed = asyncio.Future(loop=self._loop)  # type: asyncio.Future[None]
+        self.sockets = []  # type: List[socket.socket]
+
+        # Start receiving connections
+        self._channel.setblocking(False)
+        self._loop.add_reader(self._channel.fileno(), self._receive)
+
+    @property
+    def closed(self) -> 'asyncio.Future[None]':
+        """
+        Return a future that resolves once the listener has been
+        closed (e.g. because the acceptor is gone).
+        """
+        return asyncio.shield(self._closed, loop=self._loop)
+
+    def close(self) -> None:
+        if self._closed.done():
+            return
+        self._loop.remove_reader(self._channel.fileno())
+        self._channel.close()
+        self._closed.set_result(None)
+
+    def is_serving(self) -> bool:
+        return not self._closed.done()
+
+    async def wait_closed(self) -> None:
+        await self.closed
+
+    def _receive(self) -> None:
+        try:
+            fds = _receive_fds(self._channel)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self._log.error('Receiving connections failed: {}', exc)
+            fds = None
+        if fds is None:
+            self._log.info('Acceptor is gone')
+            self.close()
+            return
+
+        # Create a protocol instance for each connection
+        for fd in fds:
+            connection = socket.socket(fileno=fd)
+            connection.setblocking(False)
+            self._loop.create_task(self._take_over(connection))
+
+    async def _take_over(self, connection: socket.socket) -> None:
+        try:
+            # Note: Missing in the type stubs of `AbstractEventLoop` for Python 3.7
+            await self._loop.connect_accepted_socket(  # type: ignore
+                self._protocol_factory, connection)
+        except OSError as exc:
+            self._log.warning('Could not take over connection: {}', exc)
+            connection.close()
+
+
+async def serve_channel(
+        ws_handler: Callable[..., Any],
+        channel: socket.socket,
+        loop: asyncio.AbstractEventLoop,
+        **ws_kwargs: Any
+) -> websockets.server.WebSocketServer:
+    """
+    Serve WebSocket connections that will be handed over by an
+    :class:`Acceptor` via `channel`. Works like
+    :func:`websockets.server.serve` otherwise.
+
+    The fields `ssl`, `host`, `port` and `compression` of `ws_kwargs`
+    are not supported. The remaining fields are passed to the
+    :class:`websockets.server.WebSocketServerProtocol`.
+    """
+    for key in ('ssl', 'host', 'port', 'compression'):
+        if ws_kwargs.pop(key, None) is not None:
+            raise ValueError("Option '{}' is not supported by workers".format(key))
+    ws_server = websockets.server.WebSocketServer(loop)
+    protocol_factory = functools.partial(
+        websockets.server.WebSocketServerProtocol, ws_handler, ws_server,
+        host=None, port=None, secure=False, loop=loop, **ws_kwargs)
+    ws_server.wrap(ChannelListener(channel, protocol_factory, loop))
+    return ws_server
@@ -0,0 +1,219 @@
+/*
+ * Compiled implementation of the argument tag helpers in splice.py
+ * (argument_tags() and arguments_tags()), which run on every call of a
+ * decorated Splice method.
+ *
+ * Flags and taints of Splice objects are read directly from their packed
+ * metadata (see SpliceMixin in splice.py). Any other argument is handed
+ * over to the pure-Python implementation of argument_tags() (e.g., to
+ * inspect containers), so both implementations always agree. init() must
+ * be called before use.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* SpliceMixin */
+static PyTypeObject *splice_type = NULL;
+/* Pure-Python argument_tags() for non-Splice arguments */
+static PyObject *fallback = NULL;
+
+/* Layout of SpliceMixin._meta (must match splice.py) */
+#define UNTRUSTED 1
+#define SYNTHESIZED 2
+#define TAINTS_SHIFT 2
+
+static PyObject *str_meta = NULL;
+static PyObject *taints_shift = NULL;
+
+/*
+ * Determine the tags of a single argument. Set "untrusted" and
+ * "synthesized" and return a new reference to its taints (or NULL
+ * in case of an error).
+ */
+static PyObject *
+tags_of(PyObject *arg, int *untrusted, int *synthesized)
+{
+    PyObject *result, *taints, *meta;
+    unsigned long long flags;
+
+    if (PyType_IsSubtype(Py_TYPE(arg), splice_type)) {
+        meta = PyObject_GetAttr(arg, str_meta);
+        if (meta == NULL) {
+            return NULL;
+        }
+        /* Only the lowest bits are needed, so overflow is not an issue */
+        flags = PyLong_AsUnsignedLongLongMask(meta);
+        if (flags == (unsigned long long)-1 && PyErr_Occurred()) {
+            Py_DECREF(meta);
+            return NULL;
+        }
+        *synthesized = (flags & SYNTHESIZED) != 0;
+        *untrusted = *synthesized || (flags & UNTRUSTED) != 0;
+        taints = PyNumber_Rshift(meta, taints_shift);
+        Py_DECREF(meta);
+        return taints;
+    }
+
+    result = PyObject_CallFunctionObjArgs(fallback, arg, NULL);
+    if (result == NULL) {
+        return NULL;
+    }
+    if (!PyTuple_Check(result) || PyTuple_GET_SIZE(result) != 3) {
+        PyErr_SetString(PyExc_TypeError, "argument_tags() must return a 3-tuple");
+        Py_DECREF(result);
+        return NULL;
+    }
+    *untrusted = PyObject_IsTrue(PyTuple_GET_ITEM(result, 0));
+    *synthesized = PyObject_IsTrue(PyTuple_GET_ITEM(result, 1));
+    if (*untrusted < 0 || *synthesized < 0) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    taints = PyTuple_GET_ITEM(result, 2);
+    Py_INCREF(taints);
+    Py_DECREF(result);
+    return taints;
+}
+
+static int
+check_initialized(void)
+{
+    if (splice_type == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "init() has not been called");
+        return -1;
+    }
+    return 0;
+}
+
+/*
+ * Merge the tags of "arg" into the tags accumulated so far. Steals
+ * nothing, replaces *taints with a new reference.
+ */
+static int
+merge_tags(PyObject *arg, int *untrusted, int *synthesized, PyObject **taints)
+{
+    int arg_untrusted, arg_synthesized;
+    PyObject *arg_taints, *merged;
+
+    arg_taints = tags_of(arg, &arg_untrusted, &arg_synthesized);
+    if (arg_taints == NULL) {
+        return -1;
+    }
+    merged = PyNumber_Or(*taints, arg_taints);
+    Py_DECREF(arg_taints);
+    if (merged == NULL) {
+        return -1;
+    }
+    Py_DECREF(*taints);
+    *taints = merged;
+    *untrusted = *untrusted || arg_untrusted;
+    *synthesized = *synthesized || arg_synthesized;
+    return 0;
+}
+
+static PyObject *
+speedups_init(PyObject *module, PyObject *args)
+{
+    PyObject *type, *function;
+
+    if (!PyArg_ParseTuple(args, "O!O:init", &PyType_Type, &type, &function)) {
+        return NULL;
+    }
+    if (!PyCallable_Check(function)) {
+        PyErr_SetString(PyExc_TypeError, "fallback must be callable");
+        return NULL;
+    }
+    Py_INCREF(type);
+    Py_XSETREF(splice_type, (PyTypeObject *)type);
+    Py_INCREF(function);
+    Py_XSETREF(fallback, function);
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+speedups_argument_tags(PyObject *module, PyObject *arg)
+{
+    int untrusted, synthesized;
+    PyObject *taints, *result;
+
+    if (check_initialized() < 0) {
+        return NULL;
+    }
+    taints = tags_of(arg, &untrusted, &synthesized);
+    if (taints == NULL) {
+        return NULL;
+    }
+    result = Py_BuildValue("(OON)", untrusted ? Py_True : Py_False,
+                           synthesized ? Py_True : Py_False, taints);
+    return result;
+}
+
+static PyObject *
+speedups_arguments_tags(PyObject *module, PyObject *args)
+{
+    PyObject *arguments, *kwargs = Py_None, *taints, *key, *value;
+    Py_ssize_t i, pos = 0;
+    int untrusted = 0, synthesized = 0;
+
+    if (!PyArg_ParseTuple(args, "O!|O:arguments_tags", &PyTuple_Type, &arguments, &kwargs)) {
+        return NULL;
+    }
+    if (kwargs != Py_None && !PyDict_Check(kwargs)) {
+        PyErr_SetString(PyExc_TypeError, "kwargs must be a dict or None");
+        return NULL;
+    }
+    if (check_initialized() < 0) {
+        return NULL;
+    }
+    taints = PyLong_FromLong(0);
+    if (taints == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < PyTuple_GET_SIZE(arguments); i++) {
+        if (merge_tags(PyTuple_GET_ITEM(arguments, i), &untrusted, &synthesized, &taints) < 0) {
+            Py_DECREF(taints);
+            return NULL;
+        }
+    }
+    if (kwargs != Py_None) {
+        while (PyDict_Next(kwargs, &pos, &key, &value)) {
+            if (merge_tags(value, &untrusted, &synthesized, &taints) < 0) {
+                Py_DECREF(taints);
+                return NULL;
+            }
+        }
+    }
+    return Py_BuildValue("(OON)", untrusted ? Py_True : Py_False,
+                         synthesized ? Py_True : Py_False, taints);
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"init", speedups_init, METH_VARARGS,
+     "init(splice_type, fallback)\n\n"
+     "Set the Splice base class and the function that determines the\n"
+     "tags of all other arguments."},
+    {"argument_tags", speedups_argument_tags, METH_O,
+     "argument_tags(arg) -> (untrusted, synthesized, taints)"},
+    {"arguments_tags", speedups_arguments_tags, METH_VARARGS,
+     "arguments_tags(args, kwargs=None) -> (untrusted, synthesized, taints)"},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "saltyrtc.splice._speedups",
+    "Compiled argument tag helpers of the Splice instrumentation.",
+    -1,
+    speedups_methods
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    str_meta = PyUnicode_InternFromString("_meta");
+    taints_shift = PyLong_FromLong(TAINTS_SHIFT);
+    if (str_meta == NULL || taints_shift == NULL) {
+        return NULL;
+    }
+    return PyModule_Create(&speedups_module);
+}
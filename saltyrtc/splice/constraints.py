@@ -1,7 +1,13 @@
 """Symbolic data-structure-level constraint parsing for constraint concretization at deletion time. """
-from arpeggio import Optional, ZeroOrMore, OneOrMore, EOF, PTNodeVisitor
+from arpeggio import Optional, ZeroOrMore, OneOrMore, EOF, PTNodeVisitor, ParserPython, Terminal
 from arpeggio import RegExMatch as _
 
+# Symbolic constraint string -> parse tree (see parse_symbolic())
+_parse_trees = {}
+_parser = None
+# Symbolic constraint string -> compiled function (see compile_symbolic())
+_compiled = {}
+
 
 def merge_constraints(constraints, other):
     """Merge two constraints."""
@@ -58,6 +64,23 @@ def condition_op(): return _(r'\w+')
 def func_name(): return _(r'\w+')
 
 
+def parse_symbolic(constraints):
+    """
+    Return the parse tree of a symbolic constraint string. Building an
+    Arpeggio parser is expensive and data structures attach the same few
+    constraint strings to every inserted object, so a single parser is
+    shared and each distinct string is only parsed once. Parse trees are
+    not modified when they are visited, so they can be shared as well.
+    """
+    global _parser
+    parse_tree = _parse_trees.get(constraints)
+    if parse_tree is None:
+        if _parser is None:
+            _parser = ParserPython(symbolic, debug=False)
+        parse_tree = _parse_trees[constraints] = _parser.parse(constraints)
+    return parse_tree
+
+
 class SymbolicVisitor(PTNodeVisitor):
     """Semantic analysis of a parsed tree of symbolic constraints."""
     def __init__(self, obj, struct, dg=False, *args, **kwargs):
@@ -168,3 +191,202 @@ class SymbolicVisitor(PTNodeVisitor):
         if self.dg:
             merged_constraints = merge_constraints([{'conds': self.cond_constraints}], merged_constraints)
         self.constraints = merged_constraints
+
+
+# Compiler ============================================================================
+# SymbolicVisitor walks the parse tree (dispatching visit_* methods by name for every
+# node) each time constraints are concretized, i.e., once per object at deletion time.
+# The compiler below produces the same results, but resolves the structure of the tree
+# once: Each node becomes a closure over the closures of its children and the values
+# of terminals are computed upfront, so concretizing becomes a plain function call.
+# The rules mirror the visit_* methods of SymbolicVisitor and must be kept in sync.
+
+class _Context(object):
+    """State of a single concretization (see SymbolicVisitor.__init__)."""
+    __slots__ = ('obj', 'struct', 'dg', 'cond_constraints')
+
+    def __init__(self, obj, struct, dg):
+        self.obj = obj
+        self.struct = struct
+        self.dg = dg
+        self.cond_constraints = []
+
+
+def _compile_children(node):
+    """
+    Return a function that evaluates the children of a non-terminal node to a list
+    of (rule name, value) tuples. Like in Arpeggio, children evaluating to None are
+    left out. Values of terminals are static and computed here.
+    """
+    parts = []
+    dynamic = False
+    for child in node:
+        if isinstance(child, Terminal):
+            # See PTNodeVisitor.visit__default__
+            if not child.suppress:
+                parts.append((child.rule_name, str(child), None))
+        else:
+            parts.append((child.rule_name, None, _compile_node(child)))
+            dynamic = True
+    if not dynamic:
+        static_children = [(rule_name, value) for rule_name, value, evaluate in parts]
+        return lambda ctx: static_children
+
+    def children(ctx):
+        values = []
+        for rule_name, value, evaluate in parts:
+            if evaluate is not None:
+                value = evaluate(ctx)
+                if value is None:
+                    continue
+            values.append((rule_name, value))
+        return values
+    return children
+
+
+def _compile_condition(node, children):
+    def condition(ctx):
+        values = children(ctx)
+        op = values[0][1]
+        try:
+            if len(values) > 1:     # condition has at least one argument
+                args = [value for rule_name, value in values[1:]]
+                val = getattr(ctx.struct, op)(*args)
+                if ctx.dg:
+                    ctx.cond_constraints.extend(args)
+            else:   # condition has no argument, ctx.obj will be an implicit argument
+                val = getattr(ctx.struct, op)(ctx.obj)
+        except AttributeError:
+            raise AttributeError("Operation {} is not defined".format(op))
+        return val
+    return condition
+
+
+def _compile_constraint(node, children):
+    def constraint(ctx):
+        values = children(ctx)
+        op = values[0][1]
+        if len(values) == 1:
+            return None
+        elif len(values) == 2:
+            rule_name, value = values[1]
+            if rule_name == 'func_name':
+                try:
+                    val = getattr(ctx.struct, str(value))
+                except AttributeError:
+                    raise AttributeError("Function {} is not defined".format(value))
+            else:
+                if value is not False:
+                    val = value
+                else:
+                    return None
+        else:   # Functions first, then conditions (',' is left out)
+            val = []
+            for rule_name, value in values:
+                if rule_name == 'func_name':
+                    try:
+                        val.append(getattr(ctx.struct, value))
+                    except AttributeError:
+                        raise AttributeError("Function {} is not defined".format(value))
+            val.extend(value for rule_name, value in values if rule_name == 'condition')
+            val = tuple(val)
+        return {str(op): val}
+    return constraint
+
+
+def _compile_cnf(node, children):
+    def cnf(ctx):
+        constraints = {}
+        for rule_name, child in children(ctx):
+            if isinstance(child, dict):
+                for key in child:
+                    if key in constraints:
+                        constraints[key].append(child[key])
+                    else:
+                        constraints[key] = [child[key]]
+        return constraints
+    return cnf
+
+
+def _compile_dnf(node, children):
+    def dnf(ctx):
+        return [child for rule_name, child in children(ctx) if isinstance(child, dict)]
+    return dnf
+
+
+def _compile_conditioned_dnf(node, children):
+    has_else = "else" in node
+
+    def conditioned_dnf(ctx):
+        values = [value for rule_name, value in children(ctx)]
+        if ctx.dg:
+            merged_constraints = []
+            for i in range(0, len(values) - 1, 2):
+                merged_constraints = merge_constraints(values[i+1], merged_constraints)
+            return merged_constraints
+        # if and elifs (the first true condition is returned)
+        for i in range(0, len(values) - 1, 2):
+            if values[i]:
+                return values[i+1]
+        # If none of the if and elifs pass, we return else (if exists)
+        if has_else:
+            return values[-1]
+        else:
+            return []
+    return conditioned_dnf
+
+
+def _compile_symbolic(node, children):
+    def symbolic(ctx):
+        merged_constraints = []
+        for rule_name, child in children(ctx):
+            if isinstance(child, list):
+                merged_constraints = merge_constraints(child, merged_constraints)
+        if ctx.dg:
+            merged_constraints = merge_constraints([{'conds': ctx.cond_constraints}], merged_constraints)
+        return merged_constraints
+    return symbolic
+
+
+def _compile_default(node, children):
+    """See PTNodeVisitor.visit__default__ (not used by the current grammar)."""
+    def default(ctx):
+        values = [value for rule_name, value in children(ctx)]
+        if len(values) == 1:
+            return values[0]
+        non_str = [value for value in values if not isinstance(value, str)]
+        if len(non_str) > 1:
+            return str(node)
+        return non_str[0] if non_str else None
+    return default
+
+
+_compilers = {
+    'condition': _compile_condition,
+    'constraint': _compile_constraint,
+    'cnf': _compile_cnf,
+    'dnf': _compile_dnf,
+    'conditioned_dnf': _compile_conditioned_dnf,
+    'symbolic': _compile_symbolic,
+}
+
+
+def _compile_node(node):
+    compiler = _compilers.get(node.rule_name, _compile_default)
+    return compiler(node, _compile_children(node))
+
+
+def compile_symbolic(constraints):
+    """
+    Compile a symbolic constraint string to a function f(obj, struct, dg=False)
+    that returns the same concrete constraints as visiting the parse tree with
+    SymbolicVisitor(obj, struct, dg). Each distinct string is compiled only once.
+    """
+    compiled = _compiled.get(constraints)
+    if compiled is None:
+        evaluate = _compile_node(parse_symbolic(constraints))
+
+        def compiled(obj, struct, dg=False):
+            return evaluate(_Context(obj, struct, dg))
+        _compiled[constraints] = compiled
+    return compiled
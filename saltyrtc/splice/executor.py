@@ -0,0 +1,147 @@
+"""
+Run deletion-by-synthesis in a pool of worker processes.
+
+Z3 solving is CPU-bound and Z3's default context is not thread-safe, so
+synthesis cannot make use of more than one core within the server process.
+Instead, the server concretizes (and unsplicifies) the constraints of all
+objects to be deleted and hands them over to the worker processes in bulk.
+Workers only return plain Python values together with the Splice type to
+convert them to, since Splice objects carry flags, taints and constraints
+that should not travel across process boundaries. The server process
+converts the values back into (untrusted, synthesized) Splice objects.
+
+Workers are started when the executor is started and import Z3 right away,
+so the first deletion does not pay for process creation and imports. They
+are forked from a fork server process rather than from the server process,
+so they never inherit its client and listening sockets (a connection closed
+by the server would otherwise stay half-open until the pool exits).
+"""
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+
+from saltyrtc.splice.identity import empty_taint
+
+# Maximum amount of objects handed over to a worker at once
+CHUNK_SIZE = 64
+
+
+def _warm_up():
+    """Import Z3 and the synthesizers in a worker process."""
+    import z3  # noqa
+    import saltyrtc.splice.synthesis  # noqa
+    return os.getpid()
+
+
+def _synthesize(obj_type, constraints):
+    """
+    Synthesize a value for an object of "obj_type" in a worker process.
+    Return a tuple (Splice type, plain value) or None if synthesis did
+    not succeed (e.g., because the constraints have conflicts).
+    """
+    from saltyrtc.splice.synthesis import get_synthesizer
+    if constraints is None:
+        return None
+    synthesized_obj = get_synthesizer(obj_type).splice_synthesis(constraints)
+    if synthesized_obj is None:
+        return None
+    return type(synthesized_obj), synthesized_obj.unsplicify()
+
+
+def _synthesize_chunk(items):
+    """
+    Synthesize a list of (Splice type, constraints) tuples in a worker process.
+    Return the results along with the amount of pre-solver hits and misses
+    (see presolve_stats in synthesis.py, which only the worker can observe).
+    """
+    from saltyrtc.splice.synthesis import presolve_stats
+    hits, misses = presolve_stats['hits'], presolve_stats['misses']
+    results = [_synthesize(obj_type, constraints) for obj_type, constraints in items]
+    return results, presolve_stats['hits'] - hits, presolve_stats['misses'] - misses
+
+
+def _to_splice(result):
+    """Convert the result of _synthesize() to an untrusted, synthesized Splice object."""
+    if result is None:
+        return None
+    cls, value = result
+    return cls.splicify(value, trusted=False, synthesized=True, taints=empty_taint(),
+                        constraints=[])
+
+
+class SynthesisExecutor:
+    """
+    A pool of worker processes that synthesize Splice objects.
+
+    "workers" is the amount of worker processes (defaults to the amount of
+    CPUs). The workers are started by start(), which should be called early
+    so the first deletion does not wait for them. Otherwise, they are
+    started on first use.
+    """
+    def __init__(self, workers=None, chunk_size=CHUNK_SIZE):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('Invalid amount of synthesis workers: {}'.format(workers))
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    @property
+    def started(self):
+        return self._pool is not None
+
+    def start(self, wait=True):
+        """
+        Start all worker processes and let them import Z3. If "wait" is True,
+        block until the workers are ready.
+        """
+        if self._pool is not None:
+            return
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('forkserver'))
+        # ProcessPoolExecutor starts all workers on the first submission.
+        # A worker that does not pick up a warm-up job imports Z3 lazily.
+        futures = [self._pool.submit(_warm_up) for _ in range(self.workers)]
+        if wait:
+            concurrent.futures.wait(futures)
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    async def synthesize(self, items, loop=None, stats=None):
+        """
+        Synthesize objects for a list of (Splice type, constraints) tuples.
+        The constraints must be unsplicified (see concretize_and_merge_constraints()
+        in server.py). Return a list that contains a synthesized Splice object (or
+        None if synthesis did not succeed) for each item, in the same order.
+        If "stats" is a dictionary, the pre-solver hits and misses of the workers
+        are added to its 'hits' and 'misses' keys.
+        """
+        if not items:
+            return []
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        # Do not block the loop in case the workers have not been started, yet
+        self.start(wait=False)
+        # Spread the items across all workers, but keep chunks small enough
+        chunk_size = min(self.chunk_size, -(-len(items) // self.workers))
+        futures = [
+            loop.run_in_executor(self._pool, _synthesize_chunk, items[i:i + chunk_size])
+            for i in range(0, len(items), chunk_size)
+        ]
+        synthesized_objs = []
+        for results, hits, misses in await asyncio.gather(*futures, loop=loop):
+            synthesized_objs.extend(_to_splice(result) for result in results)
+            if stats is not None:
+                stats['hits'] = stats.get('hits', 0) + hits
+                stats['misses'] = stats.get('misses', 0) + misses
+        return synthesized_objs
+
+
+if __name__ == "__main__":
+    pass
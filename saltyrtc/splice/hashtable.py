@@ -216,6 +216,35 @@ class SpliceDict(SpliceStructMixin, UserDict):
         return h
 
 
+def _hash_preimage(h):
+    """
+    Return a string of printable ASCII characters whose SpliceDict.hash()
+    is h (or None if there is none). This allows synthesizing a key with
+    a given hash without a solver (see StrSynthesizer.presolve()).
+    The hash of a string b_0 ... b_n-1 is sum(b_i * 2 ** (n-1-i)).
+    """
+    if h == 0:
+        return ''
+    smallest, largest = 32, 126
+    # Find the shortest length whose range of hashes contains h
+    for length in range(1, StrSynthesizer.DEFAULT_MAX_CHAR_LENGTH + 1):
+        if smallest * (2 ** length - 1) <= h <= largest * (2 ** length - 1):
+            break
+    else:
+        return None
+    chars = []
+    for position in range(length - 1, -1, -1):
+        weight = 2 ** position
+        # Smallest character that leaves a remainder the remaining characters can reach
+        byte = max(smallest, -(-(h - largest * (weight - 1)) // weight))
+        chars.append(chr(byte))
+        h -= byte * weight
+    return ''.join(chars)
+
+
+SpliceDict.hash.preimage = _hash_preimage
+
+
 if __name__ == "__main__":
     from splicetypes import SpliceMixin
     from identity import empty_taint
@@ -0,0 +1,125 @@
+"""
+Opt-in profiling of the Splice instrumentation.
+
+Profiling is enabled by setting the environment variable
+SALTYRTC_SPLICE_PROFILE to 'yes' before the Splice types are imported
+(methods are wrapped for profiling when the Splice classes are created).
+If disabled, the instrumentation only pays for checking the "enabled" flag
+in to_splice() and MetaSplice.__call__().
+
+The following is recorded:
+* For each decorated (class, method) pair: the amount of calls, the
+  cumulative wall time (in seconds) and the net amount of memory blocks
+  allocated (see sys.getallocatedblocks()) by the calls. Both are
+  inclusive, i.e., they contain the cost of nested decorated calls.
+* The amount of to_splice() conversions by the type of the converted value.
+* The amount of Splice objects constructed (MetaSplice.__call__()) by class.
+
+The profile can be printed on a signal (see install_signal_handler()) and
+is exposed via the metrics endpoint of the server.
+"""
+import functools
+import os
+import signal
+import sys
+import time
+
+enabled = os.environ.get('SALTYRTC_SPLICE_PROFILE', 'no') == 'yes'
+
+# (class name, method name) -> [calls, seconds, allocated blocks]
+method_stats = {}
+# type name -> amount of to_splice() conversions
+conversion_stats = {}
+# class name -> amount of constructed objects
+construction_stats = {}
+
+
+def profile_method(cls_name, method_name, wrapper):
+    """Return a wrapper around a decorated method that records its calls."""
+    stats = method_stats.setdefault((cls_name, method_name), [0, 0.0, 0])
+    getallocatedblocks = sys.getallocatedblocks
+    perf_counter = time.perf_counter
+
+    @functools.wraps(wrapper)
+    def profiled_wrapper(*args, **kwargs):
+        blocks = getallocatedblocks()
+        start = perf_counter()
+        try:
+            return wrapper(*args, **kwargs)
+        finally:
+            stats[0] += 1
+            stats[1] += perf_counter() - start
+            stats[2] += getallocatedblocks() - blocks
+
+    return profiled_wrapper
+
+
+def record_conversion(value):
+    """Record a to_splice() conversion of value."""
+    type_name = type(value).__name__
+    conversion_stats[type_name] = conversion_stats.get(type_name, 0) + 1
+
+
+def record_construction(cls):
+    """Record the construction of a Splice object of class cls."""
+    construction_stats[cls.__name__] = construction_stats.get(cls.__name__, 0) + 1
+
+
+def reset():
+    """Reset all counters (decorated methods stay profiled)."""
+    for stats in method_stats.values():
+        stats[:] = [0, 0.0, 0]
+    conversion_stats.clear()
+    construction_stats.clear()
+
+
+def called_methods():
+    """
+    Return a list of tuples (class name, method name, calls, seconds,
+    allocated blocks) of all methods that have been called, with the
+    most expensive (in terms of time) first.
+    """
+    methods = [(cls_name, method_name, calls, seconds, blocks)
+               for (cls_name, method_name), (calls, seconds, blocks)
+               in method_stats.items()
+               if calls > 0]
+    methods.sort(key=lambda method: method[3], reverse=True)
+    return methods
+
+
+def render(limit=None):
+    """Render the profile as a human-readable table. Show at most "limit" methods."""
+    lines = ['{:<20} {:<24} {:>10} {:>12} {:>12} {:>12}'.format(
+        'class', 'method', 'calls', 'seconds', 'us/call', 'blocks')]
+    for cls_name, method_name, calls, seconds, blocks in called_methods()[:limit]:
+        lines.append('{:<20} {:<24} {:>10} {:>12.6f} {:>12.3f} {:>12}'.format(
+            cls_name, method_name, calls, seconds, seconds / calls * 1e6, blocks))
+    lines.append('')
+    lines.append('{:<20} {:>10}'.format('converted type', 'count'))
+    for type_name, count in sorted(conversion_stats.items(), key=lambda item: -item[1]):
+        lines.append('{:<20} {:>10}'.format(type_name, count))
+    lines.append('')
+    lines.append('{:<20} {:>10}'.format('constructed class', 'count'))
+    for cls_name, count in sorted(construction_stats.items(), key=lambda item: -item[1]):
+        lines.append('{:<20} {:>10}'.format(cls_name, count))
+    return '\n'.join(lines)
+
+
+def dump(file=None):
+    """Write the profile to file (defaults to stderr)."""
+    if file is None:
+        file = sys.stderr
+    print(render(), file=file, flush=True)
+
+
+def install_signal_handler(loop, signum=signal.SIGUSR2):
+    """Dump the profile whenever the process receives signal "signum"."""
+    loop.add_signal_handler(signum, dump)
+
+
+def remove_signal_handler(loop, signum=signal.SIGUSR2):
+    loop.remove_signal_handler(signum)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,159 @@
+"""
+A registry of tainted Splice objects, indexed by taint bit.
+
+Deletion used to walk the entire heap (gc.get_objects()) and check every
+object for its taint. Instead, every Splice object registers itself here
+whenever its taints are set, so that deletion only needs to visit the
+objects that carry a specific taint.
+
+Objects are referenced weakly (and indexed by id, since equal objects are
+distinct entries), so the registry does not keep any object alive. Some
+built-in types (e.g., int and bytes) do not support weak references, not
+even when subclassed. Splice subclasses of those types are registered by
+id instead and unregister themselves in __del__ (see
+track_finalization()), so an id in the registry always refers to a live
+object.
+
+Note that an object stays registered under a taint bit even if its taints
+change later on. Lookups therefore check the object's current taints.
+"""
+import contextlib
+import ctypes
+import gc
+import weakref
+
+# Taint bit position -> id -> weakly referenced objects carrying that bit
+_objects = {}
+# Taint bit position -> ids of objects (that cannot be referenced weakly)
+# carrying that bit
+_object_ids = {}
+# Object id -> taint bits the object has been registered under
+_registered_ids = {}
+
+
+def _bit_positions(taints):
+    """Yield the positions of all set bits of a taint."""
+    while taints:
+        lowest = taints & -taints
+        yield lowest.bit_length() - 1
+        taints ^= lowest
+
+
+def register(obj, taints):
+    """
+    Register a Splice object under all bits of its taints. Objects without
+    taints (or with taints that are not an integer) are ignored.
+    """
+    if not taints or not isinstance(taints, int):
+        return
+    if type(obj).__weakrefoffset__:
+        for position in _bit_positions(taints):
+            objects = _objects.get(position)
+            if objects is None:
+                objects = _objects[position] = weakref.WeakValueDictionary()
+            objects[id(obj)] = obj
+    else:
+        obj_id = id(obj)
+        registered = _registered_ids.get(obj_id, 0)
+        for position in _bit_positions(taints & ~registered):
+            _object_ids.setdefault(position, set()).add(obj_id)
+        _registered_ids[obj_id] = registered | taints
+
+
+def unregister(obj):
+    """
+    Remove an object that cannot be referenced weakly from the registry.
+    Must be called before the object is deallocated.
+    """
+    obj_id = id(obj)
+    registered = _registered_ids.pop(obj_id, 0)
+    for position in _bit_positions(registered):
+        _object_ids[position].discard(obj_id)
+
+
+def track_finalization(cls):
+    """
+    Make instances of a Splice class unregister themselves when they are
+    finalized in case they cannot be referenced weakly. An existing __del__
+    of the class is still called afterwards.
+    """
+    if cls.__weakrefoffset__:
+        return cls
+    finalizer = getattr(cls, '__del__', None)
+    if getattr(finalizer, 'unregisters', False):
+        return cls
+
+    def __del__(self):
+        unregister(self)
+        if finalizer is not None:
+            finalizer(self)
+    __del__.unregisters = True
+    cls.__del__ = __del__
+    return cls
+
+
+@contextlib.contextmanager
+def _gc_disabled():
+    """
+    Disable the garbage collector temporarily. A collection (triggered by any
+    allocation) could finalize an object after its id has been taken from the
+    registry, so ids must be turned into objects while it is disabled.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def tainted_objects(taint):
+    """
+    Return a list of all live Splice objects whose taints are exactly
+    "taint". The list is a snapshot, so it is safe to modify the objects'
+    taints (or replace the objects) while iterating over it.
+    """
+    if not taint:
+        return []
+    # Any bit of the taint is sufficient to find all candidates, use the lowest
+    position = next(_bit_positions(taint))
+    candidates = list(_objects.get(position, {}).values())
+    # The ids are valid as long as they are in the registry (see unregister())
+    with _gc_disabled():
+        candidates.extend(ctypes.cast(obj_id, ctypes.py_object).value
+                          for obj_id in list(_object_ids.get(position, ())))
+    return [obj for obj in candidates if obj.taints == taint]
+
+
+def tainted_objects_in(taints):
+    """
+    Like tainted_objects() but for multiple taints at once: Return a list of
+    all live Splice objects whose taints are exactly one of "taints". Each
+    candidate is visited once, even if it has been registered under the bits
+    of multiple taints.
+    """
+    taints = frozenset(taint for taint in taints if taint)
+    if len(taints) == 1:
+        return tainted_objects(next(iter(taints)))
+    candidates = {}
+    positions = {next(_bit_positions(taint)) for taint in taints}
+    for position in positions:
+        for obj in list(_objects.get(position, {}).values()):
+            candidates[id(obj)] = obj
+    with _gc_disabled():
+        for position in positions:
+            for obj_id in list(_object_ids.get(position, ())):
+                if obj_id not in candidates:
+                    candidates[obj_id] = ctypes.cast(obj_id, ctypes.py_object).value
+    return [obj for obj in candidates.values() if obj.taints in taints]
+
+
+def size():
+    """Return the number of (object, taint bit) entries in the registry."""
+    return sum(len(objects) for objects in _objects.values()) + \
+        sum(len(ids) for ids in _object_ids.values())
+
+
+if __name__ == "__main__":
+    pass
@@ -162,6 +162,19 @@ def replace(new, paths):
             continue
         func(path.src.theone, relation.r, new)
 
+
+def replace_batch(replacements):
+    """
+    Replace each old object with its new object for a list of (old, new)
+    pairs. The referrer paths of all old objects are computed with a single
+    heap walk (see get_path_map()) before any of them is rewritten.
+    """
+    if not replacements:
+        return
+    path_map = get_path_map([old for old, _ in replacements])
+    for old, new in replacements:
+        replace(new, path_map.get(id(old), []))
+
 # !!!SPLICE =+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
 # This is a different implementation where each 'old' object is replaced by the 'new'
 # object. It will call hp.iso().pathsin every time an object needs to be replaced, which
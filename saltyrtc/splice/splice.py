@@ -1,9 +1,22 @@
 import functools
+import os
 import warnings
 import copy
 
-from .utils import is_class_method, is_static_method
+from .utils import is_class_method, is_static_method, positional_arity
 from .identity import TaintSource, empty_taint
+from . import profiler
+from . import registry
+
+# Constraints of all Splice objects that have no constraints (shared, immutable)
+EMPTY_CONSTRAINTS = ()
+# Layout of the packed metadata of a Splice object (see SpliceMixin)
+_UNTRUSTED = 1
+_SYNTHESIZED = 2
+_FLAGS = _UNTRUSTED | _SYNTHESIZED
+_TAINTS_SHIFT = 2
+# __slots__ of Splice classes whose base type supports non-empty __slots__
+SPLICE_SLOTS = ('_meta', '_constraints', '__weakref__')
 
 
 # Special methods that should not be decorated.
@@ -275,6 +288,39 @@ def is_tainted_by(obj, depth=2):
     return taints
 
 
+def _py_argument_tags(arg):
+    """
+    Return a tuple (untrusted, synthesized, taints) for a single argument.
+    This is equivalent to calling contains_untrusted_arguments() and
+    union_argument_taints() with arg only, but cheaper for Splice objects.
+    """
+    if isinstance(arg, SpliceMixin):
+        synthesized = arg.synthesized
+        return synthesized or not arg.trusted, synthesized, arg.taints
+    trusted, synthesized = check_tag(arg, check_synthesis=True)
+    return synthesized or not trusted, synthesized, is_tainted_by(arg)
+
+
+def _py_arguments_tags(args, kwargs=None):
+    """
+    Return a tuple (untrusted, synthesized, taints) for all arguments (a tuple
+    args and a dict kwargs), i.e., the combined argument_tags() of each argument.
+    """
+    untrusted, synthesized, taints = False, False, empty_taint()
+    for arg in args:
+        arg_untrusted, arg_synthesized, arg_taints = _py_argument_tags(arg)
+        untrusted = untrusted or arg_untrusted
+        synthesized = synthesized or arg_synthesized
+        taints |= arg_taints
+    if kwargs:
+        for arg in kwargs.values():
+            arg_untrusted, arg_synthesized, arg_taints = _py_argument_tags(arg)
+            untrusted = untrusted or arg_untrusted
+            synthesized = synthesized or arg_synthesized
+            taints |= arg_taints
+    return untrusted, synthesized, taints
+
+
 def union_argument_taints(*args, **kwargs):
     """
     Return a union of all taints associated with args and kwargs. Note that the return object
@@ -387,6 +433,8 @@ class MetaSplice(type):
         # do not want to decorate __new__ because deepcopy()
         # which is used in the decorator calls __new__. As
         # such, we would create an infinite recursion!
+        if profiler.enabled:
+            profiler.record_construction(cls)
         obj = cls.__new__(cls, *args, **kwargs)
         untrusted, synthesized = contains_untrusted_arguments(*args, **kwargs)
         obj = SpliceMixin.to_splice(obj, not untrusted, synthesized, empty_taint(), [])
@@ -451,9 +499,9 @@ class MetaSplice(type):
             if not trusted:
                 # Regardless of what the original flag was,
                 # we can always overwrite it with untrusted
-                obj._trusted = trusted
+                obj.trusted = trusted
             else:
-                if not obj._trusted:
+                if not obj.trusted:
                     # We have previously determined that the
                     # object should not be trusted, overwrite
                     # an untrusted object with a trusted flag
@@ -463,19 +511,20 @@ class MetaSplice(type):
         # Similar treatment for the synthesized flag.
         if synthesized is not None:
             if synthesized:
-                obj._synthesized = synthesized
+                obj.synthesized = synthesized
             else:
-                if obj._synthesized:
+                if obj.synthesized:
                     raise AttributeError("Splice has determined that the object is synthesized,"
                                          " but you are trying to manually set the flag otherwise.")
         # Final check to make sure flag values make sense
-        if obj._trusted and obj._synthesized:
+        if obj.trusted and obj.synthesized:
             raise AttributeError("Cannot initialize a trusted and synthesized object.")
-        # Object taint update
-        obj._taints = union_argument_taints(*args, **kwargs)
+        # Object taint update (the setter registers the object)
+        obj_taints = union_argument_taints(*args, **kwargs)
         if taints is not None:
-            obj._taints |= taints
-        obj._constraints = constraints
+            obj_taints |= taints
+        obj.taints = obj_taints
+        obj._constraints = tuple(constraints) if constraints else EMPTY_CONSTRAINTS
         return obj
 
 
@@ -486,10 +535,28 @@ class SpliceMixin(metaclass=MetaSplice):
 
     Important note: for __init_subclass__'s to_splice_cls() to work
     SpliceMixin must used as the *first* parent class in a subclass.
+
+    The flags and taints of an object are packed into a single int "_meta"
+    (taints << 2 | synthesized << 1 | untrusted), which is 0 (a cached small
+    int) for a trusted, non-synthesized object without taints. Constraints
+    are stored as a tuple and all objects without constraints share
+    EMPTY_CONSTRAINTS. Subclasses of a type that supports non-empty __slots__
+    (e.g., not int or bytes) should use SPLICE_SLOTS as their __slots__, so
+    that their objects do not need a __dict__.
+
+    Subclasses of immutable types set "immutable" to True (see below). Note
+    that it is inherited: A user-defined subclass of, e.g., SpliceStr must
+    set it to False if its own methods modify "self" in place.
     """
+    __slots__ = ()
 
     registered_cls = {}
 
+    # Subclasses of immutable (e.g., built-in) types should set this to True.
+    # Their methods can never modify "self" in place, so to_splice_cls()
+    # does not check (by copying and comparing "self") if they do.
+    immutable = False
+
     def __new__(cls, *args, trusted=True, synthesized=False, taints=None, constraints=[], **kwargs):
         """
         We must override __new__ so that "trusted" and "synthesized"
@@ -506,6 +573,8 @@ class SpliceMixin(metaclass=MetaSplice):
             self = super().__new__(cls)
         else:
             self = super().__new__(cls, *args, **kwargs)
+        self._meta = 0
+        self._constraints = EMPTY_CONSTRAINTS
         return self
 
     def __init_subclass__(cls, **kwargs):
@@ -519,6 +588,29 @@ class SpliceMixin(metaclass=MetaSplice):
         """
         SpliceMixin.to_splice_cls(cls)
         SpliceMixin.register(cls)
+        registry.track_finalization(cls)
+
+    def __setstate__(self, state):
+        """
+        Restore the state of a copied (copy(), deepcopy()) or unpickled object. Its
+        packed "_meta" is restored without going through the taints setter, so the
+        object must be added to the registry here.
+        """
+        setstate = getattr(super(), '__setstate__', None)
+        if setstate is not None:
+            setstate(state)
+        else:
+            # Default behaviour (see copy._reconstruct())
+            if isinstance(state, tuple) and len(state) == 2:
+                state, slotstate = state
+            else:
+                slotstate = None
+            if state:
+                self.__dict__.update(state)
+            if slotstate:
+                for key, value in slotstate.items():
+                    setattr(self, key, value)
+        registry.register(self, self.taints)
 
     # def __str__(self):
     #     if not self.trusted:
@@ -576,6 +668,8 @@ class SpliceMixin(metaclass=MetaSplice):
 
         "Taints" are handled similarly.
         """
+        if profiler.enabled:
+            profiler.record_conversion(value)
         # If value is already a splice-aware type
         if isinstance(value, SpliceMixin):
             value.trusted = trusted
@@ -652,57 +746,114 @@ class SpliceMixin(metaclass=MetaSplice):
         will be decorated (and therefore the calling special method).
         """
 
+        def update_self(self, untrusted, synthesized, taints):
+            """Propagate the flags and taints of all arguments to a modified "self"."""
+            # "self" should be splice-aware
+            # FIXME: This may not be true for user-defined classes
+            if not isinstance(self, SpliceMixin):
+                raise RuntimeError("{} is not Splice-aware.".format(self))
+            # See if "self" should be an untrusted and/or synthesized object.
+            if untrusted:
+                self.trusted = False
+            if synthesized:
+                self.synthesized = True
+            # Update "self"'s taints
+            if self.taints is None:
+                self.taints = taints
+            else:
+                self.taints |= taints
+
         def to_splice_method(func):
             """
             A function decorator that makes the original function (that
             may not be trust-aware) return (un)trusted value(s) if possible.
+
+            Whether the first argument is "self" is determined once here
+            (not on every call). Methods that take "self" and one or two
+            positional-only arguments (e.g., most methods of built-in types
+            such as __getitem__ or __lt__) get a specialized wrapper that
+            avoids packing and inspecting *args and **kwargs.
             """
+            # Check if the first argument is "self". This is not the case
+            # for a static method or a class method (including class methods
+            # of built-in types, which are bound to the class already).
+            has_self = not is_static_method(cls, func.__name__) \
+                and not is_class_method(cls, func.__name__) \
+                and not isinstance(getattr(func, '__self__', None), type)
+            arity = positional_arity(func) if has_self else None
+            # Only methods of mutable types may modify "self" in place
+            check_self = has_self and not cls.immutable
+
+            # TODO: does it *always* make sense to consider the return value/self
+            #  untrusted/synthesized/tainted as long as any one of the input is?
+            if arity == 1:
+                @functools.wraps(func)
+                def unary_wrapper(self):
+                    untrusted, synthesized, taints = argument_tags(self)
+                    if not check_self:
+                        res = func(self)
+                    else:
+                        self_copy = copy.copy(self)
+                        res = func(self)
+                        if self_copy != self:
+                            update_self(self, untrusted, synthesized, taints)
+                    if res is None or res is NotImplemented or isinstance(res, SpliceMixin):
+                        return res
+                    return SpliceMixin.to_splice(res, not untrusted, synthesized, taints, [])
+
+                return unary_wrapper
+
+            if arity == 2:
+                @functools.wraps(func)
+                def binary_wrapper(self, other):
+                    untrusted, synthesized, taints = argument_tags(self)
+                    other_untrusted, other_synthesized, other_taints = argument_tags(other)
+                    untrusted = untrusted or other_untrusted
+                    synthesized = synthesized or other_synthesized
+                    taints = taints | other_taints
+                    if not check_self:
+                        res = func(self, other)
+                    else:
+                        self_copy = copy.copy(self)
+                        res = func(self, other)
+                        if self_copy != self:
+                            update_self(self, untrusted, synthesized, taints)
+                    if res is None or res is NotImplemented or isinstance(res, SpliceMixin):
+                        return res
+                    return SpliceMixin.to_splice(res, not untrusted, synthesized, taints, [])
+
+                return binary_wrapper
 
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
                 # Calling inherited methods (including built-in methods) - IMPORTANT NOTE:
                 # res usually return objects of original (including built-in) type(s), but
                 # it is possible that res returns objects of Splice-managed types already.
-
-                # TODO: does it *always* make sense to consider the return value/self
-                #  untrusted/synthesized/tainted as long as any one of the input is?
-                untrusted, synthesized = contains_untrusted_arguments(*args, **kwargs)
-                taints = union_argument_taints(*args, **kwargs)
+                untrusted, synthesized, taints = arguments_tags(args, kwargs)
                 # Check if "self" (i.e., the first argument) is modified
                 # Note that this check applies only to methods that are
                 # not a class method or a static method, because otherwise
-                # the first argument is not "self"!
-                is_static = is_static_method(cls, func.__name__)
-                is_class = is_class_method(cls, func.__name__)
-                # We must use deep copy so that it actually holds a copy
-                # of the original "self", not just a reference. This is
-                # important for mutable objects.
-                # TODO: Since Splice objects are all built-in primitive types,
-                #  we probably need only shallow copy.
-                # TODO: Test that shallow copy is sufficient.
-                # self = copy.deepcopy(args[0])
-                self = copy.copy(args[0])
-                # Execution the original method
-                res = func(*args, **kwargs)
-                # If in-place updates occurred in func, then the object
-                # referenced by args[0] will be different from the
-                # original copy. Note that for immutable objects, this
-                # should never be the case!
-                if not is_static and not is_class and self != args[0]:
-                    # "self" should be splice-aware
-                    # FIXME: This may not be true for user-defined classes
-                    if not isinstance(args[0], SpliceMixin):
-                        raise RuntimeError("{} is not Splice-aware.".format(args[0]))
-                    # See if "self" should be an untrusted and/or synthesized object.
-                    if untrusted:
-                        args[0].trusted = False
-                    if synthesized:
-                        args[0].synthesized = True
-                    # Update "self"'s taints
-                    if args[0].taints is None:
-                        args[0].taints = taints
-                    else:
-                        args[0].taints |= taints
+                # the first argument is not "self"! Methods of immutable
+                # types never modify "self", so we skip the check for them.
+                if not check_self:
+                    res = func(*args, **kwargs)
+                else:
+                    # We must use deep copy so that it actually holds a copy
+                    # of the original "self", not just a reference. This is
+                    # important for mutable objects.
+                    # TODO: Since Splice objects are all built-in primitive types,
+                    #  we probably need only shallow copy.
+                    # TODO: Test that shallow copy is sufficient.
+                    # self = copy.deepcopy(args[0])
+                    self = copy.copy(args[0])
+                    # Execution the original method
+                    res = func(*args, **kwargs)
+                    # If in-place updates occurred in func, then the object
+                    # referenced by args[0] will be different from the
+                    # original copy. Note that for immutable objects, this
+                    # should never be the case!
+                    if self != args[0]:
+                        update_self(args[0], untrusted, synthesized, taints)
                 # Some quick return (nothing else to do)
                 if res is None or res is NotImplemented or isinstance(res, SpliceMixin):
                     return res
@@ -710,6 +861,13 @@ class SpliceMixin(metaclass=MetaSplice):
 
             return wrapper
 
+        def decorate(func):
+            """Decorate func with to_splice_method() (and profile it if enabled)."""
+            wrapper = to_splice_method(func)
+            if profiler.enabled:
+                wrapper = profiler.profile_method(cls.__name__, func.__name__, wrapper)
+            return wrapper
+
         # set of callable method names already been decorated/inspected
         handled_methods = set()
         # First handle all methods in cls class
@@ -729,7 +887,7 @@ class SpliceMixin(metaclass=MetaSplice):
             handled_methods.add(key)
             # Decorate only 'splice_' or '_splice_' prefixed methods in cls.
             if key.startswith("splice_") or key.startswith("_splice_"):
-                setattr(cls, key, to_splice_method(value))
+                setattr(cls, key, decorate(value))
         # Handle base class methods if exists. Base classes are
         # unlikely to follow our synthesis naming convention.
         # However, some special methods clearly should *not* be
@@ -779,7 +937,7 @@ class SpliceMixin(metaclass=MetaSplice):
                 # cls will always call the decorated methods (since they
                 # will be placed at the front of the MRO), not the ones
                 # in any of the base classes!
-                setattr(cls, key, to_splice_method(value))
+                setattr(cls, key, decorate(value))
         # NOTE: The new MRO after decoration (when called from SpliceX) --
         # 1. Original cls (SpliceX) methods (decorated and non-decorated) and
         #    all decorated methods.
@@ -812,30 +970,40 @@ class SpliceMixin(metaclass=MetaSplice):
 
     @property
     def synthesized(self):
-        return self._synthesized
+        return bool(self._meta & _SYNTHESIZED)
 
     @synthesized.setter
     def synthesized(self, synthesized):
-        self._synthesized = synthesized
+        if synthesized:
+            self._meta |= _SYNTHESIZED
+        else:
+            self._meta &= ~_SYNTHESIZED
 
     @property
     def trusted(self):
-        return self._trusted
+        return not self._meta & _UNTRUSTED
 
     @trusted.setter
     def trusted(self, trusted):
-        self._trusted = trusted
+        if trusted:
+            self._meta &= ~_UNTRUSTED
+        else:
+            self._meta |= _UNTRUSTED
 
     @property
     def taints(self):
-        return self._taints
+        return self._meta >> _TAINTS_SHIFT
 
     @taints.setter
     def taints(self, taints):
-        self._taints = taints
+        if taints is None:
+            taints = empty_taint()
+        self._meta = taints << _TAINTS_SHIFT | self._meta & _FLAGS
+        registry.register(self, taints)
 
     @property
     def constraints(self):
+        """A tuple of constraint callbacks (see MetaSplice.__call__())."""
         return self._constraints
 
     @constraints.setter
@@ -844,14 +1012,14 @@ class SpliceMixin(metaclass=MetaSplice):
         # TODO: Retire this special case in future work.
         #  User should use the more explicit
         #  clear_constraints() method instead.
-        if constraints == []:
-            self._constraints = []
+        if constraints == [] or constraints is EMPTY_CONSTRAINTS:
+            self._constraints = EMPTY_CONSTRAINTS
             return
         # +=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+=+
         if not constraints:
             pass
         elif callable(constraints):
-            self._constraints.append(constraints)
+            self._constraints += (constraints,)
         else:
             # A set of callback functions can be provided.
             try:
@@ -862,7 +1030,7 @@ class SpliceMixin(metaclass=MetaSplice):
                                 "of callables that return maps of concrete constraints.")
             for c in cb_iterator:
                 if callable(c):
-                    self._constraints.append(c)
+                    self._constraints += (c,)
                 else:
                     raise TypeError("Each constraint must be a callable that returns a map"
                                     "of concrete constraints for Z3 to synthesize.")
@@ -872,7 +1040,7 @@ class SpliceMixin(metaclass=MetaSplice):
         Properly remove all constraints associated with a Splice object.
         Notice that the setter cannot clear constraints by itself.
         """
-        self._constraints = []
+        self._constraints = EMPTY_CONSTRAINTS
 
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
@@ -921,3 +1089,20 @@ class SpliceAttrMixin(object):
     @taints.setter
     def taints(self, taints):
         self._taints = taints
+        registry.register(self, taints)
+
+
+# Use the compiled argument tag helpers (see _speedups.c) if they have been
+# built, unless disabled by setting SALTYRTC_SPLICE_SPEEDUPS to 'no'. The
+# wrappers of decorated methods look them up on each call.
+_speedups = None
+if os.environ.get('SALTYRTC_SPLICE_SPEEDUPS', 'yes') != 'no':
+    try:
+        from . import _speedups
+    except ImportError:
+        _speedups = None
+    else:
+        _speedups.init(SpliceMixin, _py_argument_tags)
+speedups = _speedups is not None
+argument_tags = _speedups.argument_tags if speedups else _py_argument_tags
+arguments_tags = _speedups.arguments_tags if speedups else _py_arguments_tags
@@ -11,7 +11,7 @@ from datetime import datetime, date, time, timedelta
 from collections import UserString
 from contextlib import contextmanager
 
-from saltyrtc.splice.splice import SpliceMixin, SpliceAttrMixin
+from saltyrtc.splice.splice import SpliceMixin, SpliceAttrMixin, SPLICE_SLOTS
 from saltyrtc.splice.identity import empty_taint, taint_id_from_addr
 
 
@@ -21,6 +21,8 @@ class SpliceInt(SpliceMixin, int):
     Note that "trusted" and "synthesized" are *keyed*
     parameters. Construct a trusted int value by default.
     """
+    immutable = True
+
     @staticmethod
     def default_hash(input_integer):
         """
@@ -64,6 +66,9 @@ class SpliceInt(SpliceMixin, int):
 
 class SpliceFloat(SpliceMixin, float):
     """Subclass Python trusted float class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
+
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
         return cls(value, trusted=trusted, synthesized=synthesized, taints=taints, constraints=constraints)
@@ -74,6 +79,9 @@ class SpliceFloat(SpliceMixin, float):
 
 class SpliceStr(SpliceMixin, str):
     """Subclass Python trusted str class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
+
     @staticmethod
     def default_hash(input_bytes):
         """
@@ -137,6 +145,8 @@ class SpliceStr(SpliceMixin, str):
 
 class SpliceBytes(SpliceMixin, bytes):
     """Subclass Python builtin bytes class and SpliceMixin."""
+    immutable = True
+
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
         return SpliceBytes(value, trusted=trusted, synthesized=synthesized, taints=taints, constraints=constraints)
@@ -152,6 +162,8 @@ class SpliceBytes(SpliceMixin, bytes):
 
 class SpliceBytearray(SpliceMixin, bytearray):
     """Subclass Python builtin bytearray class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
         return SpliceBytearray(value, trusted=trusted, synthesized=synthesized, taints=taints, constraints=constraints)
@@ -167,6 +179,9 @@ class SpliceBytearray(SpliceMixin, bytearray):
 
 class SpliceDecimal(SpliceMixin, Decimal):
     """Subclass Python decimal module's Decimal class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
+
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
         return SpliceDecimal(value, trusted=trusted, synthesized=synthesized, taints=taints, constraints=constraints)
@@ -181,6 +196,8 @@ class SpliceDatetime(SpliceMixin, datetime):
     This is an example to showcase it's easy to create a splice-aware
     class from an existing Python class.
     """
+    __slots__ = SPLICE_SLOTS
+    immutable = True
 
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
@@ -211,6 +228,8 @@ class SpliceDatetime(SpliceMixin, datetime):
 
 class SpliceDate(SpliceMixin, date):
     """Subclass Python datetime module's data class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
 
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
@@ -231,6 +250,8 @@ class SpliceDate(SpliceMixin, date):
 
 class SpliceTime(SpliceMixin, time):
     """Subclass Python datetime module's time class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
 
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
@@ -258,6 +279,8 @@ class SpliceTime(SpliceMixin, time):
 
 class SpliceTimedelta(SpliceMixin, timedelta):
     """Subclass Python datetime module's time class and SpliceMixin."""
+    __slots__ = SPLICE_SLOTS
+    immutable = True
 
     @classmethod
     def splicify(cls, value, trusted, synthesized, taints, constraints):
@@ -289,14 +312,14 @@ class SpliceUserString(UserString):
             self.synthesized = seq.synthesized
             self.trusted = seq.trusted
             self.data = seq.data[:]
-            self._constraints = seq.constraints
+            self._constraints = list(seq.constraints)
         else:
             self.data = str(seq)
             if isinstance(seq, SpliceMixin):
                 self.taints = [seq.taints] * len(self.data)
                 self.synthesized = [seq.synthesized] * len(self.data)
                 self.trusted = [seq.trusted] * len(self.data)
-                self._constraints = seq.constraints
+                self._constraints = list(seq.constraints)
                 self.data = self.data.unsplicify()
             else:
                 self.taints = [empty_taint()] * len(self.data)
@@ -436,7 +459,7 @@ class SpliceSocket(socket.socket, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
 
@@ -529,7 +552,7 @@ class SpliceFileIO(io.FileIO, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
         self.name = SpliceMixin.to_splice(name, taints=self.taints, synthesized=self.synthesized,
@@ -568,7 +591,7 @@ class SpliceBufferedReader(io.BufferedReader, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
         # The name attribute should inherit taints and flags from the BufferedReader object
@@ -621,7 +644,7 @@ class SpliceBufferedWriter(io.BufferedWriter, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
         # The name attribute should inherit taints and flags from the SpliceBufferedWriter object
@@ -695,7 +718,7 @@ class SplicePopen(subprocess.Popen, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
         self.dp_fn = dp_fn
@@ -779,7 +802,7 @@ class SpliceTask(asyncio.Task, SpliceAttrMixin):
         if taints is None:
             self._taints = empty_taint()
         else:
-            self._taints = taints
+            self.taints = taints
         self._trusted = trusted
         self._synthesized = synthesized
 
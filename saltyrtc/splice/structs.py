@@ -2,17 +2,12 @@
 from abc import ABCMeta, abstractmethod
 
 from saltyrtc.splice.splice import is_synthesized, SpliceMixin, to_untrusted
-from arpeggio import ParserPython, visit_parse_tree
-from saltyrtc.splice.constraints import symbolic, SymbolicVisitor
+from saltyrtc.splice.constraints import compile_symbolic
 
 
 def concretize(obj, structure, constraints):
     """Used by attach_constraint() in lsm.py (see reasoning there)."""
-    parser = ParserPython(symbolic, debug=False)
-    parse_tree = parser.parse(constraints)
-    sv = SymbolicVisitor(obj, structure, dg=False)
-    visit_parse_tree(parse_tree, sv)
-    return sv.constraints
+    return compile_symbolic(constraints)(obj, structure, dg=False)
 
 
 class SpliceStructMixin(metaclass=ABCMeta):
@@ -31,17 +26,16 @@ class SpliceStructMixin(metaclass=ABCMeta):
         appropriate symbolic constraints and attached the returned function
         to the object. At deletion time, the return function will be called.
         """
-        # Parse the symbolic constraints provided by the developer
-        parser = ParserPython(symbolic, debug=False)
-        parse_tree = parser.parse(constraints)
+        # Compile the symbolic constraints provided by the developer (only
+        # once per distinct constraint string)
+        compiled = compile_symbolic(constraints)
 
         # The actual callback function to be attached to the Splice* object
         def concretize(obj, dg=False):
-            # Concrete constraints are generated by parsing the symbolic
-            # constraint and performing semantic analysis on the parsed tree.
-            sv = SymbolicVisitor(obj, self, dg)
-            visit_parse_tree(parse_tree, sv)
-            return sv.constraints
+            # Concrete constraints are generated by the compiled constraints,
+            # which perform the same semantic analysis as SymbolicVisitor does
+            # on the parsed tree.
+            return compiled(obj, self, dg)
 
         return concretize
 
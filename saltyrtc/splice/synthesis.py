@@ -11,6 +11,8 @@ from z3 import And, Or, If
 
 from datetime import datetime
 from abc import ABC, abstractmethod
+import math
+import random
 
 from saltyrtc.splice.splicetypes import SpliceMixin, SpliceInt, SpliceFloat, SpliceStr, SpliceDatetime, SpliceUserString, SpliceBytes
 from saltyrtc.splice.identity import empty_taint
@@ -72,6 +74,53 @@ def dependencies_from_constraints(constraints_list, taint):
     return objs
 
 
+# Pre-solver statistics (per process): constraint sets solved in closed form (hits)
+# and constraint sets that had to be passed to Z3 (misses). See presolve(). Synthesis
+# runs in the executor's worker processes, which report the counts of each chunk back
+# to the server (see _synthesize_chunk() in executor.py).
+presolve_stats = {'hits': 0, 'misses': 0}
+
+
+def _is_number(value):
+    """Return True for finite numbers (inf and nan are left to Z3)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) \
+        and math.isfinite(value)
+
+
+def _closed_form_interval(constraints, convert=None):
+    """
+    Return (lower, include_lower, upper, include_upper, excluded) for constraints
+    that only consist of numeric lt/le/gt/ge/ne constraints, where lower and
+    upper are None if unbounded and excluded is a set of 'ne' values. Return
+    None for constraints of any other shape. "convert" is applied to all
+    values before they are checked (e.g., to convert datetimes to floats).
+    """
+    if any(key not in ('lt', 'le', 'gt', 'ge', 'ne') for key in constraints):
+        return None
+    values = {}
+    for key, key_values in constraints.items():
+        if convert is not None:
+            key_values = [convert(value) for value in key_values]
+        if not all(_is_number(value) for value in key_values):
+            return None
+        values[key] = key_values
+    lower, include_lower, upper, include_upper = None, False, None, False
+    # The tightest bounds win (a strict bound wins on a tie)
+    for value in values.get('ge', ()):
+        if lower is None or value > lower:
+            lower, include_lower = value, True
+    for value in values.get('gt', ()):
+        if lower is None or value >= lower:
+            lower, include_lower = value, False
+    for value in values.get('le', ()):
+        if upper is None or value < upper:
+            upper, include_upper = value, True
+    for value in values.get('lt', ()):
+        if upper is None or value <= upper:
+            upper, include_upper = value, False
+    return lower, include_lower, upper, include_upper, set(values.get('ne', ()))
+
+
 class Synthesizer(ABC):
     """Synthesis base class."""
     def __init__(self, symbol):
@@ -275,11 +324,36 @@ class Synthesizer(ABC):
         if not constraints_list:
             return None
         for constraints in constraints_list:
-            synthesized_value = self._splice_synthesis(constraints)
+            if not constraints:
+                continue
+            # Most constraint sets have a trivial shape that can be solved directly
+            synthesized_value = self.presolve(constraints)
+            if synthesized_value is not None:
+                presolve_stats['hits'] += 1
+                return synthesized_value
+            presolve_stats['misses'] += 1
+            # Each set of conjunctive constraints is solved in its own scope, so
+            # that constraints of one set do not leak into the next one and the
+            # solver is left as it was (allowing the synthesizer to be reused).
+            self.solver.push()
+            try:
+                synthesized_value = self._splice_synthesis(constraints)
+            finally:
+                self.solver.pop()
             if synthesized_value is not None:
                 return synthesized_value
         return None
 
+    def presolve(self, constraints):
+        """
+        Rule-based pre-solver: Return a synthesized value for "constraints" (a
+        dictionary of conjunctive constraints) if they have a shape that can be
+        solved analytically. Otherwise, return None, in which case the constraints
+        are solved by Z3. Subclasses can override this function; by default,
+        everything is solved by Z3.
+        """
+        return None
+
     def _splice_synthesis(self, constraints):
         """
         "constraints" should be a dictionary of conjunctive value constraints.
@@ -384,6 +458,38 @@ class IntSynthesizer(Synthesizer):
     def __init__(self):
         super().__init__(Int('var'))
 
+    def presolve(self, constraints):
+        """Solve numeric bounds and not-equal-to constraints analytically."""
+        interval = _closed_form_interval(constraints)
+        if interval is None:
+            return None
+        lower, include_lower, upper, include_upper, excluded = interval
+        # Closed integer bounds
+        if lower is not None:
+            lower = math.ceil(lower) if include_lower else math.floor(lower) + 1
+        if upper is not None:
+            upper = math.floor(upper) if include_upper else math.ceil(upper) - 1
+        # Try values until one is not excluded (at most one more than excluded values)
+        tries = len(excluded) + 1
+        if lower is not None and upper is not None:
+            if lower > upper:
+                return None
+            size = upper - lower + 1
+            start = random.randint(lower, upper)
+            candidates = (lower + (start - lower + i) % size for i in range(min(tries, size)))
+        elif lower is not None:
+            candidates = (lower + i for i in range(tries))
+        elif upper is not None:
+            candidates = (upper - i for i in range(tries))
+        elif excluded:
+            candidates = [math.floor(max(excluded)) + 1]
+        else:
+            return None
+        for value in candidates:
+            if value not in excluded:
+                return self.simple_synthesis(value)
+        return None
+
     @staticmethod
     def to_python(value):
         if value is not None:
@@ -406,6 +512,45 @@ class FloatSynthesizer(Synthesizer):
     def __init__(self):
         super().__init__(Real('var'))
 
+    @staticmethod
+    def to_float(value):
+        """Convert a constraint value to float (see DatetimeSynthesizer)."""
+        return value
+
+    @staticmethod
+    def from_float(value):
+        """Convert a float to a synthesized value (see DatetimeSynthesizer)."""
+        return SpliceFloat(value, trusted=False, synthesized=True, taints=empty_taint())
+
+    def presolve(self, constraints):
+        """Solve numeric bounds and not-equal-to constraints analytically."""
+        interval = _closed_form_interval(constraints, convert=self.to_float)
+        if interval is None:
+            return None
+        lower, include_lower, upper, include_upper, excluded = interval
+
+        def satisfies(value):
+            if lower is not None and (value < lower or (value == lower and not include_lower)):
+                return False
+            if upper is not None and (value > upper or (value == upper and not include_upper)):
+                return False
+            return value not in excluded
+
+        if lower is not None and upper is not None:
+            candidates = [random.uniform(lower, upper), (lower + upper) / 2, lower, upper]
+        elif lower is not None:
+            candidates = [lower + 1.0, lower + abs(lower) / 2]
+        elif upper is not None:
+            candidates = [upper - 1.0, upper - abs(upper) / 2]
+        elif excluded:
+            candidates = [max(excluded) + 1.0]
+        else:
+            return None
+        for value in candidates:
+            if satisfies(value):
+                return self.from_float(float(value))
+        return None
+
     @staticmethod
     def to_python(value):
         if value is not None:
@@ -479,6 +624,40 @@ class StrSynthesizer(Synthesizer):
             charset = self.DEFAULT_ASCII_CHARS
         self._charset = charset                                             # String representation
         self._chars = Union([Re(StringVal(c)) for c in self._charset])      # Z3 union representation
+        self._byte_chars_cache = None                                       # See _byte_chars()
+
+    def presolve(self, constraints):
+        """
+        Solve a single constraint analytically if possible:
+        * gt(value): value followed by the smallest character is larger.
+        * lt(value): value without its last character is smaller.
+        * eq(func, value): if func provides its inverse as func.preimage
+          (e.g., SpliceDict.hash), the string is constructed directly.
+        """
+        if len(constraints) != 1:
+            return None
+        (key, values), = constraints.items()
+        if len(values) != 1:
+            return None
+        value = values[0]
+        if key == 'eq':
+            func, target = value
+            preimage = getattr(func, 'preimage', None)
+            if preimage is None or not isinstance(target, int):
+                return None
+            synthesized_str = preimage(target)
+        elif key == 'gt' and isinstance(value, str):
+            synthesized_str = value + self._charset[0]
+        elif key == 'lt' and isinstance(value, str) and value:
+            synthesized_str = value[:-1]
+        else:
+            return None
+        if synthesized_str is None:
+            return None
+        # Z3 would never synthesize a longer string
+        if len(synthesized_str) > self.DEFAULT_MAX_CHAR_LENGTH:
+            return None
+        return self.simple_synthesis(synthesized_str)
 
     @property
     def value(self):
@@ -694,23 +873,33 @@ class StrSynthesizer(Synthesizer):
         # Our synthesized string should match the template
         return template
 
-    def eq_constraint(self, func, value, **kwargs):
+    def _byte_chars(self):
         """
-        The synthesized string is represented by a list of bytes (integers of ASCII)
-        and the func used must take a list of integers as its first positional parameter.
+        Return the list of Z3 Int() variables that represent the bytes of the
+        synthesized string and the constraints that make them a well-formed
+        string. Both are created once per synthesizer and reused afterwards.
         """
-        # We use Z3's list comprehension to create a list of Z3 Int() variables
-        chars = [Int('x%s' % i) for i in range(self.DEFAULT_MAX_CHAR_LENGTH)]
-        for char in chars:
+        if self._byte_chars_cache is None:
+            # We use Z3's list comprehension to create a list of Z3 Int() variables
+            chars = [Int('x%s' % i) for i in range(self.DEFAULT_MAX_CHAR_LENGTH)]
             # 0 is the NULL character
             # 32 is the smallest printable ASCII value
             # 126 is the largest printable ASCII value
-            self.solver.add(Or(char == 0, And(char >= 32, char <= 126)))
-        # The character string must be well-formed, therefore, if
-        # a character is set to be NULL (0), then the character in
-        # front of it must be NULL as well.
-        for i in range(len(chars) - 1):
-            self.solver.add(If(chars[i+1] == 0, chars[i] == 0, True))
+            wellformed = [Or(char == 0, And(char >= 32, char <= 126)) for char in chars]
+            # The character string must be well-formed, therefore, if
+            # a character is set to be NULL (0), then the character in
+            # front of it must be NULL as well.
+            wellformed.extend(If(chars[i+1] == 0, chars[i] == 0, True) for i in range(len(chars) - 1))
+            self._byte_chars_cache = chars, wellformed
+        return self._byte_chars_cache
+
+    def eq_constraint(self, func, value, **kwargs):
+        """
+        The synthesized string is represented by a list of bytes (integers of ASCII)
+        and the func used must take a list of integers as its first positional parameter.
+        """
+        chars, wellformed = self._byte_chars()
+        self.solver.add(*wellformed)
         self.solver.add(func(chars, **kwargs) == value)
 
     def ne_constraint(self, value, **kwargs):
@@ -858,7 +1047,9 @@ class DatetimeSynthesizer(FloatSynthesizer):
     @staticmethod
     def to_float(value):
         """Convert value (a datetime object) to float."""
-        return value.timestamp()
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return value
 
     @staticmethod
     def to_python(value):
@@ -867,7 +1058,15 @@ class DatetimeSynthesizer(FloatSynthesizer):
         if value is not None:
             fraction_value = value.as_fraction()
             float_value = float(fraction_value.numerator) / float(fraction_value.denominator)
-            dt = datetime.fromtimestamp(float_value)
+            return DatetimeSynthesizer.from_float(float_value)
+        else:
+            return None
+
+    @staticmethod
+    def from_float(value):
+        """Convert a float (a timestamp) to an untrusted datetime value."""
+        if value is not None:
+            dt = datetime.fromtimestamp(value)
             # Reconstruct an UntrustedDatetime object from a datetime
             # object requires an indirection (you cannot just pass in
             # datetime value to UntrustedDatetime().
@@ -895,7 +1094,7 @@ class DatetimeSynthesizer(FloatSynthesizer):
     @staticmethod
     def simple_synthesis(value):
         if value is not None:
-            return DatetimeSynthesizer.to_python(DatetimeSynthesizer.to_float(value))
+            return DatetimeSynthesizer.from_float(DatetimeSynthesizer.to_float(value))
         else:
             return None
 
@@ -925,6 +1124,26 @@ def init_synthesizer(value, vectorized=False):
                                   "{type}. Consider vectorization.".format(type=type(value)))
 
 
+# (type, vectorized) -> synthesizer that is reused for all objects of the type
+_synthesizers = {}
+
+
+def get_synthesizer(v_type, vectorized=False):
+    """
+    Like init_synthesizer_on_type() but return a pooled synthesizer that is
+    created once per type (per process). Building a synthesizer (the solver, its
+    variable and, e.g., the character set of StrSynthesizer) is not free, while
+    splice_synthesis() leaves the solver unchanged, so synthesizers can be reused
+    for any number of objects. Pooled synthesizers must only be used through
+    splice_synthesis() and are not thread-safe (neither is Z3's default context).
+    """
+    key = (v_type, vectorized)
+    synthesizer = _synthesizers.get(key)
+    if synthesizer is None:
+        synthesizer = _synthesizers[key] = init_synthesizer_on_type(v_type, vectorized)
+    return synthesizer
+
+
 def init_synthesizer_on_type(v_type, vectorized=False):
     """
     Base on the given type, we determine which synthesizer to use.
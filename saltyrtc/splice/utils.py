@@ -49,3 +49,21 @@ def is_class_method(klass, method_name):
         if method_name in cls.__dict__:
             return isinstance(inspect.getattr_static(cls, method_name), classmethod)
     return False
+
+
+def positional_arity(func):
+    """
+    Return the number of arguments of func if it takes only required,
+    positional-only arguments (e.g., most methods of built-in types such as
+    int.__add__(self, value, /)). Otherwise (or if func has no signature
+    we can inspect), return None.
+    """
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    for parameter in parameters:
+        if parameter.kind is not inspect.Parameter.POSITIONAL_ONLY \
+                or parameter.default is not inspect.Parameter.empty:
+            return None
+    return len(parameters)
@@ -529,6 +529,10 @@ class WebSocketServerProtocol(WebSocketCommonProtocol):
         # Short-circuit if it is a Splice deletion request
         # In the Splice deletion request, request_headers
         # should contain 'Taints' header.
+        # Note: This is the legacy way of requesting deletion.
+        # Deletion requests to the deletion path of the server
+        # are handled by process_request() below and return
+        # the id and status of the deletion job right away.
         if path == 'SPLICE':
             if 'taints' in request_headers._dict:
                 return request_headers._dict
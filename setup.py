@@ -2,7 +2,11 @@ import ast
 import os
 import platform
 import sys
-from setuptools import setup
+from setuptools import (
+    Extension,
+    setup,
+)
+from setuptools.command.build_ext import build_ext
 
 
 def get_version():
@@ -20,6 +24,29 @@ def read(file):
     return open(os.path.join(os.path.dirname(__file__), file)).read().strip()
 
 
+class OptionalBuildExt(build_ext):
+    """
+    Build the optional Splice speedups. If they cannot be built (e.g. because
+    there is no compiler), the pure-Python implementation will be used.
+    """
+    def run(self):
+        try:
+            super().run()
+        except Exception as exc:
+            self._warn(exc)
+
+    def build_extension(self, ext):
+        try:
+            super().build_extension(ext)
+        except Exception as exc:
+            self._warn(exc)
+
+    @staticmethod
+    def _warn(exc):
+        print('WARNING: Could not build the Splice speedups, falling back to the '
+              'pure-Python implementation: {}'.format(exc), file=sys.stderr)
+
+
 # Allow setup.py to be run from any path
 os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 
@@ -44,6 +71,14 @@ else:
         'mypy==0.780',
     ]
 
+# Optional Splice speedups (C extension)
+if platform.python_implementation() == 'PyPy':
+    ext_modules = []
+else:
+    ext_modules = [
+        Extension('saltyrtc.splice._speedups', ['saltyrtc/splice/_speedups.c']),
+    ]
+
 # Test requirements
 # Note: These are just tools that aren't required, so a version range
 #       is not necessary here.
@@ -64,6 +99,8 @@ setup(
     version=get_version(),
     packages=['saltyrtc', 'saltyrtc.server', 'saltyrtc.splice'],
     package_data={'saltyrtc.server': ['py.typed']},
+    ext_modules=ext_modules,
+    cmdclass={'build_ext': OptionalBuildExt},
     install_requires=[
         'libnacl>=1.5.0,<2',
         'click>=6.7',  # doesn't seem to follow semantic versioning (see #57)
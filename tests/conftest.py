@@ -393,6 +393,21 @@ def log_handler(request):
     return log_handler
 
 
+@pytest.fixture
+def logging_enabled(request):
+    """
+    Enable logging for the *saltyrtc* logger group regardless of
+    whether a server has been created before.
+    """
+    disabled, level = util.logger_group.disabled, util.logger_group.level
+    util.enable_logging(level=logbook.DEBUG)
+
+    def fin():
+        util.logger_group.disabled = disabled
+        util.logger_group.level = level
+    request.addfinalizer(fin)
+
+
 @pytest.fixture
 def evaluate_log(log_handler):
     """
@@ -0,0 +1,39 @@
+import pytest
+import ssl
+
+from saltyrtc.server import bench
+
+
+@pytest.mark.usefixtures('evaluate_log')
+class TestBench:
+    def test_invalid_message_size(self):
+        with pytest.raises(ValueError):
+            bench.BenchConfig(message_size=4)
+
+    @pytest.mark.asyncio
+    async def test_run_pairs(self, event_loop, server, server_permanent_keys):
+        """
+        Ensure all pairs complete their handshakes and relay their
+        messages.
+        """
+        ssl_context = ssl.create_default_context(
+            ssl.Purpose.SERVER_AUTH, cafile=pytest.saltyrtc.cert)
+        ssl_context.load_dh_params(pytest.saltyrtc.dh_params)
+        config = bench.BenchConfig(
+            pairs=4, handshake_rate=100.0, messages=10, message_size=64,
+            message_rate=1000.0, timeout=10.0)
+        stats = await bench.run_pairs(
+            'wss://{}:{}'.format(*server.address), server_permanent_keys[0].pk,
+            config, loop=event_loop, ssl_context=ssl_context)
+        assert stats.errors == 0
+        assert stats.handshakes == 8
+        assert stats.messages == 40
+        assert stats.bytes == 40 * (64 + 24)
+        assert stats.relay_latency.count == 40
+
+        results = stats.to_dict()
+        assert results['messages_per_second'] > 0
+        assert 0 <= results['relay_latency']['p50'] <= results['relay_latency']['max']
+
+        # Bye
+        await server.wait_connections_closed()
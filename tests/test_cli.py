@@ -183,6 +183,19 @@ class TestCLI:
             )
         assert 'invalid choice' in exc_info.value.output
 
+    @pytest.mark.asyncio
+    async def test_serve_invalid_relay_window(self, cli):
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            await cli(
+                'serve',
+                '-tc', pytest.saltyrtc.cert,
+                '-tk', pytest.saltyrtc.key,
+                '-k', pytest.saltyrtc.permanent_key_primary,
+                '-p', '8443',
+                '-rw', '0',
+            )
+        assert '--relay-window' in exc_info.value.output
+
     @pytest.saltyrtc.no_uvloop
     @pytest.mark.asyncio
     async def test_serve_uvloop_unavailable(self, cli):
@@ -330,6 +343,52 @@ class TestCLI:
         )
         assert 'Stopped' in output
 
+    @pytest.mark.asyncio
+    async def test_serve_workers_tls(self, cli):
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            await cli(
+                'serve',
+                '-tc', pytest.saltyrtc.cert,
+                '-tk', pytest.saltyrtc.key,
+                '-k', pytest.saltyrtc.permanent_key_primary,
+                '-p', '8443',
+                '-w', '2',
+            )
+        assert 'TLS is not supported with more than one worker' in exc_info.value.output
+
+    @pytest.mark.asyncio
+    async def test_serve_workers_splice(self, cli):
+        env = os.environ.copy()
+        env['SALTYRTC_SAFETY_OFF'] = 'yes-and-i-know-what-im-doing'
+        env['SALTYRTC_SPLICE'] = 'yes'
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            await cli(
+                'serve',
+                '-k', pytest.saltyrtc.permanent_key_primary,
+                '-p', '8443',
+                '-w', '2',
+                env=env,
+            )
+        assert ('Splice is not supported with more than one '
+                'worker') in exc_info.value.output
+
+    @pytest.mark.asyncio
+    async def test_serve_workers(self, cli):
+        env = os.environ.copy()
+        env['SALTYRTC_SAFETY_OFF'] = 'yes-and-i-know-what-im-doing'
+        env['SALTYRTC_SPLICE'] = 'no'
+        output = await cli(
+            'serve',
+            '-k', pytest.saltyrtc.permanent_key_primary,
+            '-p', '8443',
+            '-w', '2',
+            signal=signal.SIGINT,
+            env=env,
+        )
+        assert output.count('started') == 2
+        assert output.count('stopped') == 2
+        assert 'Stopped' in output
+
     @pytest.mark.asyncio
     async def test_serve_repeated_key(self, cli):
         primary_key = open(pytest.saltyrtc.permanent_key_primary, 'r').read()
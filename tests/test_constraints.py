@@ -0,0 +1,95 @@
+"""
+The compiled symbolic constraints must produce the same concrete
+constraints as the reference implementation (:class:`SymbolicVisitor`).
+"""
+import itertools
+import pytest
+from arpeggio import visit_parse_tree
+
+from saltyrtc.splice.constraints import (
+    SymbolicVisitor,
+    compile_symbolic,
+    parse_symbolic,
+)
+
+
+class _Struct:
+    """
+    A data structure that provides the operations and functions used by
+    the constraint strings below.
+    """
+    def __init__(self, prev, next_):
+        self._prev = prev
+        self._next = next_
+
+    def enclosing(self, obj):
+        return ('enclosing', obj)
+
+    def prev(self, obj):
+        return self._prev
+
+    def next(self, obj):
+        return self._next
+
+    def exists(self, value):
+        return value is not None
+
+    def true(self, obj):
+        return True
+
+    def false(self, obj):
+        return False
+
+    def max(self, *values):
+        values = [value for value in values if value is not None]
+        return max(values) if len(values) > 0 else None
+
+    def hash(self, value):
+        return value
+
+
+_expressions = [
+    'eq(enclosing())',
+    'gt(prev()) AND lt(next())',
+    'gt(prev()) OR lt(next())',
+    '(gt(prev())) OR (lt(next()) AND ne(false()))',
+    'eq(hash)',
+    'eq(hash, enclosing())',
+    'ge(max(prev() next()))',
+    'if exists(prev()) then gt(prev()) elif exists(next()) then lt(next()) '
+    'else ne(enclosing())',
+    'if false() then gt(prev())',
+    'if true() then gt(prev()) else lt(next()) eq(enclosing()) OR ne(prev())',
+]
+
+_structs = [
+    _Struct(1, 5),
+    _Struct(None, 5),
+    _Struct(None, None),
+    _Struct(False, 0),
+]
+
+
+def _visit(expression, obj, struct, dg):
+    visitor = SymbolicVisitor(obj, struct, dg=dg)
+    visit_parse_tree(parse_symbolic(expression), visitor)
+    return visitor.constraints
+
+
+class TestCompileSymbolic:
+    @pytest.mark.parametrize('expression', _expressions)
+    @pytest.mark.parametrize('dg', [False, True])
+    def test_equivalent(self, expression, dg):
+        compiled = compile_symbolic(expression)
+        for obj, struct in itertools.product([3, 'meow'], _structs):
+            assert compiled(obj, struct, dg) == _visit(expression, obj, struct, dg)
+
+    def test_cached(self):
+        assert compile_symbolic('eq(enclosing())') is compile_symbolic('eq(enclosing())')
+
+    @pytest.mark.parametrize('expression', ['eq(meow())', 'eq(meow)'])
+    def test_undefined(self, expression):
+        with pytest.raises(AttributeError):
+            _visit(expression, 3, _structs[0], False)
+        with pytest.raises(AttributeError):
+            compile_symbolic(expression)(3, _structs[0])
@@ -0,0 +1,63 @@
+import pytest
+
+from saltyrtc.server import (
+    DeletionJob,
+    DeletionPhase,
+    DeletionStatus,
+    parse_taints,
+)
+
+
+class TestParseTaints:
+    def test_multiple(self):
+        assert parse_taints(['512, 1024', '2048']) == [512, 1024, 2048]
+
+    def test_repeated(self):
+        assert parse_taints(['512', '512,1024']) == [512, 1024]
+
+    @pytest.mark.parametrize('values', [[], [''], ['meow'], ['512, 0'], ['-1']])
+    def test_invalid(self, values):
+        with pytest.raises(ValueError):
+            parse_taints(values)
+
+
+class TestDeletionJob:
+    def test_document(self):
+        job = DeletionJob(1, [512])
+        assert job.status == DeletionStatus.pending
+        assert not job.done
+
+        job.start()
+        job.objects_synthesized += 2
+        job.add_timing(DeletionPhase.scan, 0.5)
+        job.add_timing(DeletionPhase.scan, 0.25)
+        job.finish()
+        assert job.done
+
+        document = job.to_dict()
+        assert document['id'] == 1
+        assert document['taints'] == [512]
+        assert document['status'] == 'finished'
+        assert document['started'] <= document['finished']
+        assert document['counts'] == {
+            'system_objects_spliced': 0,
+            'objects_synthesized': 2,
+            'objects_flagged': 0,
+            'presolve_hits': 0,
+            'presolve_misses': 0,
+        }
+        assert document['timings'] == {
+            'scan': 0.75,
+            'concretize': 0.0,
+            'synthesize': 0.0,
+            'replace': 0.0,
+        }
+        assert document['failures'] == []
+
+    def test_failed(self):
+        job = DeletionJob(1, [512])
+        job.start()
+        job.finish(error='meow')
+        assert job.done
+        assert job.status == DeletionStatus.failed
+        assert job.to_dict()['failures'] == ['meow']
@@ -0,0 +1,124 @@
+"""
+The flags and taints of Splice objects are packed into a single int and
+objects without constraints share a single empty tuple.
+"""
+import copy
+import itertools
+import pytest
+
+from saltyrtc.splice.splice import (
+    EMPTY_CONSTRAINTS,
+    SPLICE_SLOTS,
+)
+from saltyrtc.splice.splicetypes import (
+    SpliceBytearray,
+    SpliceInt,
+    SpliceStr,
+)
+
+
+def _constraint(obj, struct):
+    return {'gt': [0]}
+
+
+def _other_constraint(obj, struct):
+    return {'lt': [10]}
+
+
+@pytest.fixture(params=[(SpliceInt, 5), (SpliceStr, 'meow'), (SpliceBytearray, b'meow')])
+def splice_type(request):
+    return request.param
+
+
+class TestMeta:
+    def test_slots(self):
+        assert SpliceStr.__slots__ == SPLICE_SLOTS
+        assert not hasattr(SpliceStr('meow'), '__dict__')
+
+    def test_default(self, splice_type):
+        cls, value = splice_type
+        obj = cls(value)
+        assert obj.trusted
+        assert not obj.synthesized
+        assert obj.taints == 0
+        assert obj._meta == 0
+
+    @pytest.mark.parametrize('trusted, synthesized, taints', [
+        (trusted, synthesized, taints)
+        for trusted, synthesized, taints in itertools.product(
+            [True, False], [True, False], [0, 1, 0b1010, 1 << 100])
+        if not (trusted and synthesized)
+    ])
+    def test_round_trip(self, splice_type, trusted, synthesized, taints):
+        cls, value = splice_type
+        obj = cls(value, trusted=trusted, synthesized=synthesized, taints=taints)
+        assert obj.trusted is trusted
+        assert obj.synthesized is synthesized
+        assert obj.taints == taints
+
+        # Changing a flag or the taints must not affect the others
+        obj.taints = taints << 1
+        assert (obj.trusted, obj.synthesized) == (trusted, synthesized)
+        obj.trusted = not trusted
+        assert obj.synthesized is synthesized
+        assert obj.taints == taints << 1
+        obj.synthesized = not synthesized
+        assert obj.trusted is not trusted
+        assert obj.taints == taints << 1
+
+    def test_no_taints(self, splice_type):
+        cls, value = splice_type
+        obj = cls(value, taints=None)
+        assert obj.taints == 0
+        obj = cls(value, trusted=False, taints=0b110)
+        obj.taints = None
+        assert obj.taints == 0
+        assert not obj.trusted
+
+    # Note: bytearray does not copy the state of its subclasses
+    @pytest.mark.parametrize('cls, value', [(SpliceInt, 5), (SpliceStr, 'meow')])
+    def test_copy(self, cls, value):
+        obj = cls(value, trusted=False, synthesized=True, taints=0b110)
+        for copied in (copy.copy(obj), copy.deepcopy(obj)):
+            assert copied.trusted is False
+            assert copied.synthesized is True
+            assert copied.taints == 0b110
+
+
+class TestConstraints:
+    def test_shared_empty(self, splice_type):
+        cls, value = splice_type
+        first, second = cls(value), cls(value, constraints=[])
+        assert first.constraints is EMPTY_CONSTRAINTS
+        assert second.constraints is EMPTY_CONSTRAINTS
+        assert EMPTY_CONSTRAINTS == ()
+
+    def test_tuple(self, splice_type):
+        cls, value = splice_type
+        obj = cls(value, constraints=[_constraint])
+        assert obj.constraints == (_constraint,)
+        obj.constraints = _other_constraint
+        assert obj.constraints == (_constraint, _other_constraint)
+        obj.constraints = [_constraint]
+        assert obj.constraints == (_constraint, _other_constraint, _constraint)
+
+        # Objects without constraints are not affected
+        assert cls(value).constraints == ()
+
+    def test_clear(self, splice_type):
+        cls, value = splice_type
+        obj = cls(value, constraints=[_constraint])
+        obj.clear_constraints()
+        assert obj.constraints is EMPTY_CONSTRAINTS
+        obj = cls(value, constraints=[_constraint])
+        obj.constraints = []
+        assert obj.constraints is EMPTY_CONSTRAINTS
+
+    def test_invalid(self, splice_type):
+        cls, value = splice_type
+        obj = cls(value)
+        with pytest.raises(TypeError):
+            obj.constraints = 5
+        with pytest.raises(TypeError):
+            obj.constraints = [5]
+        assert obj.constraints is EMPTY_CONSTRAINTS
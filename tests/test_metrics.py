@@ -0,0 +1,73 @@
+import pytest
+
+from saltyrtc.server import Histogram
+from saltyrtc.server.metrics import _render_splice_profile
+from saltyrtc.splice import profiler
+
+
+class TestHistogram:
+    def test_exact_small_values(self):
+        histogram = Histogram(sub_bucket_bits=5)
+        for value in range(32):
+            histogram.record(value)
+        assert histogram.count == 32
+        assert histogram.sum == sum(range(32))
+        assert histogram.max == 31
+        assert histogram.percentile(50.0) == 15
+        assert histogram.percentile(100.0) == 31
+
+    def test_relative_error(self):
+        """
+        Ensure the relative error of recorded values is bounded by the
+        amount of sub-buckets.
+        """
+        histogram = Histogram(sub_bucket_bits=5)
+        for value in (100, 1000, 123456, 10 ** 9):
+            histogram.record(value)
+            lower_bound = histogram.percentile(100.0)
+            assert lower_bound <= value
+            assert value - lower_bound <= value / 16
+        assert histogram.max == 10 ** 9
+
+    def test_clamped(self):
+        histogram = Histogram(highest=1000)
+        histogram.record(-1)
+        histogram.record(10 ** 12)
+        assert histogram.count == 2
+        assert histogram.percentile(0.0) == 0
+        assert histogram.max == 10 ** 12
+
+    def test_cumulative(self):
+        histogram = Histogram()
+        for value in (0, 1, 3, 4, 100):
+            histogram.record(value)
+        cumulative = list(histogram.cumulative())
+        assert cumulative[:4] == [(1, 1), (2, 2), (4, 3), (8, 4)]
+        assert cumulative[-1] == (128, 5)
+
+    def test_invalid_sub_bucket_bits(self):
+        with pytest.raises(ValueError):
+            Histogram(sub_bucket_bits=0)
+
+
+class TestSpliceProfile:
+    def test_render(self, mocker):
+        mocker.patch.dict(profiler.method_stats, {
+            ('SpliceBytes', '__getitem__'): [3, 0.5, 7],
+            ('SpliceInt', '__add__'): [0, 0.0, 0],
+        })
+        mocker.patch.dict(profiler.conversion_stats, {'bytes': 2})
+        mocker.patch.dict(profiler.construction_stats, {'SpliceBytes': 4})
+        lines = []
+        _render_splice_profile(lines)
+        assert ('saltyrtc_splice_method_calls_total'
+                '{class="SpliceBytes",method="__getitem__"} 3') in lines
+        assert ('saltyrtc_splice_method_seconds_total'
+                '{class="SpliceBytes",method="__getitem__"} 0.5') in lines
+        assert '# TYPE saltyrtc_splice_method_allocated_blocks gauge' in lines
+        assert ('saltyrtc_splice_method_allocated_blocks'
+                '{class="SpliceBytes",method="__getitem__"} 7') in lines
+        assert 'saltyrtc_splice_conversions_total{type="bytes"} 2' in lines
+        assert 'saltyrtc_splice_constructions_total{class="SpliceBytes"} 4' in lines
+        # Methods that have not been called are omitted
+        assert not any('__add__' in line for line in lines)
@@ -561,16 +561,19 @@ class TestProtocol:
         )
 
         # Wait for two pings (including pongs)
-        await sleep(2.1)
+        # Note: Pings may be sent up to one tick of the timeout wheel late.
+        await sleep(2.3)
 
         # Check ping counter
         assert len(server.protocols) == 1
         protocol = next(iter(server.protocols))
         assert protocol.client.keep_alive_pings == 2
+        assert len(server.keep_alive) == 1
 
         # Bye
         await initiator.close()
         await server.wait_connections_closed()
+        assert len(server.keep_alive) == 0
 
     @pytest.mark.asyncio
     async def test_keep_alive_pings_responder(self, sleep, server, client_factory):
@@ -585,7 +588,8 @@ class TestProtocol:
         )
 
         # Wait for two pings (including pongs)
-        await sleep(1.1)
+        # Note: Pings may be sent up to one tick of the timeout wheel late.
+        await sleep(1.2)
 
         # Check ping counter
         assert len(server.protocols) == 1
@@ -1064,6 +1068,41 @@ class TestProtocol:
         assert not initiator.ws_client.open
         assert initiator.ws_client.close_code == CloseCode.protocol_error
 
+    @pytest.mark.asyncio
+    async def test_relay_invalid_source(
+            self, pack_nonce, cookie_factory, server, client_factory
+    ):
+        """
+        Check that the server closes with Protocol Error when a relay
+        message towards a connected responder uses another client's
+        source address.
+        """
+        # Initiator handshake
+        initiator, i = await client_factory(initiator_handshake=True)
+        connection_closed_future = server.wait_connection_closed_marker()
+        i['rccsn'] = 456987
+        i['rcck'] = cookie_factory()
+
+        # Responder handshake
+        responder, r = await client_factory(responder_handshake=True)
+
+        # new-responder
+        await initiator.recv()
+
+        # Send relay message with the responder's address as source
+        await initiator.send(pack_nonce(i['rcck'], r['id'], r['id'], i['rccsn']), {
+            'type': 'meow',
+        }, box=None)
+
+        # Expect protocol error
+        await connection_closed_future()
+        assert not initiator.ws_client.open
+        assert initiator.ws_client.close_code == CloseCode.protocol_error
+
+        # Bye
+        await responder.close()
+        await server.wait_connections_closed()
+
     @pytest.mark.asyncio
     async def test_relay_unencrypted(
             self, pack_nonce, cookie_factory, server, client_factory
@@ -1183,6 +1222,48 @@ class TestProtocol:
         await responder.close()
         await server.wait_connections_closed()
 
+    @pytest.mark.asyncio
+    async def test_relay_pipelined(
+            self, mocker, pack_nonce, cookie_factory, server, client_factory
+    ):
+        """
+        Check that relay messages are delivered in order when multiple
+        messages of a client are allowed to be in flight.
+        """
+        mocker.patch.object(server, 'relay_window', 4)
+
+        # Initiator handshake
+        initiator, i = await client_factory(initiator_handshake=True)
+        i['rccsn'] = 2 ** 20
+        i['rcck'] = cookie_factory()
+
+        # Responder handshake
+        responder, r = await client_factory(responder_handshake=True)
+
+        # new-responder
+        await initiator.recv()
+
+        # Send relay messages: initiator --> responder
+        for index in range(10):
+            await initiator.send(pack_nonce(i['rcck'], i['id'], r['id'], i['rccsn']), {
+                'type': 'meow',
+                'index': index,
+            }, box=None)
+            i['rccsn'] += 1
+
+        # Receive relay messages in order: initiator --> responder
+        for index in range(10):
+            message, _, ck, s, d, csn = await responder.recv(box=None)
+            assert ck == i['rcck']
+            assert s == i['id']
+            assert d == r['id']
+            assert message['index'] == index
+
+        # Bye
+        await initiator.close()
+        await responder.close()
+        await server.wait_connections_closed()
+
     @pytest.mark.asyncio
     async def test_relay_receiver_offline(
             self, pack_nonce, cookie_factory, server, client_factory
@@ -1536,8 +1617,9 @@ class TestProtocol:
         send = path_client._connection.send
 
         # Mock responder instance: Slow-motion sending
+        # Note: Relay timeouts may expire up to one tick of the timeout wheel late.
         async def _mock_send(*args, **kwargs):
-            await sleep(0.2)
+            await sleep(0.4)
             return await send(*args, **kwargs)
 
         mocker.patch.object(path_client._connection, 'send', _mock_send)
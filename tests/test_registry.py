@@ -0,0 +1,132 @@
+"""
+The registry of tainted Splice objects must find every live object that
+carries a taint and must never hand out an object that is gone.
+"""
+import copy
+import gc
+import itertools
+import pickle
+import pytest
+
+from saltyrtc.splice import registry
+from saltyrtc.splice.splicetypes import (
+    SpliceInt,
+    SpliceStr,
+)
+
+# Use a taint bit of its own for each test, so that objects of other tests
+# (or modules) cannot interfere.
+_bits = itertools.count(200)
+
+
+@pytest.fixture
+def taint():
+    return 1 << next(_bits)
+
+
+def _ids(objects):
+    return sorted(id(obj) for obj in objects)
+
+
+class TestRegistry:
+    def test_weakref(self, taint):
+        """
+        Objects that support weak references are registered weakly, equal
+        objects are distinct entries.
+        """
+        assert SpliceStr.__weakrefoffset__
+        first = SpliceStr('meow', taints=taint)
+        second = SpliceStr('meow', taints=taint)
+        assert _ids(registry.tainted_objects(taint)) == _ids([first, second])
+        del first
+        gc.collect()
+        assert registry.tainted_objects(taint) == [second]
+
+    def test_id(self, taint):
+        """
+        Objects that do not support weak references are registered by id
+        and unregister themselves once finalized.
+        """
+        assert not SpliceInt.__weakrefoffset__
+        first = SpliceInt(5, taints=taint)
+        second = SpliceInt(5, taints=taint)
+        assert _ids(registry.tainted_objects(taint)) == _ids([first, second])
+        size = registry.size()
+        del first
+        assert registry.size() == size - 1
+        assert registry.tainted_objects(taint) == [second]
+
+    def test_finalization_of_cycle(self, taint):
+        """
+        An object that is only reachable from a reference cycle must be
+        unregistered once the cycle has been collected.
+        """
+        obj = SpliceInt(5, taints=taint)
+        obj.cycle = obj
+        obj_id = id(obj)
+        del obj
+        gc.collect()
+        assert obj_id not in registry._registered_ids
+        assert registry.tainted_objects(taint) == []
+
+    def test_lookup_while_collecting(self, taint):
+        """
+        Looking up objects must not hand out objects of reference cycles
+        that have been collected in the meantime.
+        """
+        threshold = gc.get_threshold()
+        gc.set_threshold(1)
+        try:
+            for _ in range(50):
+                obj = SpliceInt(5, taints=taint)
+                obj.cycle = obj
+                del obj
+                for obj in registry.tainted_objects(taint):
+                    assert obj.taints == taint
+                for obj in registry.tainted_objects_in([taint, taint << 1]):
+                    assert obj.taints == taint
+        finally:
+            gc.set_threshold(*threshold)
+        assert gc.isenabled()
+
+    @pytest.mark.parametrize('cls, value', [(SpliceInt, 5), (SpliceStr, 'meow')])
+    def test_retaint(self, taint, cls, value):
+        """
+        An object that has been re-tainted is only found under its current
+        taints.
+        """
+        other = taint << 1
+        obj = cls(value, taints=taint)
+        obj.taints = other
+        assert registry.tainted_objects(taint) == []
+        assert registry.tainted_objects(other) == [obj]
+        obj.taints = taint | other
+        assert registry.tainted_objects(taint) == []
+        assert registry.tainted_objects(taint | other) == [obj]
+
+    @pytest.mark.parametrize('cls, value', [(SpliceInt, 5), (SpliceStr, 'meow')])
+    def test_copies(self, taint, cls, value):
+        obj = cls(value, trusted=False, taints=taint)
+        copies = [copy.copy(obj), copy.deepcopy(obj), pickle.loads(pickle.dumps(obj))]
+        for copied in copies:
+            assert copied.taints == taint
+            assert not copied.trusted
+        assert _ids(registry.tainted_objects(taint)) == _ids([obj, *copies])
+
+    def test_tainted_objects_in(self, taint):
+        other = taint << 1
+        objects = [
+            SpliceInt(5, taints=taint),
+            SpliceStr('meow', taints=taint),
+            SpliceInt(5, taints=other),
+            SpliceStr('meow', taints=taint | other),
+        ]
+        found = registry.tainted_objects_in([taint, taint | other, 0])
+        assert _ids(found) == _ids([objects[0], objects[1], objects[3]])
+        assert registry.tainted_objects_in([other]) == [objects[2]]
+        assert registry.tainted_objects_in([]) == []
+
+    def test_untainted(self):
+        obj = SpliceInt(5)
+        assert id(obj) not in registry._registered_ids
+        assert registry.tainted_objects(0) == []
@@ -4,9 +4,13 @@ instance behaves as expected.
 """
 import asyncio
 import collections
+import json
 import pytest
+import websockets
 
 from saltyrtc.server import (
+    DELETION_CONTENT_TYPE,
+    METRICS_CONTENT_TYPE,
     SERVER_ADDRESS,
     CloseCode,
     PathClient,
@@ -211,8 +215,10 @@ class TestServer:
         class _MockProtocol(ServerProtocol):
             async def initiator_receive_loop(self):
                 # Wait until closed (and a little further)
+                # Note: The keep-alive scheduler may send the ping up to one
+                #       tick of its timeout wheel after the interval.
                 result = await self.client.connection_closed_future
-                await sleep(0.1)
+                await sleep(0.3)
                 raise result
 
         mocker.patch.object(server, 'protocol_class', _MockProtocol)
@@ -664,11 +670,12 @@ class TestServer:
             client_factory, initiator_key
     ):
         """
-        Ensure the server detects cancellation of itself when running a
-        relay task.
+        Ensure the server detects cancellation of itself when relaying
+        a message.
 
-        In this case, the relay task of the initiator is the currently
-        active job of the responder.
+        In this case, the relay message of the initiator is currently
+        being written by the responder's job queue runner. Writing must
+        be cancelled once the initiator has been dropped.
         """
         sending_in_progress_future = asyncio.Future(loop=event_loop)
         cancelled_future = asyncio.Future(loop=event_loop)
@@ -741,13 +748,14 @@ class TestServer:
             client_factory, initiator_key
     ):
         """
-        Ensure the server detects cancellation of itself when running a
-        relay task.
+        Ensure the server detects cancellation of itself when relaying
+        a message.
 
-        In this case, the relay task of the initiator is a queued job
-        for the responder.
+        In this case, the relay message of the initiator is queued
+        behind another job of the responder and must not be written
+        once the initiator has been dropped.
         """
-        sending_in_progress_future = asyncio.Future(loop=event_loop)
+        frame_queued_future = asyncio.Future(loop=event_loop)
         cancelled_future = asyncio.Future(loop=event_loop)
 
         # Responder handshake
@@ -757,7 +765,7 @@ class TestServer:
 
         class _MockProtocol(ServerProtocol):
             async def keep_alive_loop(self):
-                await sending_in_progress_future
+                await frame_queued_future
                 raise exception.PingTimeoutError('Meh!')
 
             async def initiator_receive_loop(self):
@@ -780,19 +788,18 @@ class TestServer:
         # Get initiator's PathClient instance
         path = server.paths.get(initiator_key.pk)
         path_client = path.get_responder(r['id'])
-        _send = path_client._connection.send
 
-        # Mock responder instance: Block forwarding on send
-        async def _mock_send(*_):
-            mocker.patch.object(path_client._connection, 'send', _send)
-            await sleep(0.1)
-            sending_in_progress_future.set_result(None)
-            await sleep(5.0)
-            cancelled_future.set_exception(asyncio.TimeoutError())
+        # Mock responder's job queue: Detect when the relay message has been queued
+        jobs_class = type(path_client.jobs)
+        _enqueue_frame = jobs_class.enqueue_frame
 
-        mocker.patch.object(path_client._connection, 'send', _mock_send)
+        def _mock_enqueue_frame(self, frame):
+            _enqueue_frame(self, frame)
+            frame_queued_future.set_result(None)
+
+        mocker.patch.object(jobs_class, 'enqueue_frame', _mock_enqueue_frame)
 
-        # Schedule a blocking job to keep the send job behind
+        # Schedule a blocking job to keep the relay message behind
         async def blocking_job():
             await asyncio.shield(cancelled_future, loop=event_loop)
         await path_client.jobs.enqueue(blocking_job())
@@ -802,14 +809,14 @@ class TestServer:
         await initiator.send(nonce, b'\xfe' * 2**15, box=None)
         i['ccsn'] += 1
 
-        # Wait for the sending procedure to be started, then wait for the keep-alive loop
+        # Wait for the relay message to be queued, then wait for the keep-alive loop
         # to time out.
-        await sending_in_progress_future
+        await frame_queued_future
 
         # Expect the initiator's receive loop to be cancelled
         await cancelled_future
 
-        # Responder: Receive 'disconnected' message
+        # Responder: Receive 'disconnected' message (and not the relay message)
         message, *_ = await responder.recv()
         assert message == {'type': 'disconnected', 'id': i['id']}
 
@@ -971,3 +978,78 @@ class TestServer:
         # Bye
         await responder.close()
         await server.wait_connections_closed()
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, mocker, server, client_factory):
+        """
+        Ensure the metrics are being served on the metrics path only.
+        """
+        mocker.patch.object(server, 'metrics_path', '/metrics')
+        # Note: The server is shared with previous tests of this module.
+        connections = server.metrics.connections
+        relayed = server.metrics.relay_latency.count
+
+        # Initiator handshake
+        initiator, _ = await client_factory(initiator_handshake=True)
+        assert server.metrics.connections == connections + 1
+
+        # Other paths are not affected
+        assert await server.process_request(None, '/meow', {}) is None
+
+        # Get metrics
+        status, headers, body = await server.process_request(None, '/metrics', {})
+        assert status == 200
+        assert headers == [('Content-Type', METRICS_CONTENT_TYPE)]
+        metrics = body.decode('utf-8').splitlines()
+        assert 'saltyrtc_connections_total {}'.format(connections + 1) in metrics
+        assert 'saltyrtc_clients{state="authenticated"} 1' in metrics
+        assert 'saltyrtc_paths 1' in metrics
+        assert 'saltyrtc_relay_latency_seconds_count {}'.format(relayed) in metrics
+
+        # Bye
+        await initiator.close()
+        await server.wait_connections_closed()
+
+    @pytest.mark.asyncio
+    async def test_deletion_request(self, mocker, sleep, server):
+        """
+        Ensure deletion jobs can be created and their status can be
+        requested on the deletion path.
+        """
+        mocker.patch.object(server, 'deletion_path', '/deletions')
+
+        # Other paths are not affected
+        headers = websockets.http.Headers()
+        assert await server.process_request(None, '/meow', headers) is None
+
+        # Taints are required
+        status, _, body = await server.process_request(None, '/deletions', headers)
+        assert status == 400
+        assert 'error' in json.loads(body.decode('utf-8'))
+
+        # Create job
+        headers['Taints'] = '512, 1024'
+        status, response_headers, body = await server.process_request(
+            None, '/deletions', headers)
+        assert status == 202
+        assert ('Content-Type', DELETION_CONTENT_TYPE) in response_headers
+        assert ('Location', '/deletions/1') in response_headers
+        document = json.loads(body.decode('utf-8'))
+        assert document['id'] == 1
+        assert document['taints'] == [512, 1024]
+        assert document['status'] == 'pending'
+
+        # Wait until the job has finished
+        await sleep(0.1)
+        status, _, body = await server.process_request(None, '/deletions/1', headers)
+        assert status == 200
+        document = json.loads(body.decode('utf-8'))
+        assert document['status'] == 'finished'
+        assert document['counts']['objects_synthesized'] == 0
+        assert set(document['timings']) == {'scan', 'concretize', 'synthesize', 'replace'}
+        assert document['failures'] == []
+
+        # Unknown jobs
+        for path in ('/deletions/2', '/deletions/meow'):
+            status, _, _ = await server.process_request(None, path, headers)
+            assert status == 404
@@ -0,0 +1,69 @@
+"""
+The compiled argument tag helpers must agree with the pure-Python
+implementation.
+"""
+import itertools
+import pytest
+import random
+
+from saltyrtc.splice import splice
+from saltyrtc.splice.splicetypes import (
+    SpliceBytearray,
+    SpliceFloat,
+    SpliceInt,
+    SpliceStr,
+)
+
+_speedups = pytest.importorskip('saltyrtc.splice._speedups')
+
+
+def _arguments():
+    yield SpliceInt(5)
+    yield SpliceInt(5, trusted=False, taints=0b100)
+    yield SpliceStr('meow', trusted=False, synthesized=True, taints=1 << 100)
+    yield SpliceFloat(1.5, taints=0b11)
+    yield SpliceBytearray(b'meow', trusted=False)
+    yield 5
+    yield 'meow'
+    yield None
+    yield [SpliceInt(5, taints=0b1000), 'meow']
+    yield (SpliceStr('purr', trusted=False, synthesized=True), 5)
+    yield {'meow': SpliceInt(5, trusted=False, taints=0b10000)}
+    yield {SpliceInt(1, taints=0b100000)}
+
+
+class TestSpeedups:
+    @pytest.fixture(autouse=True)
+    def init(self):
+        # Note: Speedups may have been disabled via the environment
+        _speedups.init(splice.SpliceMixin, splice._py_argument_tags)
+
+    def test_argument_tags(self):
+        for arg in _arguments():
+            assert _speedups.argument_tags(arg) == splice._py_argument_tags(arg)
+
+    def test_arguments_tags(self):
+        arguments = list(_arguments())
+        for args in itertools.chain(
+                [()],
+                itertools.combinations(arguments, 1),
+                itertools.combinations(arguments, 2),
+        ):
+            assert _speedups.arguments_tags(args) == splice._py_arguments_tags(args)
+            assert _speedups.arguments_tags(args, None) == splice._py_arguments_tags(args)
+
+    def test_arguments_tags_kwargs(self):
+        arguments = list(_arguments())
+        rand = random.Random(42)
+        for _ in range(500):
+            args = tuple(rand.sample(arguments, rand.randint(0, 3)))
+            kwargs = {'kwarg{}'.format(index): arg for index, arg in enumerate(
+                rand.sample(arguments, rand.randint(0, 3)))}
+            expected = splice._py_arguments_tags(args, kwargs)
+            assert _speedups.arguments_tags(args, kwargs) == expected
+
+    def test_invalid(self):
+        with pytest.raises(TypeError):
+            _speedups.arguments_tags([5])
+        with pytest.raises(TypeError):
+            _speedups.arguments_tags((5,), [5])
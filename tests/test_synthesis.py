@@ -0,0 +1,156 @@
+"""
+The pre-solver of the Splice synthesizers must only produce values that
+satisfy the constraints it claims to have solved.
+"""
+import math
+import pytest
+import random
+
+from saltyrtc.splice import synthesis
+from saltyrtc.splice.executor import _synthesize_chunk
+from saltyrtc.splice.hashtable import (
+    SpliceDict,
+    _hash_preimage,
+)
+from saltyrtc.splice.splicetypes import SpliceInt
+from saltyrtc.splice.synthesis import (
+    FloatSynthesizer,
+    IntSynthesizer,
+    StrSynthesizer,
+)
+
+
+def _satisfies(value, constraints):
+    return (all(value > bound for bound in constraints.get('gt', ())) and
+            all(value >= bound for bound in constraints.get('ge', ())) and
+            all(value < bound for bound in constraints.get('lt', ())) and
+            all(value <= bound for bound in constraints.get('le', ())) and
+            all(value != excluded for excluded in constraints.get('ne', ())))
+
+
+class TestHashPreimage:
+    def test_attached(self):
+        assert SpliceDict.hash.preimage is _hash_preimage
+
+    def test_exhaustive(self):
+        for h in range(5000):
+            preimage = _hash_preimage(h)
+            if preimage is None:
+                continue
+            assert len(preimage) <= StrSynthesizer.DEFAULT_MAX_CHAR_LENGTH
+            assert all(32 <= ord(char) <= 126 for char in preimage)
+            assert SpliceDict.hash(preimage) == h
+
+    def test_hashes_of_strings(self):
+        rand = random.Random(42)
+        for _ in range(500):
+            string = ''.join(chr(rand.randint(32, 126))
+                             for _ in range(rand.randint(1, 20)))
+            h = SpliceDict.hash(string)
+            preimage = _hash_preimage(h)
+            assert preimage is not None
+            assert SpliceDict.hash(preimage) == h
+
+    def test_unreachable(self):
+        # Below the hash of ' '
+        assert _hash_preimage(1) is None
+        assert _hash_preimage(31) is None
+
+
+class TestPresolve:
+    @pytest.mark.parametrize('constraints', [
+        {'gt': [3]},
+        {'ge': [3]},
+        {'lt': [-3]},
+        {'le': [-3]},
+        {'gt': [3], 'lt': [7], 'ne': [4, 5]},
+        {'ge': [3], 'le': [3]},
+        {'gt': [2.5], 'le': [3.5]},
+        {'gt': [1, 5], 'lt': [10, 7]},
+        {'ne': [0, 1, 2]},
+    ])
+    def test_int(self, constraints):
+        synthesized = IntSynthesizer().presolve(constraints)
+        assert synthesized is not None
+        assert synthesized.synthesized
+        assert _satisfies(int(synthesized), constraints)
+
+    @pytest.mark.parametrize('constraints', [
+        {'gt': [3.0]},
+        {'lt': [-3.5]},
+        {'gt': [1.0], 'lt': [2.0]},
+        {'ge': [1.5], 'le': [1.5]},
+        {'gt': [0.0], 'lt': [1.0], 'ne': [0.5]},
+        {'ne': [3.0]},
+    ])
+    def test_float(self, constraints):
+        synthesized = FloatSynthesizer().presolve(constraints)
+        assert synthesized is not None
+        assert synthesized.synthesized
+        assert _satisfies(float(synthesized), constraints)
+
+    @pytest.mark.parametrize('synthesizer', [IntSynthesizer, FloatSynthesizer])
+    @pytest.mark.parametrize('constraints', [
+        {'gt': [5], 'lt': [5]},
+        {'ge': [3], 'le': [3], 'ne': [3]},
+    ])
+    def test_numeric_conflict(self, synthesizer, constraints):
+        assert synthesizer().presolve(constraints) is None
+
+    @pytest.mark.parametrize('synthesizer', [IntSynthesizer, FloatSynthesizer])
+    @pytest.mark.parametrize('constraints', [
+        {'lt': [math.inf]},
+        {'gt': [-math.inf]},
+        {'gt': [math.nan]},
+        {'gt': [3], 'lt': [math.inf]},
+        {'ne': [math.nan]},
+    ])
+    def test_numeric_not_finite(self, synthesizer, constraints):
+        assert synthesizer().presolve(constraints) is None
+
+    @pytest.mark.parametrize('constraints', [
+        {'gt': ['meow']},
+        {'lt': ['meow']},
+    ])
+    def test_str_bounds(self, constraints):
+        synthesized = StrSynthesizer().presolve(constraints)
+        assert synthesized is not None
+        assert synthesized.synthesized
+        assert _satisfies(str(synthesized), constraints)
+
+    def test_str_hash(self):
+        h = SpliceDict.hash('meow')
+        synthesized = StrSynthesizer().presolve({'eq': [(SpliceDict.hash, h)]})
+        assert synthesized is not None
+        assert SpliceDict.hash(str(synthesized)) == h
+
+    @pytest.mark.parametrize('constraints', [
+        {'lt': ['']},
+        {'gt': ['meow'], 'lt': ['purr']},
+        {'eq': [(len, 4)]},
+        {'gt': ['meow', 'purr']},
+        {'gt': ['m' * StrSynthesizer.DEFAULT_MAX_CHAR_LENGTH]},
+    ])
+    def test_str_unsupported(self, constraints):
+        assert StrSynthesizer().presolve(constraints) is None
+
+    def test_stats(self, monkeypatch):
+        monkeypatch.setattr(synthesis, 'presolve_stats', {'hits': 0, 'misses': 0})
+        synthesizer = IntSynthesizer()
+        assert synthesizer.splice_synthesis([{'gt': [3]}]) is not None
+        assert synthesis.presolve_stats == {'hits': 1, 'misses': 0}
+
+
+class TestSynthesizeChunk:
+    def test_presolve_stats(self):
+        items = [
+            (SpliceInt, [{'gt': [3]}]),
+            (SpliceInt, [{'eq': [(lambda value: value * 2, 10)]}]),
+            (SpliceInt, None),
+        ]
+        results, hits, misses = _synthesize_chunk(items)
+        assert len(results) == 3
+        assert results[0][0] is SpliceInt and results[0][1] > 3
+        assert results[1] == (SpliceInt, 5)
+        assert results[2] is None
+        assert (hits, misses) == (1, 1)
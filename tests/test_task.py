@@ -0,0 +1,185 @@
+import asyncio
+import pytest
+
+from saltyrtc.server import (
+    Disconnected,
+    FrameJob,
+    JobQueue,
+    JobQueueLimits,
+    TimeoutWheel,
+    util,
+)
+
+
+class _Entry:
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = asyncio.Future(loop=loop)
+
+    def expire(self):
+        self.future.set_result(self.loop.time())
+
+
+class _Frame(FrameJob):
+    __slots__ = ('result',)
+
+    def done(self, exc):
+        self.result = exc
+
+
+class TestTimeoutWheel:
+    @pytest.mark.asyncio
+    async def test_expire(self, event_loop):
+        """
+        Ensure entries expire after their timeout but not earlier.
+        """
+        wheel = TimeoutWheel(event_loop, resolution=0.05)
+        entry = _Entry(event_loop)
+        start = event_loop.time()
+        wheel.add(0.1, entry)
+        assert len(wheel) == 1
+
+        expired = await asyncio.wait_for(entry.future, 1.0, loop=event_loop)
+        assert 0.1 <= expired - start < 0.5
+        assert len(wheel) == 0
+
+    @pytest.mark.asyncio
+    async def test_remove(self, event_loop, sleep):
+        """
+        Ensure removed entries do not expire.
+        """
+        wheel = TimeoutWheel(event_loop, resolution=0.05)
+        first, second = _Entry(event_loop), _Entry(event_loop)
+        tick = wheel.add(0.1, first)
+        wheel.add(0.1, second)
+        wheel.remove(tick, first)
+        assert len(wheel) == 1
+
+        await asyncio.wait_for(second.future, 1.0, loop=event_loop)
+        await sleep(0.1)
+        assert not first.future.done()
+
+    @pytest.mark.asyncio
+    async def test_close(self, event_loop, sleep):
+        """
+        Ensure closing removes all entries without expiring them.
+        """
+        wheel = TimeoutWheel(event_loop, resolution=0.05)
+        entry = _Entry(event_loop)
+        wheel.add(0.05, entry)
+        wheel.close()
+        assert len(wheel) == 0
+
+        await sleep(0.2)
+        assert not entry.future.done()
+
+
+class TestJobQueue:
+    @pytest.mark.asyncio
+    async def test_watermarks_bytes(self, event_loop):
+        """
+        Ensure the job queue is not writable above the high watermark
+        until it dropped to the low watermark.
+        """
+        limits = JobQueueLimits(high_bytes=100, low_bytes=50, high_jobs=10, low_jobs=10)
+        jobs = JobQueue(util.get_logger('test.jobs'), event_loop, limits=limits)
+        blocker = asyncio.Future(loop=event_loop)
+
+        async def job():
+            await blocker
+
+        # Exceed the high watermark
+        for _ in range(3):
+            await jobs.enqueue(job(), size=40)
+        assert jobs.size == 120
+        assert not jobs.writable
+
+        # Drain until the low watermark has been reached
+        jobs.start(lambda _: None)
+        writable = event_loop.create_task(jobs.wait_writable())
+        blocker.set_result(None)
+        await asyncio.wait_for(writable, 1.0, loop=event_loop)
+        assert jobs.size <= 50
+
+        # Bye
+        jobs.close(Disconnected(1000))
+        await asyncio.wait_for(jobs.join(), 1.0, loop=event_loop)
+        assert jobs.size == 0
+
+    @pytest.mark.asyncio
+    async def test_watermarks_jobs(self, event_loop):
+        """
+        Ensure the amount of queued jobs is bounded as well.
+        """
+        limits = JobQueueLimits(high_jobs=2, low_jobs=0)
+        jobs = JobQueue(util.get_logger('test.jobs'), event_loop, limits=limits)
+
+        async def job():
+            pass
+
+        for _ in range(3):
+            await jobs.enqueue(job())
+        assert not jobs.writable
+
+        # Closing releases waiting producers
+        jobs.cancel(Disconnected(1000))
+        assert jobs.writable
+        await asyncio.wait_for(jobs.wait_writable(), 1.0, loop=event_loop)
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            JobQueueLimits(high_bytes=10, low_bytes=20)
+        with pytest.raises(ValueError):
+            JobQueueLimits(high_jobs=10, low_jobs=20)
+
+    @pytest.mark.asyncio
+    async def test_frames_batched(self, event_loop):
+        """
+        Ensure consecutive frames are written in batches while keeping
+        the order of all jobs.
+        """
+        written = []
+
+        async def frame_writer(data):
+            written.append(data)
+
+        async def job():
+            written.append('job')
+
+        jobs = JobQueue(
+            util.get_logger('test.jobs'), event_loop, frame_writer=frame_writer)
+        frames = [_Frame(bytes([i])) for i in range(5)]
+        for frame in frames[:3]:
+            jobs.enqueue_frame(frame)
+        await jobs.enqueue(job())
+        for frame in frames[3:]:
+            jobs.enqueue_frame(frame)
+        assert jobs.size == 5
+
+        # Finished frames will be skipped
+        frames[1].finish(asyncio.CancelledError())
+
+        jobs.start(lambda _: None)
+        jobs.close(Disconnected(1000))
+        await asyncio.wait_for(jobs.join(), 1.0, loop=event_loop)
+        assert written == [[b'\x00', b'\x02'], 'job', [b'\x03', b'\x04']]
+        assert all(frame.result is None for frame in frames if frame is not frames[1])
+        assert jobs.size == 0
+
+    @pytest.mark.asyncio
+    async def test_frames_cancelled(self, event_loop):
+        """
+        Ensure queued frames are finished when the job queue has been
+        cancelled and further frames are rejected.
+        """
+        async def frame_writer(_):
+            pass
+
+        jobs = JobQueue(
+            util.get_logger('test.jobs'), event_loop, frame_writer=frame_writer)
+        first, second = _Frame(b'\x00'), _Frame(b'\x01')
+        jobs.enqueue_frame(first)
+        jobs.cancel(Disconnected(1000))
+        jobs.enqueue_frame(second)
+        assert isinstance(first.result, asyncio.CancelledError)
+        assert isinstance(second.result, asyncio.CancelledError)
@@ -0,0 +1,75 @@
+import logbook
+import pytest
+
+from saltyrtc.server import util
+
+
+class _Message:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'meow'
+
+
+@pytest.mark.usefixtures('logging_enabled')
+class TestLoggerAdapter:
+    def test_name(self, log_handler):
+        """
+        Ensure records of an adapter are emitted under the adapter's
+        name.
+        """
+        log = util.get_logger_adapter('test.adapter', '{}.client', 1)
+        assert log.name == 'saltyrtc.test.adapter.1.client'
+        log.extend_name('0x{:02x}', 2)
+        assert log.name == 'saltyrtc.test.adapter.1.client.0x02'
+
+        log.info('Hello {}', 'world')
+        record = log_handler.records[-1]
+        assert record.channel == 'saltyrtc.test.adapter.1.client.0x02'
+        assert record.message == 'Hello world'
+        assert record.level == logbook.INFO
+
+    def test_shared_logger(self):
+        """
+        Ensure adapters do not add loggers to the logger group.
+        """
+        util.get_logger_adapter('test.shared', '{}', 0)
+        loggers = len(util.logger_group.loggers)
+        for number in range(1, 10):
+            util.get_logger_adapter('test.shared', '{}', number)
+        assert len(util.logger_group.loggers) == loggers
+
+    def test_disabled_level(self, mocker, log_handler):
+        """
+        Ensure records of a disabled level are neither created nor
+        formatted.
+        """
+        mocker.patch.object(util.logger_group, 'level', logbook.INFO)
+        log = util.get_logger_adapter('test.level', 'client')
+        message = _Message()
+        records = len(log_handler.records)
+
+        log.debug('Message: {}', message)
+        log.trace('Message: {}', message)
+        assert not log.is_enabled(logbook.DEBUG)
+        assert len(log_handler.records) == records
+        assert message.formatted == 0
+
+        log.info('Message: {}', message)
+        assert len(log_handler.records) == records + 1
+        assert log_handler.records[-1].message == 'Message: meow'
+
+    def test_exception(self, log_handler):
+        """
+        Ensure the exception information is attached to the record.
+        """
+        log = util.get_logger_adapter('test.exception', 'client')
+        try:
+            raise ValueError('meow')
+        except ValueError as exc:
+            log.exception('Something failed:', exc)
+        record = log_handler.records[-1]
+        assert record.level == logbook.ERROR
+        assert record.exc_info[0] is ValueError
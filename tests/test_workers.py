@@ -0,0 +1,89 @@
+import binascii
+import pytest
+import socket
+import websockets
+
+from saltyrtc.server import (
+    serve,
+    worker_index,
+)
+from saltyrtc.server.workers import (
+    Acceptor,
+    _receive_fds,
+    _send_fd,
+)
+
+
+class TestWorkers:
+    def test_worker_index(self):
+        """
+        Ensure connections of the same path are assigned to the same
+        worker.
+        """
+        initiator_key = binascii.hexlify(b'\x01' * 32)
+        request_line = b'GET /' + initiator_key + b' HTTP/1.1'
+        index = worker_index(request_line, 4)
+        assert 0 <= index < 4
+        assert worker_index(request_line, 4) == index
+        assert worker_index(b'GET /' + initiator_key + b'/ HTTP/1.1', 4) == 0
+
+    def test_worker_index_invalid_path(self):
+        assert worker_index(b'GET / HTTP/1.1', 4) == 0
+        assert worker_index(b'GET /meow HTTP/1.1', 4) == 0
+        assert worker_index(b'meow', 4) == 0
+
+    def test_send_fds(self):
+        """
+        Ensure sockets can be passed over a channel and the channel
+        being closed is detected.
+        """
+        channel, worker_channel = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        first, second = socket.socketpair()
+        try:
+            _send_fd(channel, first.fileno())
+            fds = _receive_fds(worker_channel)
+            assert len(fds) == 1
+            received = socket.socket(fileno=fds[0])
+            received.sendall(b'meow')
+            assert second.recv(4) == b'meow'
+            received.close()
+
+            channel.close()
+            assert _receive_fds(worker_channel) is None
+        finally:
+            for sock in (channel, worker_channel, first, second):
+                sock.close()
+
+    @pytest.mark.asyncio
+    async def test_handshake_via_acceptor(
+            self, event_loop, server_permanent_keys, initiator_key, unpack_message
+    ):
+        """
+        Ensure a worker completes the WebSocket handshake of a connection
+        that has been handed over by the acceptor and sends the
+        server-hello.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+        channel, worker_channel = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        acceptor = Acceptor(sock, [channel], event_loop)
+        server = await serve(
+            None, server_permanent_keys, loop=event_loop, channel=worker_channel)
+        acceptor.start()
+        try:
+            ws_client = await websockets.connect(
+                'ws://127.0.0.1:{}/{}'.format(port, initiator_key.hex_pk().decode()),
+                subprotocols=pytest.saltyrtc.subprotocols, compression=None,
+                ping_interval=None, loop=event_loop)
+            try:
+                message, *_ = await unpack_message(ws_client)
+                assert message['type'] == 'server-hello'
+            finally:
+                await ws_client.close()
+        finally:
+            acceptor.close()
+            channel.close()
+            server.close()
+            await server.wait_closed()
@@ -0,0 +1,201 @@
+"""
+The specialised wrappers of decorated Splice methods (for methods taking
+one or two positional-only arguments) must propagate flags and taints
+exactly like the generic wrapper.
+"""
+import copy
+import inspect
+import itertools
+import pytest
+import types
+
+from saltyrtc.splice import splice
+from saltyrtc.splice.splicetypes import (
+    SpliceBytearray,
+    SpliceBytes,
+    SpliceInt,
+    SpliceStr,
+)
+from saltyrtc.splice.utils import positional_arity
+
+# (trusted, synthesized, taints)
+_tags = [
+    (True, False, 0),
+    (False, False, 0b100),
+    (False, True, 0b1000),
+    (True, False, 0b110000),
+]
+
+
+def _wrapper_name(method):
+    return method.__code__.co_name
+
+
+def _tags_of(obj):
+    return obj.trusted, obj.synthesized, obj.taints
+
+
+def _combined(*tags):
+    taints = 0
+    for _, _, tag_taints in tags:
+        taints |= tag_taints
+    return (all(trusted for trusted, _, _ in tags),
+            any(synthesized for _, synthesized, _ in tags),
+            taints)
+
+
+def _splice_int(value, tags):
+    trusted, synthesized, taints = tags
+    return SpliceInt(value, trusted=trusted, synthesized=synthesized, taints=taints)
+
+
+def _python_function(self, other, extra=0):
+    pass
+
+
+class _UserStr(SpliceStr):
+    pass
+
+
+@pytest.fixture
+def copies(monkeypatch):
+    """
+    Count the copies of "self" the wrappers make to check if a method
+    has modified it.
+    """
+    copied = []
+
+    def _copy(obj):
+        copied.append(obj)
+        return copy.copy(obj)
+    monkeypatch.setattr(splice, 'copy', types.SimpleNamespace(copy=_copy))
+    return copied
+
+
+class TestPositionalArity:
+    @pytest.mark.parametrize('func, arity', [
+        (int.__neg__, 1),
+        (int.__add__, 2),
+        (bytearray.insert, 3),
+        # Optional positional-only arguments
+        (int.__pow__, None),
+        (int.__round__, None),
+        (bytearray.pop, None),
+        # Keyword arguments
+        (str.split, None),
+        (_python_function, None),
+        (lambda self, other: None, None),
+        # No signature
+        (type, None),
+    ])
+    def test_arity(self, func, arity):
+        assert positional_arity(func) == arity
+
+
+class TestWrappers:
+    def test_wrapper_selection(self):
+        assert _wrapper_name(SpliceInt.__neg__) == 'unary_wrapper'
+        assert _wrapper_name(SpliceInt.__add__) == 'binary_wrapper'
+        assert _wrapper_name(SpliceInt.__round__) == 'wrapper'
+        assert _wrapper_name(SpliceInt.__pow__) == 'wrapper'
+        assert _wrapper_name(SpliceInt.from_bytes) == 'wrapper'
+        assert _wrapper_name(SpliceStr.maketrans) == 'wrapper'
+        assert _wrapper_name(SpliceBytearray.extend) == 'binary_wrapper'
+        assert _wrapper_name(SpliceBytearray.reverse) == 'unary_wrapper'
+        assert _wrapper_name(SpliceBytearray.insert) == 'wrapper'
+
+    @pytest.mark.parametrize('tags', _tags)
+    def test_unary(self, tags):
+        obj = _splice_int(7, tags)
+        # Unary wrapper and generic wrapper (a positional-only argument with a default)
+        for result in (-obj, round(obj)):
+            assert isinstance(result, SpliceInt)
+            assert _tags_of(result) == tags
+        assert _tags_of(obj) == tags
+
+    @pytest.mark.parametrize('tags, other_tags', itertools.product(_tags, repeat=2))
+    def test_binary(self, tags, other_tags):
+        obj, other = _splice_int(2, tags), _splice_int(3, other_tags)
+        expected = _combined(tags, other_tags)
+        # Binary wrapper and generic wrapper (a positional-only argument with a default)
+        for result in (obj + other, pow(obj, other)):
+            assert isinstance(result, SpliceInt)
+            assert _tags_of(result) == expected
+        # Generic wrapper with all three arguments
+        modulo_tags = (False, False, 0b1000000)
+        result = pow(obj, other, _splice_int(5, modulo_tags))
+        assert _tags_of(result) == _combined(tags, other_tags, modulo_tags)
+
+    def test_not_implemented(self):
+        obj = _splice_int(2, _tags[1])
+        assert obj.__add__('meow') is NotImplemented
+        assert obj.__pow__('meow') is NotImplemented
+
+    def test_class_method(self):
+        data = SpliceBytes(b'\x01', trusted=False, taints=0b100)
+        result = SpliceInt.from_bytes(data, 'big')
+        assert isinstance(result, SpliceInt)
+        assert _tags_of(result) == (False, False, 0b100)
+
+    def test_static_method(self):
+        result = SpliceStr.maketrans(SpliceStr('a', trusted=False, taints=0b100), 'b')
+        assert result == {97: 98}
+        for key, value in result.items():
+            assert _tags_of(key) == (False, False, 0b100)
+            assert _tags_of(value) == (False, False, 0b100)
+
+    @pytest.mark.parametrize('tags', _tags)
+    def test_mutation(self, tags):
+        """
+        A mutable "self" that is being modified takes the tags of all
+        arguments, regardless of the wrapper.
+        """
+        trusted, synthesized, taints = tags
+        other = SpliceBytes(b'c', trusted=trusted, synthesized=synthesized, taints=taints)
+        data = SpliceBytearray(b'ab')
+        data.extend(other)
+        assert _tags_of(data) == tags
+
+        data = SpliceBytearray(b'ab')
+        data.insert(0, _splice_int(99, tags))
+        assert data == b'cab'
+        assert _tags_of(data) == tags
+
+        data = SpliceBytearray(
+            b'ab', trusted=trusted, synthesized=synthesized, taints=taints)
+        data.reverse()
+        assert data == b'ba'
+        assert _tags_of(data) == tags
+
+    def test_signature(self):
+        assert inspect.signature(SpliceInt.__add__) == inspect.signature(int.__add__)
+
+
+class TestSelfCheck:
+    @pytest.mark.parametrize('cls', [SpliceInt, SpliceStr, SpliceBytes, _UserStr])
+    def test_immutable(self, cls):
+        assert cls.immutable
+
+    def test_mutable(self):
+        assert not SpliceBytearray.immutable
+
+    def test_immutable_skips_check(self, copies):
+        number = SpliceInt(2, trusted=False)
+        string = _UserStr('meow', trusted=False)
+        assert not (-number).trusted
+        assert not (number + 3).trusted
+        assert not pow(number, 3).trusted
+        assert not string.upper().trusted
+        assert not (string + 'purr').trusted
+        assert not string.split('e')[0].trusted
+        assert copies == []
+
+    def test_mutable_runs_check(self, copies):
+        data = SpliceBytearray(b'ab')
+        # Unary, binary and generic wrapper
+        data.reverse()
+        data.extend(SpliceBytes(b'c', trusted=False))
+        data.insert(0, 100)
+        assert data == b'dbac'
+        assert len(copies) == 3
+        assert not data.trusted